@@ -10,7 +10,7 @@ import cv2
 # custom
 from camera_calibration.calibration_undistort_img import Undistorter
 from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
-from yolo_wrapper import YOLOWrapper
+from yolo_wrapper import load_yolo
 
 
 # ===== 하드코딩 설정 =====
@@ -27,7 +27,7 @@ CONF_TH = 0.5
 # ===== 객체 생성 =====
 und = Undistorter(CALIB_NPZ_PATH)
 mapper = PixelToRobotMapper(HOMO_JSON_PATH)
-yolo = YOLOWrapper(YOLO_WEIGHT_PATH)
+yolo = load_yolo(YOLO_WEIGHT_PATH)  # 추론 서버가 떠 있으면 공유 모델 사용
 
 
 # ===== 카메라 열기 =====
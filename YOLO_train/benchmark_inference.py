@@ -0,0 +1,298 @@
+"""
+배포 관점 YOLO 추론 벤치마크.
+
+runs/detect/*/results.csv 는 학습 지표뿐이라, 실제 데모에서 쓰는 경로(YOLOWrapper.infer_array)로
+모델 x 백엔드 x 입력 크기 조합마다 아래 항목을 측정해서 JSON/CSV로 저장함.
+  - latency p50 / p99 (ms), FPS
+  - peak RSS (MB)  ← 조합마다 새 프로세스에서 모델 로드 + latency 루프 직후 측정
+                     (export 는 별도 프로세스, mAP val 은 측정 후라서 배포 때 메모리만 반영)
+  - mAP50 / mAP50-95 (해당 데이터셋 val split 기준, COCO 모델은 None)
+
+실행 (저장소 루트에서):
+    python YOLO_train/benchmark_inference.py
+"""
+
+# base
+import os
+import sys
+import csv
+import json
+import time
+import glob
+import platform
+import queue
+import tempfile
+import multiprocessing as mp
+
+# pip install
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+# ===== 하드코딩 설정 =====
+DATASETS = {
+    'Dice_ir':   {'yaml': 'YOLO_train/Dice_ir/data.yaml',   'val': 'YOLO_train/Dice_ir/dataset/val'},
+    'Dice_rgb':  {'yaml': 'YOLO_train/Dice_rgb/data.yaml',  'val': 'YOLO_train/Dice_rgb/dataset/1_split/val'},
+    'Mizzu_rgb': {'yaml': 'YOLO_train/Mizzu_rgb/data.yaml', 'val': 'YOLO_train/Mizzu_rgb/dataset/1_split/val'},
+}
+
+# data가 None인 모델(COCO)은 mAP 없이 LATENCY_DATASET 이미지로 속도만 측정
+MODELS = {
+    'yolo26n':   {'weights': 'yolo26n.pt', 'data': None},
+    'yolo26m':   {'weights': 'yolo26m.pt', 'data': None},
+    'dice_ir':   {'weights': 'YOLO_train/Dice_ir/runs/detect/train/weights/best.pt',         'data': 'Dice_ir'},
+    'dice_rgb':  {'weights': 'YOLO_train/Dice_rgb/runs/detect/train/weights/best.pt',        'data': 'Dice_rgb'},
+    'mizzu_rgb': {'weights': 'YOLO_train/Mizzu_rgb/runs/detect/myzzu_train/weights/best.pt', 'data': 'Mizzu_rgb'},
+}
+
+# ultralytics export format 이름. 'pytorch'는 .pt 그대로 사용
+BACKENDS = ['pytorch', 'onnx', 'openvino']
+IMGSZ_LIST = [320, 480, 640]
+
+LATENCY_DATASET = 'Dice_rgb'
+MAX_IMAGES = 200       # 조합당 latency 측정 이미지 수 상한
+WARMUP_ITERS = 5
+CONF_TH = 0.25
+
+OUT_JSON = 'YOLO_train/benchmark_results.json'
+OUT_CSV = 'YOLO_train/benchmark_results.csv'
+
+IMG_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_val_images(val_dir, max_images=None):
+    files = []
+    for path in glob.glob(os.path.join(val_dir, '**', '*'), recursive=True):
+        if path.lower().endswith(IMG_EXTS):
+            files.append(path)
+    files.sort()
+    if max_images is not None:
+        files = files[:max_images]
+    return files
+
+
+def make_local_yaml(dataset_name):
+    """
+    data.yaml 의 train/val 은 학습 PC 절대경로(D:/...)라서, 이 저장소 기준 경로로 바꾼 임시 yaml 생성.
+    """
+    import yaml
+
+    ds = DATASETS[dataset_name]
+    with open(ds['yaml'], 'r', encoding='utf-8') as f:
+        cfg = yaml.safe_load(f)
+
+    val_dir = os.path.abspath(ds['val'])
+    cfg['train'] = val_dir   # val만 돌리므로 train은 아무 경로나 존재하면 됨
+    cfg['val'] = val_dir
+    cfg.pop('path', None)
+
+    fd, path = tempfile.mkstemp(suffix='.yaml', prefix=f'bench_{dataset_name}_')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(cfg, f, allow_unicode=True)
+    return path
+
+
+def export_backend(weights, backend, imgsz):
+    """backend용 모델 파일 경로 반환 (필요하면 export)."""
+    if backend == 'pytorch':
+        return weights
+
+    from ultralytics import YOLO
+    return YOLO(weights).export(format=backend, imgsz=imgsz, verbose=False)
+
+
+def peak_rss_mb():
+    """현재 프로세스 peak RSS(MB). 조합마다 새 프로세스라 그 조합의 peak가 됨."""
+    if platform.system() == 'Windows':
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    if platform.system() == 'Darwin':
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def empty_row(model_name, backend, imgsz):
+    return {
+        'model': model_name,
+        'backend': backend,
+        'imgsz': imgsz,
+        'dataset': MODELS[model_name]['data'] or LATENCY_DATASET,
+        'n_images': 0,
+        'latency_p50_ms': None,
+        'latency_p99_ms': None,
+        'latency_mean_ms': None,
+        'fps': None,
+        'peak_rss_mb': None,
+        'map50': None,
+        'map50_95': None,
+        'error': None,
+    }
+
+
+def run_one(model_name, backend, imgsz, model_path):
+    """한 조합 측정. (새 프로세스에서 실행됨, model_path 는 export 프로세스에서 만든 모델 파일)"""
+    import cv2
+    from yolo_wrapper import YOLOWrapper
+
+    data = MODELS[model_name]['data']
+    row = empty_row(model_name, backend, imgsz)
+
+    try:
+        yolo = YOLOWrapper(model_path, imgsz=imgsz)
+
+        # ===== latency =====
+        paths = list_val_images(DATASETS[row['dataset']]['val'], MAX_IMAGES)
+        imgs = [cv2.imread(p) for p in paths]
+        imgs = [img for img in imgs if img is not None]
+        if not imgs:
+            raise RuntimeError(f"val 이미지 없음: {DATASETS[row['dataset']]['val']}")
+
+        for i in range(WARMUP_ITERS):
+            yolo.infer_array(imgs[i % len(imgs)], confidence_threshold=CONF_TH)
+
+        lat = np.zeros(len(imgs), dtype=np.float64)
+        t_all = time.perf_counter()
+        for i, img in enumerate(imgs):
+            t0 = time.perf_counter()
+            yolo.infer_array(img, confidence_threshold=CONF_TH)
+            lat[i] = time.perf_counter() - t0
+        t_all = time.perf_counter() - t_all
+
+        row['n_images'] = len(imgs)
+        row['latency_p50_ms'] = float(np.percentile(lat, 50) * 1000)
+        row['latency_p99_ms'] = float(np.percentile(lat, 99) * 1000)
+        row['latency_mean_ms'] = float(lat.mean() * 1000)
+        row['fps'] = float(len(imgs) / t_all)
+        # 배포 메모리: 모델 + 추론까지만 (아래 val 은 데이터로더 등으로 메모리를 더 씀)
+        row['peak_rss_mb'] = peak_rss_mb()
+
+        # ===== mAP (학습한 데이터셋이 있는 모델만) =====
+        if data is not None:
+            yaml_path = make_local_yaml(data)
+            try:
+                metrics = yolo.model.val(data=yaml_path, imgsz=imgsz, split='val', plots=False, verbose=False)
+                row['map50'] = float(metrics.box.map50)
+                row['map50_95'] = float(metrics.box.map)
+            finally:
+                os.remove(yaml_path)
+
+    except Exception as e:
+        row['error'] = repr(e)
+
+    return row
+
+
+def _export_one(weights, backend, imgsz):
+    try:
+        return export_backend(weights, backend, imgsz)
+    except Exception as e:
+        return RuntimeError(f"export 실패: {e!r}")   # 프로세스 간 전달 가능한 예외로
+
+
+def _worker(q, fn, args):
+    q.put(fn(*args))
+
+
+def _spawn(fn, *args, poll=1.0):
+    """
+    fn(*args) 를 새 프로세스에서 실행해서 결과 반환.
+    자식이 결과 없이 죽으면 (backend native crash, OOM kill 등) RuntimeError 를 반환 (sweep 이 멈추지 않도록).
+    """
+    ctx = mp.get_context('spawn')
+    q = ctx.Queue()
+    p = ctx.Process(target=_worker, args=(q, fn, args))
+    p.start()
+    try:
+        while True:
+            try:
+                return q.get(timeout=poll)
+            except queue.Empty:
+                if p.is_alive():
+                    continue
+            # 종료 직전에 넣은 결과가 아직 파이프에 남아 있을 수 있음
+            try:
+                return q.get(timeout=poll)
+            except queue.Empty:
+                return RuntimeError(f"child exited with code {p.exitcode}")
+    finally:
+        p.join()
+
+
+def run_isolated(model_name, backend, imgsz):
+    """
+    export 와 측정을 각각 새 프로세스(spawn)에서 실행.
+    export 메모리나 이전 조합 메모리가 peak RSS 에 섞이지 않게 함.
+    """
+    weights = MODELS[model_name]['weights']
+    model_path = weights if backend == 'pytorch' else _spawn(_export_one, weights, backend, imgsz)
+    if isinstance(model_path, Exception):
+        row = model_path   # export 실패/크래시: 측정 프로세스는 띄우지 않음
+    else:
+        row = _spawn(run_one, model_name, backend, imgsz, model_path)
+    if isinstance(row, Exception):
+        err = row
+        row = empty_row(model_name, backend, imgsz)
+        row['error'] = str(err)
+    return row
+
+
+def print_table(rows):
+    print(f"{'model':<10} {'backend':<9} {'imgsz':>5} {'p50ms':>7} {'p99ms':>7} {'fps':>7} {'rssMB':>7} {'mAP50':>6} {'mAP':>6}")
+
+    def fmt(v, spec):
+        return format(v, spec) if v is not None else '-'
+
+    for r in rows:
+        if r['error'] is not None:
+            print(f"{r['model']:<10} {r['backend']:<9} {r['imgsz']:>5}  ERROR: {r['error']}")
+            continue
+        print(f"{r['model']:<10} {r['backend']:<9} {r['imgsz']:>5} "
+              f"{fmt(r['latency_p50_ms'], '7.1f')} {fmt(r['latency_p99_ms'], '7.1f')} {fmt(r['fps'], '7.1f')} "
+              f"{fmt(r['peak_rss_mb'], '7.0f')} {fmt(r['map50'], '6.3f')} {fmt(r['map50_95'], '6.3f')}")
+
+
+def main():
+    rows = []
+    for model_name in MODELS:
+        for backend in BACKENDS:
+            for imgsz in IMGSZ_LIST:
+                print(f'[Bench] {model_name} / {backend} / {imgsz} ...')
+                rows.append(run_isolated(model_name, backend, imgsz))
+
+    result = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'host': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'python': platform.python_version(),
+        },
+        'settings': {
+            'max_images': MAX_IMAGES,
+            'warmup_iters': WARMUP_ITERS,
+            'conf_th': CONF_TH,
+        },
+        'results': rows,
+    }
+
+    with open(OUT_JSON, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    with open(OUT_CSV, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print_table(rows)
+    print(f'Saved: {OUT_JSON}, {OUT_CSV}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+HEADLESS(점 보정) 경로 vs 기존 전체 프레임 undistort 경로 비교.
+
+  full  : undistort(frame) -> infer -> bbox 중심 -> PixelToRobotMapper
+  point : infer(raw frame) -> bbox 중심 -> Undistorter.undistort_points -> PixelToRobotMapper
+  lut   : infer(raw frame) -> bbox 중심 -> RawPixelToRobotLUT.lookup (demo HEADLESS 모드)
+
+- mm 정확도: 같은 프레임에서 두 경로의 robot 좌표를 가까운 것끼리 짝지어 거리 (full 경로를 기준으로 봄)
+- 인식 일치: 한쪽에서만 나온 검출 수 (raw 프레임에서 모델 성능이 떨어지면 여기서 드러남 -> raw 이미지로 재학습)
+- CPU: 프레임당 process CPU 시간 / wall 시간 (undistort+infer+map 전체)
+
+입력은 녹화 세션(.mcsess, replay_session.py 와 같은 형식) 또는 이미지 폴더.
+"""
+
+# base
+import glob
+import time
+
+# pip install
+import numpy as np
+import cv2
+
+# custom
+from camera_calibration.calibration_undistort_img import Undistorter
+from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+from camera_calibration.raw_pixel_to_robot_lut import RawPixelToRobotLUT
+from yolo_wrapper import YOLOWrapper
+from session_recorder import SessionReplay
+
+
+# ===== 하드코딩 설정 =====
+SESSION_PATH = './sessions/ir_line.mcsess'   # None 이면 IMG_GLOB 사용
+SOURCE = None                                # 세션 소스 이름 (None: 첫 소스)
+IMG_GLOB = './camera_calibration/checkerboard_imgs_ir/*.jpg'
+CALIB_NPZ_PATH = './camera_calibration/camera_calib_ir.npz'
+HOMO_JSON_PATH = './camera_calibration/homography_robot_map_ir.json'
+YOLO_WEIGHT_PATH = "YOLO_train/Dice_ir/runs/detect/train/weights/best.pt"
+CONF_THRESHOLD = 0.5
+MATCH_MM = 30.0      # 이 거리 안이면 같은 물체로 봄
+MAX_FRAMES = 500
+
+
+def iter_frames():
+    if SESSION_PATH:
+        replay = SessionReplay(SESSION_PATH, speed=None)
+        cap = replay.source(SOURCE or replay.source_names()[0])
+        while True:
+            frame = cap.read_frame()
+            if frame is None:
+                return
+            yield frame.img
+    else:
+        for path in sorted(glob.glob(IMG_GLOB)):
+            img = cv2.imread(path)
+            if img is not None:
+                yield img
+
+
+def run_full(img, und, model, mapper):
+    img = und.undistort(img)
+    dets = model.infer(img, confidence_threshold=CONF_THRESHOLD)
+    return [mapper.pixel_to_robot(*model.bbox_center(d['bbox_pixel'])) for d in dets]
+
+
+def run_point(img, und, model, mapper):
+    dets = model.infer(img, confidence_threshold=CONF_THRESHOLD)
+    centers = und.undistort_points([model.bbox_center(d['bbox_pixel']) for d in dets], *img.shape[:2])
+    return [mapper.pixel_to_robot(cx, cy) for cx, cy in centers]
+
+
+def run_lut(img, lut, model):
+    dets = model.infer(img, confidence_threshold=CONF_THRESHOLD)
+    return [tuple(p) for p in lut.lookup([model.bbox_center(d['bbox_pixel']) for d in dets], img.shape[:2])]
+
+
+def match(ref, test):
+    """가까운 것부터 greedy 매칭 -> (거리 리스트, ref 미매칭 수, test 미매칭 수)"""
+    if not ref or not test:
+        return [], len(ref), len(test)
+    a = np.asarray(ref, dtype=np.float64)
+    b = np.asarray(test, dtype=np.float64)
+    d = np.linalg.norm(a[:, None, :] - b[None, :, :], axis=-1)
+    dists = []
+    used_a, used_b = set(), set()
+    for idx in np.argsort(d, axis=None):
+        i, j = np.unravel_index(idx, d.shape)
+        if i in used_a or j in used_b or d[i, j] > MATCH_MM:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        dists.append(float(d[i, j]))
+    return dists, len(ref) - len(used_a), len(test) - len(used_b)
+
+
+def timed(fn, *args):
+    c0, w0 = time.process_time(), time.perf_counter()
+    out = fn(*args)
+    return out, time.process_time() - c0, time.perf_counter() - w0
+
+
+def main():
+    und = Undistorter(CALIB_NPZ_PATH)
+    mapper = PixelToRobotMapper(HOMO_JSON_PATH)
+    model = YOLOWrapper(YOLO_WEIGHT_PATH)
+    lut = RawPixelToRobotLUT(CALIB_NPZ_PATH, HOMO_JSON_PATH)
+    model.warmup()
+
+    paths = {
+        'full': lambda img: run_full(img, und, model, mapper),
+        'point': lambda img: run_point(img, und, model, mapper),
+        'lut': lambda img: run_lut(img, lut, model),
+    }
+    cpu = {name: [] for name in paths}
+    wall = {name: [] for name in paths}
+    dists = {'point': [], 'lut': []}
+    only_full = {'point': 0, 'lut': 0}
+    only_raw = {'point': 0, 'lut': 0}
+    n_full = 0
+
+    for n, img in enumerate(iter_frames()):
+        if n >= MAX_FRAMES:
+            break
+        # 경로 순서를 돌려가며 실행해서 캐시/클럭 영향 상쇄
+        names = list(paths)
+        order = names[n % len(names):] + names[:n % len(names)]
+        out = {}
+        for name in order:
+            out[name], c, w = timed(paths[name], img)
+            cpu[name].append(c)
+            wall[name].append(w)
+
+        for name in ('point', 'lut'):
+            d, miss_full, miss_raw = match(out['full'], out[name])
+            dists[name] += d
+            only_full[name] += miss_full
+            only_raw[name] += miss_raw
+        n_full += len(out['full'])
+
+    if not cpu['full']:
+        print("[Bench] 프레임 없음")
+        return
+
+    print(f"[Bench] {len(cpu['full'])} frames | detections (full path) {n_full}")
+    for name in paths:
+        c = np.asarray(cpu[name]) * 1000
+        w = np.asarray(wall[name]) * 1000
+        print(f"  {name:<6} cpu mean {c.mean():6.2f} ms | wall mean {w.mean():6.2f} ms | p99 {np.percentile(w, 99):6.2f} ms")
+    for name in ('point', 'lut'):
+        if dists[name]:
+            a = np.asarray(dists[name])
+            print(f"  {name} vs full robot XY: mean {a.mean():.2f} | p95 {np.percentile(a, 95):.2f} | max {a.max():.2f} mm")
+        print(f"  {name} unmatched: only full {only_full[name]} | only {name} {only_raw[name]}  (raw 프레임 인식 누락/오검출)")
+
+
+if __name__ == "__main__":
+    main()
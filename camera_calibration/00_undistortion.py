@@ -1,53 +1,65 @@
-import cv2
 import glob
 import numpy as np
 
+import sys, os; sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from camera_calibration.checkerboard_calibration import board_object_points, detect_all, calibrate, print_report
+
 # ----------------------------
 # 체커보드 설정
 # ----------------------------
 CHECKERBOARD = (9, 6)        # inner corners
 SQUARE_SIZE = 17.25          # mm
 
-# ----------------------------
-# 준비
-# ----------------------------
-objp = np.zeros((CHECKERBOARD[0] * CHECKERBOARD[1], 3), np.float32)
-objp[:, :2] = np.mgrid[0:CHECKERBOARD[0], 0:CHECKERBOARD[1]].T.reshape(-1, 2)
-objp *= SQUARE_SIZE
+IMG_GLOB = "camera_calibration/checkerboard_imgs_ir/*.jpg"
+OUT_NPZ = "camera_calib.npz"
 
-objpoints = []  # 3D (world)
-imgpoints = []  # 2D (image)
+# 코너 검출: 축소본(긴 변 DETECT_MAX_SIDE)에서 찾고 원본에서 cornerSubPix
+DETECT_MAX_SIDE = 800
+WORKERS = None               # 프로세스 수 (None: CPU 코어 수, 1: 직렬)
+CORNER_CACHE = "camera_calibration/corner_cache.json"   # 이미지 해시별 코너 캐시 (새 이미지만 검출)
 
-images = glob.glob("camera_calibration/checkerboard_imgs_ir/*.jpg")
+# outlier view 제거 (None 이면 사용 안 함 → 기존처럼 모든 view 로 캘리브레이션)
+# 예: MAX_VIEW_ERROR = 1.0 (px), REJECT_RATIO = 3.0 (median view error 의 배수)
+MAX_VIEW_ERROR = None
+REJECT_RATIO = None
 
-# ----------------------------
-# 코너 검출
-# ----------------------------
-for fname in images:
-    img = cv2.imread(fname)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-    ret, corners = cv2.findChessboardCorners(gray, CHECKERBOARD, None)
+def main():
+    images = sorted(glob.glob(IMG_GLOB))
 
-    if ret:
-        corners = cv2.cornerSubPix(
-            gray, corners, (11, 11), (-1, -1),
-            criteria=(cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-        )
-        objpoints.append(objp)
-        imgpoints.append(corners)
+    # ----------------------------
+    # 코너 검출 (병렬 + 캐시)
+    # ----------------------------
+    detections = detect_all(images, CHECKERBOARD, cache_path=CORNER_CACHE,
+                            workers=WORKERS, detect_max_side=DETECT_MAX_SIDE)
 
-# ----------------------------
-# 캘리브레이션
-# ----------------------------
-ret, cameraMatrix, distCoeffs, rvecs, tvecs = cv2.calibrateCamera(
-    objpoints, imgpoints, gray.shape[::-1], None, None
-)
+    # ----------------------------
+    # 캘리브레이션 (+ view 별 reprojection error, outlier 제거)
+    # ----------------------------
+    result = calibrate(detections, board_object_points(CHECKERBOARD, SQUARE_SIZE),
+                       max_view_error=MAX_VIEW_ERROR, reject_ratio=REJECT_RATIO)
+    print_report(result)
+    if result["rejected"]:
+        print(f"[Calib] WARNING: outlier view {len(result['rejected'])}장 제외하고 캘리브레이션함 "
+              f"(MAX_VIEW_ERROR={MAX_VIEW_ERROR}, REJECT_RATIO={REJECT_RATIO}):")
+        for p, e in result["rejected"].items():
+            print(f"  - {os.path.basename(p)} ({e:.4f}px)")
+
+    print("Camera Matrix:\n", result["K"])
+    print("Dist Coeffs:\n", result["dist"])
+
+    # 저장 (cameraMatrix / distCoeffs 키는 기존과 동일)
+    np.savez(OUT_NPZ,
+             cameraMatrix=result["K"],
+             distCoeffs=result["dist"],
+             rms=result["rms"],
+             image_size=np.array(result["image_size"]),
+             used_images=np.array([os.path.basename(p) for p in result["used"]]),
+             view_errors=np.array([result["errors"][p] for p in result["used"]]),
+             rejected_images=np.array([os.path.basename(p) for p in result["rejected"]]))
+    print(f"Saved: {OUT_NPZ}")
 
-print("Camera Matrix:\n", cameraMatrix)
-print("Dist Coeffs:\n", distCoeffs)
 
-# 저장
-np.savez("camera_calib.npz",
-         cameraMatrix=cameraMatrix,
-         distCoeffs=distCoeffs)
+if __name__ == "__main__":
+    # 프로세스 풀(Windows spawn) 때문에 main guard 필요
+    main()
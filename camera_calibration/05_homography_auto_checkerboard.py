@@ -0,0 +1,116 @@
+"""
+체커보드 inner corner 전체(9x6=54점)를 자동 검출해서 RANSAC 으로 homography 계산 -> json 저장.
+(02/03/04 스크립트의 4점 수동 클릭 대체. 카메라가 밀렸을 때 보드만 다시 놓고 실행하면 수 초 안에 끝남)
+
+- undistorted 프레임 기준 (Undistorter 기본값, PixelToRobotMapper 와 같은 좌표계)
+- 여러 프레임의 코너 위치 median 으로 노이즈 감소
+- 저장 json 은 PixelToRobotMapper 가 읽는 형식 그대로 + reprojection error 통계
+"""
+
+import json
+import time
+import cv2
+import numpy as np
+
+import sys, os; sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from camera_calibration.calibration_undistort_img import Undistorter
+from camera_calibration.checkerboard_calibration import find_corners, board_world_points, fit_homography
+
+# ----------------------------
+# 설정 (하드코딩)
+# ----------------------------
+CAMERA = "ir"                # "ir": mirae_tof 폴더 캡처 / "rgb": 웹캠
+CAM_ID = 0
+CALIB_NPZ_PATH = "camera_calibration/camera_calib_ir.npz"
+OUT_JSON = "camera_calibration/homography_robot_map_ir.json"
+
+CHECKERBOARD = (9, 6)        # inner corners
+SQUARE_SIZE = 17.25          # mm
+
+# world 축 방향 (이미지 기준). 기존 4점 기준: 로봇 시점 우하단(P2)이 (0,0), X는 이미지 위쪽, Y는 이미지 왼쪽
+WORLD_X_IMAGE_DIR = (0, -1)
+WORLD_Y_IMAGE_DIR = (-1, 0)
+# world 원점(보드 바깥 모서리 P2)에 가장 가까운 inner corner 의 world 좌표 = 한 칸 안쪽
+FIRST_CORNER_MM = (SQUARE_SIZE, SQUARE_SIZE)
+
+# 로봇 base 기준 오프셋 (04 스크립트와 동일)
+ROBOT_OFFSET_X = 161.5
+ROBOT_OFFSET_Y = 28.5
+
+N_FRAMES = 10                # 코너 검출에 쓸 프레임 수 (median)
+RANSAC_THRESH_MM = 2.0
+SHOW = True                  # 결과 이미지 확인 (아무 키나 누르면 종료)
+
+
+def open_camera():
+    if CAMERA == "ir":
+        from mirae_tof.etf_wrapper import FolderCapture
+        return FolderCapture()
+    from frame_source import LatestVideoCapture
+    return LatestVideoCapture(CAM_ID)
+
+
+def collect_corners(cap, und, n_frames, timeout=10.0):
+    found = []
+    last = None
+    deadline = time.monotonic() + timeout
+    while len(found) < n_frames and time.monotonic() < deadline:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        img = und.undistort(frame)
+        corners = find_corners(img, CHECKERBOARD)
+        if corners is not None:
+            found.append(corners.reshape(-1, 2))
+            last = img.copy()
+    if not found:
+        raise RuntimeError("체커보드를 찾지 못함: 보드 전체가 보이는지 / CHECKERBOARD 설정 확인")
+    print(f"checkerboard found in {len(found)} frame(s)")
+    return np.median(np.stack(found), axis=0), last
+
+
+def main():
+    und = Undistorter(CALIB_NPZ_PATH)
+    cap = open_camera()
+    try:
+        corners, img = collect_corners(cap, und, N_FRAMES)
+    finally:
+        cap.release()
+
+    world = board_world_points(corners, CHECKERBOARD, SQUARE_SIZE,
+                               WORLD_X_IMAGE_DIR, WORLD_Y_IMAGE_DIR, FIRST_CORNER_MM)
+    H, stats = fit_homography(corners, world, RANSAC_THRESH_MM)
+
+    print(f"points {stats['n_points']} | inliers {stats['n_inliers']}")
+    print(f"error mm : mean {stats['error_mm']['mean']:.3f} | rms {stats['error_mm']['rms']:.3f} | max {stats['error_mm']['max']:.3f}")
+    print(f"error px : mean {stats['error_px']['mean']:.3f} | rms {stats['error_px']['rms']:.3f} | max {stats['error_px']['max']:.3f}")
+
+    payload = {
+        "description": "pixel(u,v) -> world(mm) via H, then world -> robot(mm) via offset",
+        "image_points_uv": corners.tolist(),
+        "world_points_mm": world.tolist(),
+        "H_pixel_to_world": H.tolist(),  # 3x3
+        "robot_offset_mm": {"x": ROBOT_OFFSET_X, "y": ROBOT_OFFSET_Y},
+        "reprojection_error": stats,
+        "notes": {
+            "pixel_points_are_on_undistorted_image": True,
+            "source": "05_homography_auto_checkerboard.py (checkerboard inner corners, RANSAC)",
+            "checkerboard": {"inner_corners": list(CHECKERBOARD), "square_mm": SQUARE_SIZE},
+            "calibration_npz": CALIB_NPZ_PATH,
+        },
+    }
+    with open(OUT_JSON, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"Saved: {OUT_JSON}")
+
+    if SHOW and img is not None:
+        cv2.drawChessboardCorners(img, CHECKERBOARD, corners.reshape(-1, 1, 2).astype(np.float32), True)
+        for (u, v), (x, y) in zip(corners[[0, -1]], world[[0, -1]]):
+            cv2.putText(img, f"({x:.1f},{y:.1f})", (int(u) + 5, int(v) - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        cv2.imshow("homography auto", img)
+        cv2.waitKey(0)
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+자동 hand-eye 캘리브레이션 (ROBOT_OFFSET_X/Y 수동 측정 대체).
+
+준비: 05_homography_auto_checkerboard.py 로 만든 homography json (체커보드 world 좌표계)
+      + 그리퍼에 ArUco 마커(DICT_4X4_50, MARKER_ID) 부착, 마커 면이 물체 윗면 높이(Z_CAL)에 오도록
+실행: 로봇이 작업 영역 grid 를 돌며 마커를 찍고 world -> robot 회전/이동을 최소제곱으로 구해서 OUT_JSON 저장.
+      SIMULATE=True 면 가짜 로봇 + 합성 프레임으로 전체 흐름을 실행해서 정답과 비교.
+
+캘리브레이션 후에는 homography 가 robot 좌표를 직접 주므로
+OBJECT_ORIGIN_MM 은 물체를 놓고 잰 값 대신 loc_pick_mm 의 x, y 를 그대로 쓰면 됨.
+"""
+
+import json
+import os
+import tempfile
+import sys; sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+
+from mycobot_wrapper import MyCobotController
+from camera_calibration.calibration_undistort_img import Undistorter
+from camera_calibration.hand_eye_calibration import (HandEyeCalibrator, grid_poses,
+                                                     SimulatedMyCobot, SyntheticMarkerCamera)
+
+# ----------------------------
+# 설정 (하드코딩)
+# ----------------------------
+SIMULATE = True
+
+ROBOT_IP_PATH = "./IP_info.txt"
+CALIB_NPZ_PATH = "./camera_calibration/camera_calib_ir.npz"
+HOMO_JSON_PATH = "./camera_calibration/homography_robot_map_ir.json"
+OUT_JSON = "./camera_calibration/homography_robot_map_ir.json"
+IR_USE_SHM = True
+
+MARKER_ID = 0
+ROBOT_SPEED = 30
+
+# grid (robot 좌표, mm) / 마커 높이 / 자세 (demo loc_pick_mm 기준)
+GRID_X = (180, 280)
+GRID_Y = (-40, 100)
+GRID_N = (4, 3)
+Z_CAL = 110
+RPY = (-174.6, 0.64, -44.3)
+FLIP_RZ = True              # rz 180도 돌려 한 번 더 찍기 (마커가 TCP 중심에서 벗어나도 상쇄)
+SIM_MOVE_TIME = 1.5         # 시뮬레이션 1회 이동 시간 [s] (실제 로봇과 비슷하게: 너무 짧으면 회전 중 촬영 문제가 안 보임)
+
+
+def run_simulation():
+    # 정답 배치: 04 스크립트 4점 homography + 약간 틀어진 로봇 축 + 실제 offset
+    image_points = np.array([[123, 35], [500, 26], [517, 290], [103, 288]], dtype=np.float32)
+    world_points = np.array([[120.75, 170.0], [120.75, 0.0], [0.0, 0.0], [0.0, 170.0]], dtype=np.float32)
+    H, _ = cv2.findHomography(image_points, world_points)
+    truth = {"rot_deg": 1.5, "offset": (164.2, 26.1), "marker_offset": (12.0, -5.0)}
+
+    # 시작값: 기존처럼 회전 없이 수동 offset 만 있는 json
+    fd, homo_json = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"H_pixel_to_world": H.tolist(), "robot_offset_mm": {"x": 161.5, "y": 28.5}}, f)
+
+    sim = SimulatedMyCobot(move_time=SIM_MOVE_TIME)
+    robot = MyCobotController(None, default_speed=ROBOT_SPEED)
+    robot.connect(mc=sim)
+    cap = SyntheticMarkerCamera(sim, H, truth["rot_deg"], truth["offset"], marker_id=MARKER_ID,
+                                marker_offset_mm=truth["marker_offset"])
+
+    poses = grid_poses(GRID_X, GRID_Y, GRID_N[0], GRID_N[1], Z_CAL, RPY)
+    calib = HandEyeCalibrator(robot, cap, homo_json, und=None, marker_id=MARKER_ID)
+    result = calib.run(poses, flip_rz=FLIP_RZ)
+    os.remove(homo_json)
+
+    # 정답 marker offset 은 rz=0 기준, 추정값은 grid 자세 rz 기준 → 같은 좌표계로 돌려서 비교
+    a = np.radians(RPY[2])
+    marker_truth = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]]) @ np.asarray(truth["marker_offset"])
+    print(f"[Sim] truth  rotation {truth['rot_deg']:.3f} deg | offset {truth['offset']} | "
+          f"marker offset {np.round(marker_truth, 2).tolist()} (rz={RPY[2]})")
+    print(f"[Sim] solved rotation {result['rotation_deg']:.3f} deg | offset ({result['t'][0]:.2f}, {result['t'][1]:.2f}) | "
+          f"marker offset {np.round(result['marker_offset_mm'], 2).tolist() if result['marker_offset_mm'] else None}")
+
+
+def run_robot():
+    from mirae_tof.etf_wrapper import FolderCapture
+    from mirae_tof.shm_ring import ShmCapture
+
+    robot = MyCobotController(ROBOT_IP_PATH, default_speed=ROBOT_SPEED)
+    robot.connect()
+    robot.power_on()
+    robot.torque_on()
+
+    cap = ShmCapture() if IR_USE_SHM else FolderCapture(save_dir='mirae_tof/save')
+    calib = HandEyeCalibrator(robot, cap, HOMO_JSON_PATH, und=Undistorter(CALIB_NPZ_PATH), marker_id=MARKER_ID)
+    try:
+        result = calib.run(grid_poses(GRID_X, GRID_Y, GRID_N[0], GRID_N[1], Z_CAL, RPY), flip_rz=FLIP_RZ)
+        calib.save_json(result, OUT_JSON)
+    finally:
+        cap.release()
+
+
+if __name__ == "__main__":
+    if SIMULATE:
+        run_simulation()
+    else:
+        run_robot()
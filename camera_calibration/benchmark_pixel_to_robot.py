@@ -0,0 +1,69 @@
+"""
+PixelToRobotMapper scalar(pixel_to_robot 반복) vs batch(pixels_to_robot 한 번) 속도 비교.
+점 개수(검출 수 / 후보 grid 크기)별로 호출당 시간 측정 + 결과 일치 확인.
+"""
+
+import os
+import json
+import tempfile
+import time
+
+import numpy as np
+import cv2
+
+import sys; sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+
+# ----------------------------
+# 설정 (json 없으면 04_homography_set-save to json.py 의 4점으로 임시 생성)
+# ----------------------------
+HOMO_JSON_PATH = "./camera_calibration/homography_robot_map_ir.json"
+N_POINTS_LIST = [1, 5, 20, 100, 1000, 10000]
+REPEAT = 200
+IMG_SIZE = (640, 480)
+
+
+def _temp_homography_json():
+    image_points = np.array([[123, 35], [500, 26], [517, 290], [103, 288]], dtype=np.float32)
+    world_points = np.array([[120.75, 170.0], [120.75, 0.0], [0.0, 0.0], [0.0, 170.0]], dtype=np.float32)
+    H, _ = cv2.findHomography(image_points, world_points)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"H_pixel_to_world": H.tolist(), "robot_offset_mm": {"x": 161.5, "y": 28.5}}, f)
+    return path
+
+
+def _time_per_call(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    temp = not os.path.exists(HOMO_JSON_PATH)
+    path = _temp_homography_json() if temp else HOMO_JSON_PATH
+    mapper = PixelToRobotMapper(path)
+    if temp:
+        os.remove(path)
+    print(f"homography: {'임시 (04 스크립트 4점)' if temp else path}")
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>6} | {'scalar loop':>12} | {'batch':>10} | {'speedup':>7} | max diff [mm] | inverse err [px]")
+    for n in N_POINTS_LIST:
+        uv = rng.uniform([0, 0], IMG_SIZE, size=(n, 2))
+        repeat = max(3, REPEAT // max(1, n // 100))
+
+        t_scalar = _time_per_call(lambda: [mapper.pixel_to_robot(u, v) for u, v in uv], repeat)
+        t_batch = _time_per_call(lambda: mapper.pixels_to_robot(uv), repeat)
+
+        scalar = np.array([mapper.pixel_to_robot(u, v) for u, v in uv])
+        batch = mapper.pixels_to_robot(uv)
+        back = mapper.robot_to_pixels(batch)
+        print(f"{n:>6} | {t_scalar * 1e3:9.3f} ms | {t_batch * 1e3:7.3f} ms | {t_scalar / t_batch:6.1f}x | "
+              f"{np.abs(scalar - batch).max():13.5f} | {np.abs(back - uv).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import time
+import hashlib
+import threading
+
+from camera_calibration.calibration_undistort_img import Undistorter
+from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+from camera_calibration.raw_pixel_to_robot_lut import RawPixelToRobotLUT
+from camera_calibration.depth_to_robot_mapper import DepthToRobotMapper
+
+
+def _hash_files(*paths):
+    h = hashlib.sha1()
+    for p in paths:
+        with open(p, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+class CalibrationSet:
+    """
+    한 시점의 캘리브레이션 (npz + homography json) 과 거기서 만든 파생 객체 묶음.
+    만들어진 뒤에는 바꾸지 않음 → 프레임 하나를 처리하는 동안 같은 set 만 쓰면 undistort/매핑 버전이 섞이지 않음.
+
+      - version   : registry 안에서 1부터 증가
+      - und       : Undistorter (warm_shapes 해상도의 remap 테이블은 미리 생성)
+      - mapper    : PixelToRobotMapper
+      - lut       : RawPixelToRobotLUT (with_lut=True 일 때, 자체 파일 감시는 끔 → registry 가 교체)
+      - mapper3d  : DepthToRobotMapper (depth_table_z_mm 지정 시)
+    """
+
+    __slots__ = ("version", "calib_npz_path", "homo_json_path", "digest", "loaded_at",
+                 "und", "mapper", "lut", "mapper3d")
+
+    def __init__(self, version, calib_npz_path, homo_json_path, warm_shapes=(), with_lut=False,
+                 depth_table_z_mm=None):
+        self.version = version
+        self.calib_npz_path = calib_npz_path
+        self.homo_json_path = homo_json_path
+
+        # 로드 전후 해시가 같을 때까지 (로드 중에 파일이 다시 저장되면 digest 와 내용이 어긋나므로 다시 로드)
+        for _ in range(3):
+            digest = _hash_files(calib_npz_path, homo_json_path)
+            self.und = Undistorter(calib_npz_path)
+            self.mapper = PixelToRobotMapper(homo_json_path)
+            self.lut = RawPixelToRobotLUT(calib_npz_path, homo_json_path, check_interval=float("inf")) if with_lut else None
+            self.mapper3d = None
+            if depth_table_z_mm is not None:
+                self.mapper3d = DepthToRobotMapper(calib_npz_path, homo_json_path, table_z_mm=depth_table_z_mm,
+                                                   undistorter=self.und)
+            if _hash_files(calib_npz_path, homo_json_path) == digest:
+                break
+        else:
+            raise RuntimeError("캘리브레이션 파일이 로드 중에 계속 바뀜")
+        self.digest = digest
+        self.loaded_at = time.time()
+
+        # 파생 캐시는 교체 전에 미리 만들어 둠 (swap 직후 첫 프레임이 느려지지 않도록)
+        for h, w in warm_shapes:
+            self.und.maps(h, w)
+            if self.lut is not None:
+                self.lut.table((h, w))
+            if self.mapper3d is not None:
+                self.mapper3d.ray_table(h, w)
+
+    def used_shapes(self):
+        """지금까지 remap / LUT / ray 테이블을 만든 해상도 (h, w) 목록 → 다음 버전을 미리 데우는 데 사용."""
+        shapes = set(self.und._maps)
+        if self.lut is not None:
+            shapes.update(self.lut._tables)
+        if self.mapper3d is not None:
+            shapes.update(self.mapper3d._rays)
+        return sorted(shapes)
+
+
+class CalibrationRegistry:
+    """
+    캘리브레이션 파일 감시 + 무중단 교체.
+
+    감시 스레드가 poll_interval 마다 두 파일의 mtime 을 보고, 바뀌었으면 (내용 해시도 다를 때만)
+    새 CalibrationSet 을 백그라운드에서 만든 뒤 참조 하나만 바꿔 끼움 (atomic swap).
+    새 버전은 warm_shapes + 이전 버전이 실제로 쓴 해상도의 테이블을 미리 만들어 둠 (swap 직후 첫 프레임 지연 없음).
+    로드 실패(깨진 파일 등)면 이전 버전을 계속 쓰고, 파일이 다시 저장되면 재시도.
+
+    Usage:
+        calib = CalibrationRegistry(CALIB_NPZ_PATH, HOMO_JSON_PATH, warm_shapes=[(480, 640)])
+        while True:
+            cal = calib.current()                 # 프레임마다 한 번
+            img = cal.und.undistort(frame.img)
+            xy = cal.mapper.pixels_to_robot(centers)
+    """
+
+    def __init__(self, calib_npz_path, homo_json_path, poll_interval=1.0, warm_shapes=(), with_lut=False,
+                 depth_table_z_mm=None):
+        self.calib_npz_path = calib_npz_path
+        self.homo_json_path = homo_json_path
+        self.poll_interval = float(poll_interval)
+        self._build_kwargs = dict(warm_shapes=tuple((int(h), int(w)) for h, w in warm_shapes), with_lut=with_lut, depth_table_z_mm=depth_table_z_mm)
+
+        self._listeners = []
+        self._stop = threading.Event()
+
+        self._mtimes = self._file_mtimes()
+        self._current = CalibrationSet(1, calib_npz_path, homo_json_path, **self._build_kwargs)
+
+        self._thread = threading.Thread(target=self._watch_loop, name="CalibrationRegistry", daemon=True)
+        self._thread.start()
+
+    def current(self):
+        return self._current
+
+    def on_change(self, callback):
+        """callback(new_set, old_set) 을 교체 직후 (감시 스레드에서) 호출."""
+        self._listeners.append(callback)
+
+    def _file_mtimes(self):
+        return (os.path.getmtime(self.calib_npz_path), os.path.getmtime(self.homo_json_path))
+
+    def reload(self):
+        """파일 내용이 바뀌었으면 새 버전으로 교체 -> 교체했으면 True."""
+        old = self._current
+        try:
+            if _hash_files(self.calib_npz_path, self.homo_json_path) == old.digest:
+                return False
+            kwargs = dict(self._build_kwargs)
+            kwargs["warm_shapes"] = sorted(set(kwargs["warm_shapes"]) | set(old.used_shapes()))
+            new = CalibrationSet(old.version + 1, self.calib_npz_path, self.homo_json_path, **kwargs)
+        except Exception as e:
+            print(f"[Calib] reload failed, keep v{old.version}: {e}")
+            return False
+
+        self._current = new
+        print(f"[Calib] v{old.version} -> v{new.version} ({new.digest})")
+        for cb in self._listeners:
+            try:
+                cb(new, old)
+            except Exception as e:
+                print(f"[Warning] calibration listener failed: {e}")
+        return True
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                mtimes = self._file_mtimes()
+            except OSError:
+                continue  # 파일 교체 중
+            if mtimes == self._mtimes:
+                continue
+            # 저장이 끝날 때까지 한 주기 기다렸다가 그래도 같으면 로드
+            if self._stop.wait(min(0.2, self.poll_interval)):
+                break
+            try:
+                if self._file_mtimes() != mtimes:
+                    continue
+            except OSError:
+                continue
+            # 실패해도 같은 mtime 으로는 재시도하지 않음 (파일을 다시 저장하면 mtime 이 바뀌어서 재시도)
+            self._mtimes = mtimes
+            self.reload()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
@@ -1,22 +1,145 @@
+import os
+import hashlib
+import threading
+
 import cv2
 import numpy as np
 
 
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "remap_cache")
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
 class Undistorter:
     """
+    cv2.undistort()는 매 프레임 왜곡 보정 map을 새로 계산함.
+    여기서는 해상도별로 initUndistortRectifyMap 테이블을 한 번만 만들고 (고정소수점 CV_16SC2 + 보간 테이블,
+    float32 map 대비 메모리 절반), 디스크에 캐시(npz 해시 + 해상도 키)해서 다음 실행부터는 바로 로드.
+    프레임마다 remap() 한 번 (+ 선택: 재사용 출력 버퍼).
+
+    alpha (선택): getOptimalNewCameraMatrix 사용. 0 = 유효 픽셀만 보이도록 확대, 1 = 원본 픽셀 전부 보존(검은 테두리).
+      None 이면 기존과 같이 원래 K 그대로 (기존 homography json 과 좌표 호환).
+      alpha/crop 을 쓰면 undistorted 픽셀 좌표가 바뀌므로 homography 를 다시 찍어야 함.
+    crop=True: alpha 사용 시 유효 영역(ROI)만 잘라서 반환.
+
     Usage:
       und = Undistorter("camera_calib.npz")
       und_frame = und.undistort(frame)
+
+    n_buffers=0 (기본): 매번 새 배열 반환 → 다른 스레드(overlay / recorder)에 그대로 넘겨도 안전.
+    n_buffers>0: 내부 버퍼 n_buffers 개를 순환해서 반환 (할당 없음), n_buffers 번 뒤 호출에서 덮어씀.
+      결과를 그 프레임 처리 안에서만 쓸 때만 사용. 더 오래 보관할 거면 copy() 하거나 out= 을 넘길 것.
     """
 
-    def __init__(self, calib_npz_path: str):
+    def __init__(self, calib_npz_path: str, alpha=None, crop=False, cache_dir=DEFAULT_CACHE_DIR, n_buffers=0):
         data = np.load(calib_npz_path)
         self.K = data["cameraMatrix"]
         self.dist = data["distCoeffs"]
 
-    def undistort(self, frame):
-        """Return undistorted frame (same size as input)."""
-        return cv2.undistort(frame, self.K, self.dist)
+        self.alpha = alpha
+        self.crop = bool(crop) and alpha is not None
+        self.cache_dir = cache_dir
+        self.calib_hash = _file_hash(calib_npz_path)
+
+        self.n_buffers = int(n_buffers)
+        self._maps = {}       # (h, w) -> (map1, map2, newK, roi)
+        self._buffers = {}    # (shape, dtype) -> [ndarray, ...]
+        self._buf_idx = 0
+        self._lock = threading.Lock()
+
+    # ---------------- remap tables ----------------
+    def _cache_path(self, h, w):
+        tag = "K" if self.alpha is None else f"a{float(self.alpha):g}"
+        return os.path.join(self.cache_dir, f"{self.calib_hash}_{w}x{h}_{tag}.npz")
+
+    def _build_maps(self, h, w):
+        if self.alpha is None:
+            newK, roi = self.K, (0, 0, w, h)
+        else:
+            newK, roi = cv2.getOptimalNewCameraMatrix(self.K, self.dist, (w, h), float(self.alpha), (w, h))
+        map1, map2 = cv2.initUndistortRectifyMap(self.K, self.dist, None, newK, (w, h), cv2.CV_16SC2)
+        return map1, map2, np.asarray(newK, dtype=np.float64), tuple(int(v) for v in roi)
+
+    def maps(self, h: int, w: int):
+        """해상도 (h, w) 의 (map1, map2, newK, roi). 메모리 -> 디스크 캐시 -> 새로 계산 순."""
+        key = (int(h), int(w))
+        with self._lock:
+            item = self._maps.get(key)
+            if item is not None:
+                return item
+
+            path = self._cache_path(*key)
+            if os.path.exists(path):
+                try:
+                    c = np.load(path)
+                    item = (c["map1"], c["map2"], c["newK"], tuple(int(v) for v in c["roi"]))
+                except Exception as e:
+                    print(f"[Warning] remap cache load failed: {path} | {e}")
+                    item = None
+
+            if item is None:
+                item = self._build_maps(*key)
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp = path + ".tmp.npz"
+                    np.savez(tmp, map1=item[0], map2=item[1], newK=item[2], roi=np.array(item[3]))
+                    os.replace(tmp, path)
+                except OSError as e:
+                    print(f"[Warning] remap cache save failed: {path} | {e}")
+
+            self._maps[key] = item
+            return item
+
+    def camera_matrix(self, h: int, w: int):
+        """undistorted 이미지의 카메라 행렬 (alpha=None 이면 K). crop 시 ROI 원점만큼 이동."""
+        _, _, newK, roi = self.maps(h, w)
+        if not self.crop:
+            return newK
+        K = newK.copy()
+        K[0, 2] -= roi[0]
+        K[1, 2] -= roi[1]
+        return K
+
+    # ---------------- per frame ----------------
+    def _next_buffer(self, shape, dtype):
+        key = (shape, np.dtype(dtype).str)
+        with self._lock:
+            bufs = self._buffers.get(key)
+            if bufs is None:
+                bufs = [np.empty(shape, dtype=dtype) for _ in range(self.n_buffers)]
+                self._buffers[key] = bufs
+            self._buf_idx = (self._buf_idx + 1) % self.n_buffers
+            return bufs[self._buf_idx]
+
+    def undistort(self, frame, out=None):
+        """Return undistorted frame (same size as input, or ROI size when crop=True)."""
+        h, w = frame.shape[:2]
+        map1, map2, _, roi = self.maps(h, w)
+        if out is None and self.n_buffers > 0:
+            out = self._next_buffer(frame.shape, frame.dtype)
+        out = cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, dst=out, borderMode=cv2.BORDER_CONSTANT)
+        if self.crop:
+            x, y, rw, rh = roi
+            return out[y:y + rh, x:x + rw]
+        return out
+
+    def undistort_points(self, pts, h: int, w: int):
+        """
+        raw(왜곡) 이미지 픽셀 좌표 (N, 2) -> undistort() 결과 이미지의 픽셀 좌표 (N, 2) float64.
+        화면 출력이 없을 때는 전체 프레임 대신 bbox 중심점 몇 개만 보정하면 됨 (headless 경로).
+        """
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 1, 2)
+        if len(pts) == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        P = self.camera_matrix(h, w)
+        return cv2.undistortPoints(pts, self.K, self.dist, P=P).reshape(-1, 2)
 
     def undistort_from_camera(self, cam_id=0):
         """
@@ -28,4 +151,4 @@ class Undistorter:
         cap.release()
         if not ret:
             raise RuntimeError("Failed to read from camera.")
-        return self.undistort(frame)
+        return self.undistort(frame).copy()
@@ -0,0 +1,273 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+
+DEFAULT_CORNER_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corner_cache.json")
+
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def board_object_points(pattern, square_size):
+    """체커보드 inner corner 의 3D 좌표 (Z=0 평면, mm)."""
+    objp = np.zeros((pattern[0] * pattern[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
+    return objp * float(square_size)
+
+
+def detect_corners(path, pattern, detect_max_side=800):
+    """
+    이미지 파일 1장 코너 검출 -> (corners (N,1,2) float32 | None, (w, h))
+    """
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None, None
+    h, w = img.shape[:2]
+    return find_corners(img, pattern, detect_max_side), (w, h)
+
+
+def find_corners(img, pattern, detect_max_side=800):
+    """
+    코너 검출.
+      1) 긴 변이 detect_max_side 가 되도록 축소한 복사본에서 findChessboardCorners (대부분 시간이 여기)
+      2) 찾은 코너를 원본 좌표로 키워서 원본 해상도에서 cornerSubPix 로 정밀화
+    return: corners (N,1,2) float32 | None
+    """
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = img.shape[:2]
+
+    scale = min(1.0, float(detect_max_side) / max(h, w))
+    small = img if scale == 1.0 else cv2.resize(img, (int(round(w * scale)), int(round(h * scale))),
+                                                interpolation=cv2.INTER_AREA)
+
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
+    ret, corners = cv2.findChessboardCorners(small, pattern, flags)
+    if not ret and scale != 1.0:
+        # 축소본에서 못 찾으면 (보드가 작게 찍힌 경우) 원본에서 한 번 더
+        scale = 1.0
+        ret, corners = cv2.findChessboardCorners(img, pattern, flags)
+    if not ret:
+        return None
+
+    corners = (corners / scale).astype(np.float32)
+    return cv2.cornerSubPix(img, corners, (11, 11), (-1, -1), SUBPIX_CRITERIA)
+
+
+def _detect_job(args):
+    path, pattern, detect_max_side = args
+    corners, size = detect_corners(path, pattern, detect_max_side)
+    return path, (None if corners is None else corners.reshape(-1, 2).tolist()), size
+
+
+class CornerCache:
+    """
+    이미지별 코너 검출 결과 캐시 (json). 키 = 파일 내용 sha1 + 패턴 크기
+    → 파일명이 바뀌어도 재사용, 같은 이름이라도 내용이 바뀌면 다시 검출.
+    """
+
+    def __init__(self, path=DEFAULT_CORNER_CACHE):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Warning] corner cache load failed: {path} | {e}")
+
+    @staticmethod
+    def key(digest, pattern):
+        return f"{digest}:{pattern[0]}x{pattern[1]}"
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def put(self, key, corners, size):
+        self.data[key] = {"corners": corners, "size": list(size) if size else None}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+
+def detect_all(paths, pattern, cache_path=DEFAULT_CORNER_CACHE, workers=None, detect_max_side=800):
+    """
+    여러 이미지 코너 검출. 캐시에 없는 이미지만 프로세스 풀에서 병렬 검출.
+    return: [(path, corners (N,1,2) float32 | None, (w, h))]  (paths 순서 유지)
+    """
+    pattern = tuple(pattern)
+    cache = CornerCache(cache_path)
+
+    keys = {p: CornerCache.key(file_hash(p), pattern) for p in paths}
+    todo = [p for p in paths if cache.get(keys[p]) is None]
+    print(f"[Calib] images {len(paths)} | cached {len(paths) - len(todo)} | detect {len(todo)}")
+
+    if todo:
+        jobs = [(p, pattern, detect_max_side) for p in todo]
+        if workers == 1 or len(todo) == 1:
+            done = list(map(_detect_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                done = list(pool.map(_detect_job, jobs))
+        for path, corners, size in done:
+            cache.put(keys[path], corners, size)
+        cache.save()
+
+    out = []
+    for p in paths:
+        item = cache.get(keys[p])
+        corners = None if item["corners"] is None else np.array(item["corners"], np.float32).reshape(-1, 1, 2)
+        out.append((p, corners, tuple(item["size"]) if item["size"] else None))
+    return out
+
+
+def per_view_errors(objpoints, imgpoints, rvecs, tvecs, K, dist):
+    """view 별 reprojection RMS [px]."""
+    errs = []
+    for objp, imgp, rvec, tvec in zip(objpoints, imgpoints, rvecs, tvecs):
+        proj, _ = cv2.projectPoints(objp, rvec, tvec, K, dist)
+        errs.append(float(np.sqrt(np.mean(np.sum((proj.reshape(-1, 2) - imgp.reshape(-1, 2)) ** 2, axis=1)))))
+    return errs
+
+
+def calibrate(detections, objp, max_view_error=None, reject_ratio=None, min_views=5, max_rounds=3):
+    """
+    cv2.calibrateCamera + view 별 reprojection error + outlier 제거 후 재캘리브레이션.
+      - max_view_error : 이 값[px]보다 큰 view 제거
+      - reject_ratio   : median error 의 이 배수보다 큰 view 제거
+    return: dict(K, dist, rms, image_size, used, rejected, errors{path: err})
+    """
+    views = [(p, c) for p, c, _ in detections if c is not None]
+    sizes = {s for _, c, s in detections if c is not None}
+    if not sizes:
+        raise RuntimeError("코너를 찾은 이미지가 없음")
+    if len(sizes) != 1:
+        raise ValueError(f"이미지 해상도가 섞여 있음: {sizes}")
+    image_size = sizes.pop()
+
+    rejected = {}
+    for round_i in range(max_rounds):
+        if len(views) < min_views:
+            raise RuntimeError(f"유효 view 부족: {len(views)} < {min_views}")
+
+        objpoints = [objp] * len(views)
+        imgpoints = [c for _, c in views]
+        rms, K, dist, rvecs, tvecs = cv2.calibrateCamera(objpoints, imgpoints, image_size, None, None)
+        errs = per_view_errors(objpoints, imgpoints, rvecs, tvecs, K, dist)
+
+        limit = np.inf
+        if max_view_error is not None:
+            limit = min(limit, float(max_view_error))
+        if reject_ratio is not None:
+            limit = min(limit, float(np.median(errs)) * float(reject_ratio))
+
+        bad = {i for i, e in enumerate(errs) if e > limit}
+        # 마지막 라운드는 제거 없이 결과 확정 (K/dist 와 errors 가 같은 view 집합 기준이 되도록)
+        if not bad or len(views) - len(bad) < min_views or round_i == max_rounds - 1:
+            break
+        for i in bad:
+            rejected[views[i][0]] = errs[i]
+        print(f"[Calib] round {round_i + 1}: rms {rms:.4f}px, reject {len(bad)} view(s) > {limit:.3f}px")
+        views = [v for i, v in enumerate(views) if i not in bad]
+
+    return {
+        "K": K,
+        "dist": dist,
+        "rms": float(rms),
+        "image_size": image_size,
+        "used": [p for p, _ in views],
+        "errors": {p: e for (p, _), e in zip(views, errs)},
+        "rejected": rejected,
+        "not_found": [p for p, c, _ in detections if c is None],
+    }
+
+
+def print_report(result):
+    print(f"[Calib] rms {result['rms']:.4f}px | used {len(result['used'])} | "
+          f"rejected {len(result['rejected'])} | not found {len(result['not_found'])}")
+    for p, e in sorted(result["errors"].items(), key=lambda kv: -kv[1]):
+        print(f"  {e:7.4f}px  {os.path.basename(p)}")
+    for p, e in result["rejected"].items():
+        print(f"  {e:7.4f}px  {os.path.basename(p)}  (rejected)")
+    for p in result["not_found"]:
+        print(f"     -      {os.path.basename(p)}  (corners not found)")
+
+
+# ---------------- board homography (pixel -> world mm) ----------------
+def board_world_points(corners, pattern, square_size, x_image_dir, y_image_dir, first_corner_mm=(0.0, 0.0)):
+    """
+    검출된 inner corner (N,1,2) 마다 world(mm) 좌표 부여.
+    findChessboardCorners 의 코너 순서는 보드 방향에 따라 뒤집힐 수 있으므로
+    "world X/Y 축이 이미지에서 향하는 방향"(x_image_dir, y_image_dir)으로 격자 축/부호를 정함.
+      예) 로봇 시점 우하단이 원점, X는 이미지 위쪽, Y는 이미지 왼쪽 -> x_image_dir=(0,-1), y_image_dir=(-1,0)
+    first_corner_mm: world 원점에 가장 가까운 inner corner 의 world 좌표
+    """
+    cols, rows = pattern
+    grid = np.asarray(corners, np.float64).reshape(rows, cols, 2)
+    col_dir = np.mean(grid[:, 1:] - grid[:, :-1], axis=(0, 1))
+    row_dir = np.mean(grid[1:, :] - grid[:-1, :], axis=(0, 1))
+    col_dir /= np.linalg.norm(col_dir)
+    row_dir /= np.linalg.norm(row_dir)
+
+    r_idx, c_idx = np.mgrid[0:rows, 0:cols]
+    axes = {"col": (col_dir, c_idx, cols), "row": (row_dir, r_idx, rows)}
+
+    world = []
+    used = set()
+    for want in (x_image_dir, y_image_dir):
+        want = np.asarray(want, np.float64) / np.linalg.norm(want)
+        name = max((a for a in axes if a not in used), key=lambda a: abs(np.dot(axes[a][0], want)))
+        used.add(name)
+        d, idx, n = axes[name]
+        if np.dot(d, want) < 0:
+            idx = (n - 1) - idx
+        world.append(idx.astype(np.float64) * float(square_size))
+
+    xy = np.stack(world, axis=-1).reshape(-1, 2)
+    return xy + np.asarray(first_corner_mm, np.float64)
+
+
+def fit_homography(image_points, world_points, ransac_thresh_mm=2.0):
+    """
+    pixel -> world(mm) homography 를 RANSAC 으로 (수십 점) + 오차 통계.
+    return: (H, stats)  stats: n_points, n_inliers, error_mm{mean,median,rms,max}, error_px{...}
+    """
+    img = np.asarray(image_points, np.float64).reshape(-1, 2)
+    wld = np.asarray(world_points, np.float64).reshape(-1, 2)
+    H, mask = cv2.findHomography(img, wld, cv2.RANSAC, float(ransac_thresh_mm))
+    if H is None:
+        raise RuntimeError("Homography 계산 실패: 코너 검출/world 좌표 확인 필요")
+    inl = mask.ravel().astype(bool)
+
+    def _err(a, b):
+        e = np.linalg.norm(a - b, axis=1)
+        return {"mean": float(e.mean()), "median": float(np.median(e)),
+                "rms": float(np.sqrt(np.mean(e ** 2))), "max": float(e.max())}
+
+    proj_w = cv2.perspectiveTransform(img[inl].reshape(-1, 1, 2), H).reshape(-1, 2)
+    proj_p = cv2.perspectiveTransform(wld[inl].reshape(-1, 1, 2), np.linalg.inv(H)).reshape(-1, 2)
+    stats = {
+        "n_points": int(len(img)),
+        "n_inliers": int(inl.sum()),
+        "ransac_thresh_mm": float(ransac_thresh_mm),
+        "error_mm": _err(proj_w, wld[inl]),
+        "error_px": _err(proj_p, img[inl]),
+    }
+    return H, stats
@@ -0,0 +1,146 @@
+import json
+import numpy as np
+import cv2
+
+
+def camera_pose_from_homography(K, H_pixel_to_world):
+    """
+    undistorted pixel -> 체커보드 평면(mm) homography 와 K 로부터 카메라 자세 복원.
+    return: (R, t)  world(체커보드 평면, Z=평면 위쪽) -> camera,  P_cam = R @ P_world + t
+    """
+    G = np.linalg.inv(np.asarray(H_pixel_to_world, dtype=np.float64))   # world(X,Y,1) -> pixel
+    M = np.linalg.inv(K) @ G
+
+    lam = 1.0 / np.linalg.norm(M[:, 0])
+    r1 = M[:, 0] * lam
+    r2 = M[:, 1] * lam
+    t = M[:, 2] * lam
+
+    # 평면이 카메라 앞(+Z)에 있도록 부호 결정
+    if t[2] < 0:
+        r1, r2, t = -r1, -r2, -t
+
+    r3 = np.cross(r1, r2)
+    R = np.stack([r1, r2, r3], axis=1)
+
+    # 노이즈로 직교성이 깨진 R 을 가장 가까운 회전행렬로 보정
+    U, _, Vt = np.linalg.svd(R)
+    R = U @ Vt
+    return R, t
+
+
+class DepthToRobotMapper:
+    """
+    ToF depth 프레임 -> robot 좌표(mm) 3D 점.
+
+    - camera_calib_ir.npz (K, dist) 로 raw(왜곡된) 픽셀마다 광선(ray) 방향을 한 번만 계산해서 테이블로 캐시
+    - 카메라 -> robot 변환은 기존 homography json(+robot_offset_mm)에서 복원 (추가 캘리브레이션 불필요)
+    - 프레임마다: points = ray_table * depth + t  (곱셈 한 번)
+
+    Usage:
+        mapper3d = DepthToRobotMapper(CALIB_NPZ_PATH, HOMO_JSON_PATH, table_z_mm=TABLE_Z_MM,
+                                      undistorter=Undistorter(CALIB_NPZ_PATH))
+        pts = mapper3d.depth_to_robot(depth_u16)          # (h, w, 3) float32, 무효 픽셀은 nan
+        x, y, z = mapper3d.pick_point(depth_u16, bbox_pixel)   # bbox: undistorted image 좌표
+    """
+
+    def __init__(self, calib_npz_path: str, homo_json_path: str, table_z_mm: float = 0.0,
+                 depth_scale: float = 1.0, depth_is_radial: bool = False, undistorter=None):
+        data = np.load(calib_npz_path)
+        self.K = data["cameraMatrix"].astype(np.float64)
+        self.dist = data["distCoeffs"].astype(np.float64)
+
+        with open(homo_json_path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+
+        # world(체커보드) -> camera
+        R_wc, t_wc = camera_pose_from_homography(self.K, cfg["H_pixel_to_world"])
+
+        # camera -> robot  (world 축은 robot 축과 평행, 원점만 offset / table 높이 차이)
+        offset = np.array([float(cfg["robot_offset_mm"]["x"]),
+                           float(cfg["robot_offset_mm"]["y"]),
+                           float(table_z_mm)])
+        self.R = R_wc.T
+        self.t = (-R_wc.T @ t_wc + offset).astype(np.float32)
+
+        cam_height = float(self.t[2] - table_z_mm)
+        if cam_height <= 0:
+            print(f"[Warning] 카메라가 테이블 아래({cam_height:.1f}mm)로 계산됨. homography/축 방향 확인 필요")
+
+        # depth 단위 변환 (mm/unit). radial: depth가 광선 길이, False: 광학축 방향 Z 거리
+        self.depth_scale = float(depth_scale)
+        self.depth_is_radial = bool(depth_is_radial)
+
+        # bbox 가 나온 undistorted 이미지의 Undistorter (alpha/crop 이면 K 대신 그 newK 기준). None 이면 K 그대로
+        self.und = undistorter
+
+        self._rays = {}  # (h, w) -> (h, w, 3) float32, robot 좌표계 방향
+
+    def ray_table(self, h: int, w: int):
+        """raw 픽셀 (h, w) 별 robot 좌표계 ray. 해상도당 한 번만 계산."""
+        key = (int(h), int(w))
+        table = self._rays.get(key)
+        if table is not None:
+            return table
+
+        u, v = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+        uv = np.stack([u, v], axis=-1).reshape(-1, 1, 2)
+        xy = cv2.undistortPoints(uv, self.K, self.dist).reshape(h, w, 2)
+
+        rays = np.empty((h, w, 3), dtype=np.float64)
+        rays[..., 0:2] = xy
+        rays[..., 2] = 1.0
+        if self.depth_is_radial:
+            rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+
+        # camera -> robot 회전과 depth 단위까지 미리 곱해둠
+        table = ((rays @ self.R.T) * self.depth_scale).astype(np.float32)
+        self._rays[key] = table
+        return table
+
+    def depth_to_robot(self, depth):
+        """depth (h, w) -> robot 좌표 (h, w, 3) float32 [mm]. depth==0 은 nan."""
+        h, w = depth.shape[:2]
+        d = depth.astype(np.float32)
+        d[d <= 0] = np.nan
+        return self.ray_table(h, w) * d[..., None] + self.t
+
+    def undistorted_to_raw(self, u: float, v: float, h: int = None, w: int = None):
+        """
+        undistorted image 픽셀 -> raw(왜곡) image 픽셀.
+        undistorter 가 있으면 raw 해상도 (h, w) 에서의 und.camera_matrix() (alpha/crop newK) 기준, 없으면 K 기준.
+        """
+        K_und = self.K if self.und is None or h is None else self.und.camera_matrix(h, w)
+        xn = np.linalg.inv(K_und) @ np.array([u, v, 1.0])
+        pt = np.array([[xn[0], xn[1], 1.0]], dtype=np.float64)
+        raw, _ = cv2.projectPoints(pt, np.zeros(3), np.zeros(3), self.K, self.dist)
+        return float(raw[0, 0, 0]), float(raw[0, 0, 1])
+
+    def pick_point(self, depth, bbox_pixel, inner_ratio=0.5, bbox_is_raw=False):
+        """
+        bbox(undistorted 좌표) 중앙 inner_ratio 영역의 3D 점 median -> (x, y, z) robot mm.
+        (가장자리는 배경 depth가 섞이므로 안쪽만 사용) 유효 점이 없으면 None.
+        bbox_is_raw=True: raw 프레임에서 바로 인식한 bbox (headless 경로)
+        """
+        x1, y1, x2, y2 = bbox_pixel
+        h, w = depth.shape[:2]
+        if bbox_is_raw:
+            cu_, cv_ = (x1 + x2) * 0.5, (y1 + y2) * 0.5
+        else:
+            cu_, cv_ = self.undistorted_to_raw((x1 + x2) * 0.5, (y1 + y2) * 0.5, h, w)
+        hw = max(1.0, (x2 - x1) * inner_ratio * 0.5)
+        hh = max(1.0, (y2 - y1) * inner_ratio * 0.5)
+
+        c0, c1 = int(max(0, cu_ - hw)), int(min(w, cu_ + hw + 1))
+        r0, r1 = int(max(0, cv_ - hh)), int(min(h, cv_ + hh + 1))
+        if c1 <= c0 or r1 <= r0:
+            return None
+
+        d = depth[r0:r1, c0:c1].astype(np.float32)
+        valid = d > 0
+        if not np.any(valid):
+            return None
+
+        pts = self.ray_table(h, w)[r0:r1, c0:c1][valid] * d[valid][:, None] + self.t
+        x, y, z = np.median(pts, axis=0)
+        return float(x), float(y), float(z)
@@ -0,0 +1,307 @@
+import json
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from frame_source import Frame, FrameSource
+
+
+ARUCO_DICT = cv2.aruco.DICT_4X4_50
+
+
+def marker_detector():
+    return cv2.aruco.ArucoDetector(cv2.aruco.getPredefinedDictionary(ARUCO_DICT), cv2.aruco.DetectorParameters())
+
+
+def detect_marker_centers(img, detector):
+    """보이는 ArUco 마커 전부 -> {id: 중심 픽셀 (u, v)}."""
+    corners, ids, _ = detector.detectMarkers(img)
+    if ids is None:
+        return {}
+    return {int(i): c.reshape(4, 2).mean(axis=0) for c, i in zip(corners, ids.ravel())}
+
+
+def detect_marker_center(img, detector, marker_id):
+    """ArUco marker_id 의 중심 픽셀 (u, v), 없으면 None."""
+    return detect_marker_centers(img, detector).get(int(marker_id))
+
+
+def solve_rigid_2d(world, robot, with_scale=False):
+    """
+    robot ≈ A @ world + t  최소제곱 (Umeyama). A = 회전 (with_scale 이면 회전*배율)
+    return: (A (2,2), t (2,), residual_mm (N,))
+    """
+    w = np.asarray(world, np.float64).reshape(-1, 2)
+    r = np.asarray(robot, np.float64).reshape(-1, 2)
+    if len(w) < 2:
+        raise ValueError("점이 2개 이상 필요")
+    mw, mr = w.mean(axis=0), r.mean(axis=0)
+    wc, rc = w - mw, r - mr
+
+    U, S, Vt = np.linalg.svd(rc.T @ wc / len(w))
+    D = np.diag([1.0, np.sign(np.linalg.det(U @ Vt)) or 1.0])
+    R = U @ D @ Vt
+    s = float(np.trace(np.diag(S) @ D) / np.mean(np.sum(wc ** 2, axis=1))) if with_scale else 1.0
+
+    A = s * R
+    t = mr - A @ mw
+    res = np.linalg.norm(w @ A.T + t - r, axis=1)
+    return A, t, res
+
+
+def _wrap_deg(a):
+    return (a + 180.0) % 360.0 - 180.0
+
+
+class HandEyeCalibrator:
+    """
+    고정 카메라(eye-to-hand) + 작업 평면 기준 자동 hand-eye 캘리브레이션.
+
+    그리퍼에 붙인 ArUco 마커를 로봇이 grid 포즈로 옮겨가며 찍고,
+    homography json 의 world(체커보드 mm) 좌표 <-> 로봇 명령 좌표를 2D rigid 최소제곱으로 맞춤.
+      - 결과: world -> robot 회전은 H_pixel_to_world 에 합치고, 이동은 robot_offset_mm 로 저장
+        (PixelToRobotMapper / json 형식 그대로, 수동 ROBOT_OFFSET_X/Y 측정 대체)
+      - flip_rz=True: 같은 위치에서 rz 를 180도 돌려 한 번 더 찍고 중점 사용
+        → 마커가 TCP 중심에서 벗어나 붙어 있어도 상쇄 (마커 offset 도 추정해서 출력)
+
+    Usage:
+        calib = HandEyeCalibrator(robot, cap, HOMO_JSON_PATH, und=Undistorter(CALIB_NPZ_PATH), marker_id=0)
+        result = calib.run(grid_poses(...))
+        calib.save_json(result, OUT_JSON)
+    """
+
+    def __init__(self, robot, cap, homo_json_path, und=None, marker_id=0, n_frames=5,
+                 settle_tol_mm=2.0, settle_tol_deg=1.0, settle_timeout=10.0, with_scale=False):
+        self.robot = robot
+        self.cap = cap
+        self.und = und
+        self.marker_id = marker_id
+        self.n_frames = int(n_frames)
+        self.settle_tol_mm = float(settle_tol_mm)
+        self.settle_tol_deg = float(settle_tol_deg)
+        self.settle_timeout = float(settle_timeout)
+        self.with_scale = bool(with_scale)
+        self.detector = marker_detector()
+
+        with open(homo_json_path, "r", encoding="utf-8") as f:
+            self.cfg = json.load(f)
+        self.H = np.array(self.cfg["H_pixel_to_world"], dtype=np.float64)
+
+    # ---------------- robot ----------------
+    def wait_reached(self, target):
+        """
+        target 에 도착 (xyz settle_tol_mm + rx/ry/rz settle_tol_deg 이내) + 정지할 때까지 대기 -> 정지 시각 (time.time())
+        flip_rz 포즈는 xyz 가 같고 rz 만 180도 돌기 때문에 자세까지 봐야 회전 중에 찍지 않음
+        """
+        return self.robot.wait_motion_done(target, tol_mm=self.settle_tol_mm, tol_deg=self.settle_tol_deg,
+                                           timeout=self.settle_timeout)
+
+    # ---------------- camera ----------------
+    def observe(self, after_ts):
+        """after_ts 이후 찍힌 프레임 n_frames 장에서 마커 중심 median -> world(mm) (x, y) | None"""
+        pts = []
+        shape = None    # 마커가 찍힌 프레임의 크기 (마지막 read_frame 은 timeout(None) 일 수 있음)
+        deadline = time.monotonic() + 5.0
+        while len(pts) < self.n_frames and time.monotonic() < deadline:
+            frame = self.cap.read_frame(timeout=1.0)
+            if frame is None or frame.timestamp < after_ts:
+                continue
+            uv = detect_marker_center(frame.img, self.detector, self.marker_id)
+            if uv is not None:
+                pts.append(uv)
+                shape = frame.img.shape[:2]
+        if not pts:
+            return None
+
+        uv = np.median(np.stack(pts), axis=0)
+        if self.und is not None:
+            uv = self.und.undistort_points([uv], *shape)[0]
+        return cv2.perspectiveTransform(uv.reshape(1, 1, 2), self.H).reshape(2)
+
+    # ---------------- run ----------------
+    def run(self, poses, flip_rz=True, mode=1):
+        world, robot = [], []
+        marker_offsets = []
+
+        for i, pose in enumerate(poses):
+            variants = [list(pose)]
+            if flip_rz:
+                flipped = list(pose)
+                flipped[5] = _wrap_deg(flipped[5] + 180.0)
+                variants.append(flipped)
+
+            seen = []
+            for p in variants:
+                self.robot.move_world(p, mode)
+                t_settled = self.wait_reached(p)
+                w = self.observe(t_settled)
+                if w is None:
+                    break
+                seen.append(w)
+
+            if len(seen) != len(variants):
+                print(f"[HandEye] pose {i}: marker not found, skip {pose[:3]}")
+                continue
+
+            w = np.mean(seen, axis=0)
+            world.append(w)
+            robot.append(np.asarray(pose[:2], np.float64))
+            if flip_rz:
+                marker_offsets.append((seen[0] - seen[1]) / 2.0)   # world 좌표계 기준 마커 offset
+            print(f"[HandEye] pose {i}: robot ({pose[0]:.1f}, {pose[1]:.1f}) <- world ({w[0]:.1f}, {w[1]:.1f})")
+
+        if len(world) < 3:
+            raise RuntimeError(f"유효 포즈 부족: {len(world)} < 3")
+
+        A, t, res = solve_rigid_2d(world, robot, with_scale=self.with_scale)
+        angle = float(np.degrees(np.arctan2(A[1, 0], A[0, 0])))
+        scale = float(np.sqrt(abs(np.linalg.det(A))))
+        result = {
+            "A": A, "t": t,
+            "rotation_deg": angle,
+            "scale": scale,
+            "n_poses": len(world),
+            "residual_mm": {"mean": float(res.mean()), "rms": float(np.sqrt(np.mean(res ** 2))), "max": float(res.max())},
+            # TCP -> 마커 중심 (grid 자세의 rz 에서 robot XY 기준)
+            "marker_offset_mm": (np.mean(marker_offsets, axis=0) @ A.T).tolist() if marker_offsets else None,
+            "world_points_mm": np.asarray(world).tolist(),
+            "robot_points_mm": np.asarray(robot).tolist(),
+        }
+        print(f"[HandEye] rotation {angle:.3f} deg | scale {scale:.4f} | offset ({t[0]:.2f}, {t[1]:.2f}) mm | "
+              f"residual rms {result['residual_mm']['rms']:.3f} / max {result['residual_mm']['max']:.3f} mm")
+        return result
+
+    def save_json(self, result, out_path):
+        """기존 homography json 에 결과 반영: H <- [A 0; 0 1] @ H, robot_offset_mm <- t"""
+        M = np.eye(3)
+        M[:2, :2] = result["A"]
+        cfg = dict(self.cfg)
+        cfg["H_pixel_to_world"] = (M @ self.H).tolist()
+        cfg["robot_offset_mm"] = {"x": float(result["t"][0]), "y": float(result["t"][1])}
+        cfg["hand_eye"] = {k: v for k, v in result.items() if k not in ("A", "t")}
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(cfg, f, ensure_ascii=False, indent=2)
+        print(f"Saved: {out_path}")
+
+
+def grid_poses(x_range, y_range, nx, ny, z, rpy):
+    """작업 영역 grid 포즈 [x, y, z, rx, ry, rz] (지그재그 순서로 이동 거리 최소화)."""
+    poses = []
+    for j, y in enumerate(np.linspace(y_range[0], y_range[1], ny)):
+        xs = np.linspace(x_range[0], x_range[1], nx)
+        for x in (xs if j % 2 == 0 else xs[::-1]):
+            poses.append([float(x), float(y), float(z)] + [float(a) for a in rpy])
+    return poses
+
+
+# ---------------- simulation ----------------
+class SimulatedMyCobot:
+    """
+    MyCobotSocket 대신 쓰는 가짜 로봇 (MyCobotController.connect(mc=SimulatedMyCobot())).
+    send_coords 후 move_time 초 동안 선형 보간으로 이동, get_coords 는 현재 위치.
+    """
+
+    def __init__(self, start_coords=(150.0, 0.0, 200.0, 180.0, 0.0, 0.0), move_time=0.2):
+        self.move_time = float(move_time)
+        self._lock = threading.Lock()
+        self._from = np.array(start_coords, np.float64)
+        self._to = self._from.copy()
+        self._t0 = 0.0
+        self._angles = [0.0] * 6
+
+    def _now_coords(self):
+        a = 1.0 if self.move_time <= 0 else min(1.0, (time.time() - self._t0) / self.move_time)
+        return self._from + (self._to - self._from) * a
+
+    def send_coords(self, coords, speed, mode=0):
+        with self._lock:
+            self._from = self._now_coords()
+            self._to = np.array(coords, np.float64)
+            self._t0 = time.time()
+
+    def get_coords(self):
+        with self._lock:
+            return self._now_coords().tolist()
+
+    def send_angles(self, angles, speed):
+        self._angles = [float(a) for a in angles]   # joint 이동은 즉시 도착으로 취급
+
+    def get_angles(self):
+        return list(self._angles)
+
+    def is_controller_connected(self):
+        return 1
+
+    def power_on(self):
+        pass
+
+    def power_off(self):
+        pass
+
+    def focus_all_servos(self):
+        pass
+
+    def release_all_servos(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SyntheticMarkerCamera(FrameSource):
+    """
+    SimulatedMyCobot 의 현재 TCP 에 붙은 ArUco 마커를 그린 합성 프레임 (undistorted 좌표계).
+    실제 배치(truth): robot = R(rot_deg) @ world + offset,  pixel = H_pixel_to_world^-1(world)
+    marker_offset_mm: TCP 에서 마커 중심까지 (rz=0 기준 robot XY), rz 에 따라 회전
+    """
+
+    name = "synthetic"
+
+    def __init__(self, sim, H_pixel_to_world, rot_deg, offset_mm, marker_id=0, marker_offset_mm=(0.0, 0.0),
+                 size=(640, 480), marker_px=48, noise_px=0.3, fps=30):
+        self.sim = sim
+        self.H_inv = np.linalg.inv(np.asarray(H_pixel_to_world, np.float64))
+        a = np.radians(rot_deg)
+        self.R = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]])
+        self.offset = np.asarray(offset_mm, np.float64)
+        self.marker_offset = np.asarray(marker_offset_mm, np.float64)
+        self.size = size
+        self.noise_px = float(noise_px)
+        self.period = 1.0 / float(fps)
+        self.rng = np.random.default_rng(0)
+
+        dictionary = cv2.aruco.getPredefinedDictionary(ARUCO_DICT)
+        marker = cv2.aruco.generateImageMarker(dictionary, int(marker_id), int(marker_px))
+        self.marker = cv2.copyMakeBorder(marker, 8, 8, 8, 8, cv2.BORDER_CONSTANT, value=255)
+        self.seq = 0
+
+    def robot_to_pixel(self, xy):
+        world = self.R.T @ (np.asarray(xy, np.float64) - self.offset)
+        return cv2.perspectiveTransform(world.reshape(1, 1, 2), self.H_inv).reshape(2)
+
+    def read_frame(self, timeout=None):
+        time.sleep(self.period)
+        ts = time.time()
+        c = self.sim.get_coords()
+        a = np.radians(c[5])
+        rz = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]])
+        uv = self.robot_to_pixel(np.asarray(c[:2]) + rz @ self.marker_offset)
+        uv = uv + self.rng.normal(0, self.noise_px, 2)
+
+        w, h = self.size
+        img = np.full((h, w, 3), 90, np.uint8)
+        mh, mw = self.marker.shape[:2]
+        # sub-pixel 위치는 warpAffine 으로 (정수 붙여넣기보다 정확)
+        M = np.float32([[1, 0, uv[0] - (mw - 1) / 2.0], [0, 1, uv[1] - (mh - 1) / 2.0]])
+        layer = cv2.warpAffine(self.marker, M, (w, h), flags=cv2.INTER_LINEAR, borderValue=0)
+        mask = cv2.warpAffine(np.full_like(self.marker, 255), M, (w, h), flags=cv2.INTER_LINEAR, borderValue=0)
+        alpha = (mask.astype(np.float32) / 255.0)[..., None]
+        img = (img * (1 - alpha) + layer[..., None].astype(np.float32) * alpha).astype(np.uint8)
+
+        self.seq += 1
+        return Frame(img, ts, self.seq, self.name)
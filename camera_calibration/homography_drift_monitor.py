@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+from camera_calibration.hand_eye_calibration import marker_detector, detect_marker_centers
+
+
+DEFAULT_DRIFT_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "drift_log.jsonl")
+
+
+class HomographyDriftMonitor:
+    """
+    작업 영역 모서리에 고정한 ArUco 마커로 homography 틀어짐(카메라가 밀림 등) 감시 + 자동 보정.
+
+    파이프라인은 프레임마다 submit() 만 호출 → sample_interval 초에 한 번만 이미지를 복사해서
+    백그라운드 스레드로 넘기고 나머지 프레임은 바로 return (프레임당 부담 거의 없음).
+
+    백그라운드:
+      1) 마커 중심 검출 (undistorted=False 면 점만 undistort) → 마커별 최근 window 개 median 으로 노이즈 제거
+      2) 현재 H 로 world 좌표 계산 → 기준 world 좌표와의 거리 = drift [mm]
+         기준: marker_world_mm 로 직접 주거나, 없으면 처음 window 번 관측을 "지금 캘리브레이션이 맞다" 는 기준으로 저장
+      3) drift > alert_mm : 경고 로그 (복구되면 recovered)
+         drift > update_mm : 관측 픽셀 -> 기대 픽셀 보정 D (similarity / homography) 를 구해서 H_new = H @ D
+         → 체커보드로 맞춘 H 의 세부 형태는 유지하고 카메라 움직임만 보정, json 을 교체 저장
+         → CalibrationRegistry 가 파일 변경을 보고 새 버전으로 교체
+         drift > max_update_mm 는 마커가 옮겨졌거나 잘못 검출된 것일 수 있어서 경고만 남김
+         저장 후 reload_timeout 초 안에 registry 버전이 안 바뀌면 (reload 실패 등) update_skipped 로 남기고 다시 보정 허용
+    이벤트(baseline / alert / recovered / update / update_skipped)는 log_path 에 json 한 줄씩 기록.
+
+    Usage:
+        calib = CalibrationRegistry(CALIB_NPZ_PATH, HOMO_JSON_PATH)
+        drift = HomographyDriftMonitor(calib, marker_ids=[10, 11, 12, 13])
+        while True:
+            cal = calib.current()
+            img = cal.und.undistort(frame.img)
+            drift.submit(img, frame.timestamp)
+    """
+
+    def __init__(self, calib, marker_world_mm=None, marker_ids=None, sample_interval=5.0, window=5,
+                 alert_mm=1.5, update_mm=2.0, max_update_mm=15.0, min_markers=3, model="similarity",
+                 auto_update=True, reload_timeout=10.0, log_path=DEFAULT_DRIFT_LOG):
+        if model not in ("similarity", "homography"):
+            raise ValueError(f"model must be 'similarity' or 'homography': {model}")
+        self.calib = calib
+        self.marker_ids = None if marker_ids is None else {int(i) for i in marker_ids}
+        self.sample_interval = float(sample_interval)
+        self.window = int(window)
+        self.alert_mm = float(alert_mm)
+        self.update_mm = float(update_mm)
+        self.max_update_mm = float(max_update_mm)
+        self.min_markers = max(int(min_markers), 4 if model == "homography" else 2)
+        self.model = model
+        self.auto_update = bool(auto_update)
+        self.reload_timeout = float(reload_timeout)
+        self.log_path = log_path
+
+        self.world_ref = {}
+        if marker_world_mm is not None:
+            self.world_ref = {int(k): np.asarray(v, np.float64) for k, v in marker_world_mm.items()}
+            if self.marker_ids is None:
+                self.marker_ids = set(self.world_ref)
+
+        self.detector = marker_detector()
+        self._obs = {}                  # marker id -> deque of (u, v)
+        self._alerting = False
+        self._wait_version = None       # json 저장 후 registry 가 새 버전을 올릴 때까지 재보정 안 함
+        self._wait_until = 0.0          # reload_timeout: 그때까지 새 버전이 안 오면 (reload 실패 등) 다시 보정 허용
+        self.last = None                # 마지막 측정 결과 dict
+        self.n_samples = 0
+        self.n_updates = 0
+
+        self._next_sample = 0.0
+        self._job = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="HomographyDriftMonitor", daemon=True)
+        self._thread.start()
+
+    # ---------------- pipeline side ----------------
+    def submit(self, img, timestamp=None, undistorted=True):
+        """프레임마다 호출. 샘플링 주기가 아니거나 이전 샘플을 처리 중이면 아무것도 안 함 -> 샘플로 넘겼으면 True."""
+        now = time.time()
+        if now < self._next_sample or self._wake.is_set():
+            return False
+        self._next_sample = now + self.sample_interval
+        self._job = (img.copy(), now if timestamp is None else timestamp, bool(undistorted))
+        self._wake.set()
+        return True
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                break
+            img, ts, undistorted = self._job
+            self._job = None
+            try:
+                self._process(img, ts, undistorted)
+            except Exception as e:
+                print(f"[Drift] sample failed: {e}")
+            self._wake.clear()
+
+    # ---------------- background ----------------
+    def _log(self, event, **fields):
+        rec = {"t": time.time(), "event": event}
+        rec.update(fields)
+        print(f"[Drift] {event} | " + " ".join(f"{k}={v}" for k, v in fields.items() if not isinstance(v, list)))
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        except OSError as e:
+            print(f"[Warning] drift log write failed: {self.log_path} | {e}")
+
+    def _process(self, img, ts, undistorted):
+        cal = self.calib.current()
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        found = detect_marker_centers(img, self.detector)
+        if self.marker_ids is not None:
+            found = {k: v for k, v in found.items() if k in self.marker_ids}
+        if found and not undistorted:
+            h, w = img.shape[:2]
+            uv = cal.und.undistort_points(np.array(list(found.values())), h, w)
+            found = dict(zip(found.keys(), uv))
+
+        for k, uv in found.items():
+            self._obs.setdefault(k, deque(maxlen=self.window)).append(np.asarray(uv, np.float64))
+        self.n_samples += 1
+
+        # 마커별 median (window 가 다 찬 마커만 사용)
+        ready = {k: np.median(np.array(q), axis=0) for k, q in self._obs.items() if len(q) == self.window and k in found}
+
+        if not self.world_ref:
+            if len(ready) >= self.min_markers:
+                world = cal.mapper.pixels_to_world(np.array(list(ready.values())))
+                self.world_ref = dict(zip(ready.keys(), world))
+                self._log("baseline", calib_version=cal.version, markers=sorted(self.world_ref),
+                          world_mm=np.round(world, 2).tolist())
+            return
+
+        ids = [k for k in ready if k in self.world_ref]
+        if len(ids) < self.min_markers:
+            return
+        px = np.array([ready[k] for k in ids])
+        ref = np.array([self.world_ref[k] for k in ids])
+        err = np.linalg.norm(cal.mapper.pixels_to_world(px) - ref, axis=1)
+        self.last = {"t": ts, "calib_version": cal.version, "markers": ids,
+                     "mean_mm": float(err.mean()), "max_mm": float(err.max())}
+        stats = dict(calib_version=cal.version, n_markers=len(ids),
+                     mean_mm=round(float(err.mean()), 3), max_mm=round(float(err.max()), 3))
+
+        if err.max() > self.alert_mm and not self._alerting:
+            self._alerting = True
+            self._log("alert", **stats)
+        elif err.max() <= self.alert_mm and self._alerting:
+            self._alerting = False
+            self._log("recovered", **stats)
+
+        if not self.auto_update or err.max() <= self.update_mm:
+            return
+        if self._wait_version is not None:
+            if cal.version != self._wait_version:
+                self._wait_version = None
+            elif time.time() < self._wait_until:
+                return  # 저장한 json 이 아직 반영 전
+            else:
+                self._log("update_skipped", reason=f"registry did not load the saved json within {self.reload_timeout:g}s",
+                          **stats)
+                self._wait_version = None
+                return
+        if err.max() > self.max_update_mm:
+            self._log("update_skipped", reason="drift above max_update_mm", **stats)
+            return
+        self._update(cal, ids, px, ref, stats)
+
+    def _update(self, cal, ids, px, ref, stats):
+        # 관측 픽셀 -> 지금 H 기준으로 마커가 있어야 할 픽셀
+        expected = cal.mapper._apply_h(cal.mapper.H_inv, ref)
+        if self.model == "homography":
+            D, _ = cv2.findHomography(px, expected, 0)
+        else:
+            A, _ = cv2.estimateAffinePartial2D(px, expected, method=cv2.LMEDS)
+            D = None if A is None else np.vstack([A, [0.0, 0.0, 1.0]])
+        if D is None:
+            self._log("update_skipped", reason="correction fit failed", **stats)
+            return
+
+        H_new = cal.mapper.H @ D
+        H_new /= H_new[2, 2]
+        err_new = np.linalg.norm(cal.mapper._apply_h(H_new, px) - ref, axis=1)
+        if err_new.max() >= stats["max_mm"]:
+            self._log("update_skipped", reason="correction does not reduce drift", **stats)
+            return
+
+        path = cal.homo_json_path
+        with open(path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        H_old = cfg["H_pixel_to_world"]
+        cfg["H_pixel_to_world"] = H_new.tolist()
+        cfg["drift_correction"] = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "model": self.model,
+            "markers": [int(k) for k in ids],
+            "before_max_mm": stats["max_mm"],
+            "after_max_mm": round(float(err_new.max()), 3),
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cfg, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+        self.n_updates += 1
+        self._wait_version = cal.version
+        self._wait_until = time.time() + self.reload_timeout
+        self._log("update", after_max_mm=round(float(err_new.max()), 3), path=path,
+                  H_old=H_old, H_new=H_new.tolist(), **stats)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=1.0)
@@ -8,6 +8,8 @@ class PixelToRobotMapper:
     Loads homography + robot offset from json and provides:
       - pixel_to_world(u,v) -> (Xw, Yw) [mm]
       - pixel_to_robot(u,v) -> (Xr, Yr) [mm]
+      - pixels_to_robot(uv[N,2]) -> [N,2] [mm]   (배열 한 번에, 검출 여러 개/후보 grid 용)
+      - robot_to_pixels(xy[N,2]) -> [N,2] pixel  (역 homography, 오버레이 그리기 용)
     """
 
     def __init__(self, json_path: str):
@@ -21,6 +23,8 @@ class PixelToRobotMapper:
         self.H = H
         self.offset_x = float(cfg["robot_offset_mm"]["x"])
         self.offset_y = float(cfg["robot_offset_mm"]["y"])
+        self.H_inv = np.linalg.inv(H)
+        self._offset = np.array([self.offset_x, self.offset_y], dtype=np.float64)
 
     def pixel_to_world(self, u: float, v: float) -> tuple[float, float]:
         pt = np.array([[[u, v]]], dtype=np.float32)
@@ -32,3 +36,23 @@ class PixelToRobotMapper:
         Xr = Xw + self.offset_x
         Yr = Yw + self.offset_y
         return Xr, Yr
+
+    # ---------------- batch (N, 2) ----------------
+    @staticmethod
+    def _apply_h(H, pts):
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        if len(pts) == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        return cv2.perspectiveTransform(pts.reshape(-1, 1, 2), H).reshape(-1, 2)
+
+    def pixels_to_world(self, uv) -> np.ndarray:
+        return self._apply_h(self.H, uv)
+
+    def pixels_to_robot(self, uv) -> np.ndarray:
+        """undistorted pixel (N, 2) -> robot (N, 2) float64 [mm]"""
+        return self.pixels_to_world(uv) + self._offset
+
+    def robot_to_pixels(self, xy) -> np.ndarray:
+        """robot (N, 2) [mm] -> undistorted pixel (N, 2) float64 (역 homography)"""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        return self._apply_h(self.H_inv, xy - self._offset)
@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import threading
+
+import numpy as np
+import cv2
+
+
+class RawPixelToRobotLUT:
+    """
+    raw(왜곡된) 카메라 픽셀 -> robot X/Y [mm] 를 한 번에 찾는 float32 테이블.
+
+    Undistorter(undistort) -> PixelToRobotMapper(perspectiveTransform + offset) 두 단계를
+    해상도별로 모든 픽셀에 대해 미리 계산해 두고, 인식 결과 좌표는 bilinear 보간 인덱싱 한 번으로 변환.
+    (homography 는 원래 K 로 undistort 한 이미지 기준 = Undistorter 기본값과 같음)
+
+    camera_calib npz / homography json 이 바뀌면 (mtime 확인, check_interval 초마다) 자동으로 다시 만듦.
+
+    Usage:
+        lut = RawPixelToRobotLUT(CALIB_NPZ_PATH, HOMO_JSON_PATH)
+        xy = lut.lookup(centers_raw, img.shape[:2])     # (N, 2) raw 픽셀 -> (N, 2) robot mm
+        rx, ry = lut.pixel_to_robot(u, v, img.shape[:2])
+    """
+
+    def __init__(self, calib_npz_path: str, homo_json_path: str, check_interval: float = 1.0):
+        self.calib_npz_path = calib_npz_path
+        self.homo_json_path = homo_json_path
+        self.check_interval = float(check_interval)
+
+        self._lock = threading.Lock()
+        self._tables = {}       # (h, w) -> (h, w, 2) float32
+        self._mtimes = None
+        self._next_check = 0.0
+        self.n_builds = 0
+        self._load()
+
+    # ---------------- calibration ----------------
+    def _file_mtimes(self):
+        return (os.path.getmtime(self.calib_npz_path), os.path.getmtime(self.homo_json_path))
+
+    def _load(self):
+        mtimes = self._file_mtimes()
+
+        data = np.load(self.calib_npz_path)
+        K = data["cameraMatrix"].astype(np.float64)
+        dist = data["distCoeffs"].astype(np.float64)
+
+        with open(self.homo_json_path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        H = np.array(cfg["H_pixel_to_world"], dtype=np.float64)
+        if H.shape != (3, 3):
+            raise ValueError(f"Invalid H shape: {H.shape}, expected (3,3)")
+
+        self.K, self.dist, self.H = K, dist, H
+        self.offset = np.array([float(cfg["robot_offset_mm"]["x"]), float(cfg["robot_offset_mm"]["y"])], dtype=np.float64)
+        self._tables = {}
+        self._mtimes = mtimes
+
+    def _check_reload(self):
+        """check_interval 마다 캘리브레이션 파일 mtime 확인, 바뀌었으면 다시 읽고 테이블 비움."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            changed = self._file_mtimes() != self._mtimes
+        except OSError:
+            return  # 저장 도중(파일 교체 중)이면 다음 확인 때
+        if changed:
+            try:
+                self._load()
+                print(f"[LUT] 캘리브레이션 변경 감지 -> 테이블 재생성 ({self.calib_npz_path}, {self.homo_json_path})")
+            except Exception as e:
+                print(f"[Warning] 캘리브레이션 재로드 실패 (이전 테이블 유지): {e}")
+
+    # ---------------- table ----------------
+    def _build(self, h, w):
+        u, v = np.meshgrid(np.arange(w, dtype=np.float64), np.arange(h, dtype=np.float64))
+        uv = np.stack([u, v], axis=-1).reshape(-1, 1, 2)
+        und = cv2.undistortPoints(uv, self.K, self.dist, P=self.K)
+        world = cv2.perspectiveTransform(und, self.H).reshape(h, w, 2)
+        self.n_builds += 1
+        return (world + self.offset).astype(np.float32)
+
+    def table(self, shape):
+        """raw 해상도 shape=(h, w) 의 (h, w, 2) float32 robot XY 테이블."""
+        h, w = int(shape[0]), int(shape[1])
+        with self._lock:
+            self._check_reload()
+            t = self._tables.get((h, w))
+            if t is None:
+                t = self._build(h, w)
+                self._tables[(h, w)] = t
+            return t
+
+    # ---------------- lookup ----------------
+    def lookup(self, pts, shape):
+        """raw 픽셀 좌표 (N, 2) [u, v] (sub-pixel) -> robot (N, 2) float32 [mm]. 이미지 밖은 가장자리 값."""
+        t = self.table(shape)
+        h, w = t.shape[:2]
+        pts = np.asarray(pts, dtype=np.float32).reshape(-1, 2)
+        if len(pts) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+
+        u = np.clip(pts[:, 0], 0, w - 1)
+        v = np.clip(pts[:, 1], 0, h - 1)
+        u0 = np.minimum(u.astype(np.intp), w - 2)
+        v0 = np.minimum(v.astype(np.intp), h - 2)
+        fu = (u - u0)[:, None]
+        fv = (v - v0)[:, None]
+
+        top = t[v0, u0] * (1 - fu) + t[v0, u0 + 1] * fu
+        bot = t[v0 + 1, u0] * (1 - fu) + t[v0 + 1, u0 + 1] * fu
+        return top * (1 - fv) + bot * fv
+
+    def pixel_to_robot(self, u: float, v: float, shape) -> tuple[float, float]:
+        x, y = self.lookup([[u, v]], shape)[0]
+        return float(x), float(y)
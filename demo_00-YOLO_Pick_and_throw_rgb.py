@@ -3,59 +3,99 @@ import time
 from copy import deepcopy
 import threading
 
-# pip install
-import cv2
-
 # custom
-from camera_calibration.calibration_undistort_img import Undistorter
-from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+from camera_calibration.calibration_registry import CalibrationRegistry
+from camera_calibration.homography_drift_monitor import HomographyDriftMonitor
 from mycobot_wrapper import MyCobotController
-from yolo_wrapper import YOLOWrapper
+from yolo_wrapper import YOLOLoader
+from startup_timeline import TIMELINE
+from overlay_renderer import OverlayRenderer
+from frame_source import LatestVideoCapture
+from latency_monitor import LatencyMonitor, detection_age
+from detection_channel import DetectionChannel, detect_after_settle
+from task_recipe import compile_recipe, RecipeRunner
+from pick_pipeline import PickPipeline, move, grip_close, grip_open
 
 class YOLO_thread:
     def __init__(self, model_path, calib_path, homo_path, cam_id):
-        self.model = YOLOWrapper(model_path)
-        self.und = Undistorter(calib_path)
-        self.mapper = PixelToRobotMapper(homo_path)
+        # 모델 로드 + warm-up은 백그라운드에서 (로봇 초기화와 겹쳐서 진행)
+        self.loader = YOLOLoader(model_path)
+        self.model = None
+        # undistort / homography / (HEADLESS) raw 픽셀 -> robot XY 통합 테이블
+        # 캘리브레이션 파일이 바뀌면 새 버전을 만들어 무중단 교체 (재시작 불필요)
+        self.calib = CalibrationRegistry(calib_path, homo_path, with_lut=HEADLESS)
+        # 작업 영역 모서리 ArUco 마커로 homography 틀어짐 감시 + 자동 보정 (DRIFT_SAMPLE_S 초에 한 번)
+        self.drift = HomographyDriftMonitor(self.calib, marker_ids=DRIFT_MARKER_IDS, sample_interval=DRIFT_SAMPLE_S) if DRIFT_MARKER_IDS else None
         self.cam_id = cam_id
+        # 인식 결과 전달 (seq + 촬영 시각이 붙은 읽기 전용 snapshot, 읽을 때 복사 없음)
+        self.detections = DetectionChannel()
+        self.first_result = threading.Event()
+        # HEADLESS: 화면 출력 없음 (렌더 스레드/창 생성 안 함)
+        self.renderer = None if HEADLESS else OverlayRenderer('Vis Robot Object Detection', display_fps=30)
+        # 촬영 -> undistort -> infer -> map -> 로봇 전달 단계별 지연 (300 프레임마다 출력)
+        self.latency = LatencyMonitor(report_every=300)
 
         threading.Thread(target=self.run, daemon=True).start()
 
     def run(self):
-        cap = cv2.VideoCapture(self.cam_id)
+        # grab 스레드가 항상 최신 프레임만 들고 있음 (추론이 느려도 버퍼에 쌓인 옛 프레임을 받지 않음)
+        with TIMELINE.span("camera open"):
+            cap = LatestVideoCapture(self.cam_id)
+        self.model = self.loader.get()
         while True:
             # 카메라 이미지 수신
-            ret, img = cap.read()
-            if ret == False:
+            frame = cap.read_frame(timeout=1.0)
+            if frame is None:
                 print('카메라 수신이 안됩니다.')
-                time.sleep(0.5)
                 continue
-
-            # Undistortion 수행
-            img = self.und.undistort(img)
+            img = frame.img
+            trace = self.latency.start(frame.timestamp)
+            # 이 프레임은 끝까지 같은 캘리브레이션 버전으로 처리
+            cal = self.calib.current()
+
+            # Undistortion 수행 (HEADLESS: 전체 프레임은 건너뛰고 아래에서 bbox 중심점만 보정)
+            if not HEADLESS:
+                img = cal.und.undistort(img)
+            trace.mark('undistort')
+            if self.drift is not None:
+                self.drift.submit(img, frame.timestamp, undistorted=not HEADLESS)
 
             # 사물 인식
             results = self.model.infer(img, confidence_threshold=0.5)
+            trace.mark('infer')
 
             # 가장 conf 높은 한 놈 고르기
             results = sorted(results, key=lambda x: x["conf"], reverse=True)
+            centers = [self.model.bbox_center(r['bbox_pixel']) for r in results]
+            if HEADLESS:
+                # raw 좌표 중심점 -> robot XY 를 테이블 인덱싱 한 번으로 (undistort + homography + offset)
+                robot_locs = cal.lut.lookup(centers, img.shape[:2])
+            else:
+                # homography 입력은 pixel(u,v) (undistorted image 좌표), 검출 전체를 한 번에 변환
+                robot_locs = cal.mapper.pixels_to_robot(centers)
             for i, result in enumerate(results):
-                # bbox 중심 -> robot 좌표 변환
-                cx, cy = self.model.bbox_center(result['bbox_pixel'])
-                # homography 입력은 pixel(u,v) (undistorted image 좌표)
-                rx, ry = self.mapper.pixel_to_robot(cx, cy)
+                # bbox 중심 -> robot 좌표
+                rx, ry = float(robot_locs[i][0]), float(robot_locs[i][1])
                 # draw()에서 출력될 수 있도록 키 추가
                 results[i]["robot_loc"] = [rx, ry]
+                # 로봇 루프에서 결과 나이 확인용 (카메라 grab 시각)
+                results[i]["capture_ts"] = frame.timestamp
+                results[i]["calib_version"] = cal.version
+            trace.mark('map')
             
             # 외부 로봇 활용 용도
-            self.results = deepcopy(results)
-
-            # 시각화
-            vis = self.model.draw(img, results)
-            cv2.imshow('Vis Robot Object Detection', vis)
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q') or key == 27:  # q 또는 ESC
-                break
+            self.detections.publish(results, frame.timestamp)
+            trace.mark('handoff')
+            self.latency.finish(trace)
+            if not self.first_result.is_set():
+                TIMELINE.mark("first detection")
+                self.first_result.set()
+
+            # 시각화 (렌더 스레드로 넘기기만 함, 그리기/imshow는 표시 주기로 별도 수행)
+            if self.renderer is not None:
+                self.renderer.submit(img, results)
+                if self.renderer.quit.is_set():  # q 또는 ESC
+                    break
 
 def apply_offset(pos, offset):
     new_pos = deepcopy(pos)
@@ -93,6 +133,18 @@ CALIB_NPZ_PATH = './camera_calibration/camera_calib_rgb.npz'
 HOMO_JSON_PATH = './camera_calibration/homography_robot_map_rbg.json'
 YOLO_WEIGHT_PATH = "YOLO_train/Dice/runs/detect/train/weights/best.pt"
 ROBOT_IP_PATH = './IP_info.txt'
+# 화면 출력 없이 운용: 전체 프레임 undistort 생략, raw 프레임에서 인식 후 bbox 중심점만 robot 좌표로 (LUT)
+# (raw 프레임으로 학습/검증한 weight 사용 권장. 정확도/CPU 비교: benchmark_point_undistort.py)
+HEADLESS = False
+MAX_DETECTION_AGE_S = 0.5  # 촬영 후 이보다 오래된 인식 결과로는 pick 하지 않음 [s]
+DRIFT_MARKER_IDS = None     # 작업 영역 고정 ArUco 마커 id 목록 (예: [10, 11, 12, 13]), None 이면 drift 감시 안 함
+DRIFT_SAMPLE_S = 5.0        # drift 감시 샘플링 주기 [s]
+SETTLE_MARGIN_S = 0.1       # 팔이 멈춘 뒤 이 시간 이후 촬영된 프레임의 인식 결과만 사용 [s]
+# 작업 레시피 (json/yaml, 포즈/시퀀스를 데이터로). None 이면 아래 코드의 포즈/루프 사용. 예: './recipes/dice_rgb.json'
+RECIPE_PATH = None
+# 인식/계획/모션을 겹쳐서 실행 (pick_pipeline.PickPipeline). False 면 아래 직렬 루프
+PIPELINED = False
+THROW_OUT_OF_VIEW = False   # 버리는 위치가 카메라 시야 밖이면 True → 버리는 동안 다음 대상 인식
 
 # 로봇 이동 속도 (%)
 ROBOT_SPEED = 50
@@ -102,11 +154,19 @@ yolo_thread = YOLO_thread(YOLO_WEIGHT_PATH, CALIB_NPZ_PATH, HOMO_JSON_PATH, CAM_
 robot = MyCobotController(ROBOT_IP_PATH, default_speed=ROBOT_SPEED)
 
 # (선택) 로봇 연결/전원은 여기서만 해두고, 실제 동작 로직은 아래에서 작성해도 됨
-robot.connect()
-robot.power_on()
-robot.torque_on()
-robot.gripper_init()
-time.sleep(1)
+# (YOLO 모델은 이 구간 동안 백그라운드에서 로드/워밍업 중)
+with TIMELINE.span("robot connect"):
+    robot.connect()
+with TIMELINE.span("robot power_on/torque_on"):
+    robot.power_on()
+    robot.torque_on()
+with TIMELINE.span("gripper_init"):
+    robot.gripper_init()
+    time.sleep(1)
+
+# 첫 인식 결과까지 기다린 뒤 시작 구간 리포트 출력
+yolo_thread.first_result.wait()
+TIMELINE.report()
 
 
 # ===== 주사위 원점(Robot 좌표) =====
@@ -138,20 +198,66 @@ LOC_throw_appro_mm = deepcopy(LOC_THROW_mm)
 LOC_throw_appro_mm[2] += THROW_APPROACH
 
 
+def plan_pick(target):
+    """PickPipeline planning 단계: 물체 robot XY -> 모션 단계 목록 (범위 초과면 ValueError)."""
+    offset = {
+        'x': float(target.xy[0]) - OBJECT_ORIGIN_MM['x'],
+        'y': float(target.xy[1]) - OBJECT_ORIGIN_MM['y']
+    }
+    offset = z_offset_with_x(offset)
+    max_value = 150
+    if abs(offset['x']) > max_value or abs(offset['y']) > max_value:
+        raise ValueError(f'범위 초과: {offset}')
+    return [
+        move(apply_offset(LOC_pick_appro_mm, offset), MOVE_DELAY),
+        move(apply_offset(LOC_pick_mm, offset), MOVE_DELAY),
+        grip_close(),
+        move(apply_offset(LOC_pick_appro_mm, offset), MOVE_DELAY),
+        move(LOC_throw_appro_mm, MOVE_DELAY),
+        move(LOC_THROW_mm, MOVE_DELAY, view_clear=THROW_OUT_OF_VIEW),
+        grip_open(),
+        move(LOC_throw_appro_mm, MOVE_DELAY, view_clear=THROW_OUT_OF_VIEW),
+    ]
+
+
+if PIPELINED:
+    # 할 일이 없을 때만 카메라 대기 위치로, 60초마다 picks/h + 단계별 사용률 출력
+    engine = PickPipeline(robot, yolo_thread.detections, plan_pick, max_age=MAX_DETECTION_AGE_S,
+                          idle_steps=[move(LOC_ORIGIN_mm, SETTLE_MARGIN_S, view_clear=True, settle=True)])
+    engine.run_forever(report_every=60)
+elif RECIPE_PATH:
+    recipe = compile_recipe(RECIPE_PATH)
+    print(recipe.summary())
+    RecipeRunner(recipe, robot, yolo_thread.detections, latency=yolo_thread.latency).run()
 
 # 반복문 시작
-while True:
+last_seq = None  # 기본 자세에서 마지막으로 본 인식 결과 seq
+while not (PIPELINED or RECIPE_PATH):
     # 기본 자세 이동
-    robot.move_world(LOC_ORIGIN_mm, 1)
-    time.sleep(MOVE_DELAY*2)
+    if last_seq is not None and robot.last_move == ('coords', LOC_ORIGIN_mm):
+        # 이미 기본 자세에서 멈춰 있음 (물체 없음 / 건너뜀): 같은 이동 명령은 다시 안 보내고 새 인식 결과만 기다림
+        snapshot = yolo_thread.detections.wait_newer(last_seq, timeout=1.0)
+    else:
+        robot.move_world(LOC_ORIGIN_mm, 1)
+        # 팔이 멈춘 뒤 촬영된 첫 인식 결과 (고정 대기 MOVE_DELAY*2 대신 정지 확인 + SETTLE_MARGIN_S)
+        snapshot = detect_after_settle(robot, yolo_thread.detections, margin=SETTLE_MARGIN_S)
+    if snapshot is None:
+        continue
+    last_seq = snapshot.seq
 
     # 인식된 주사위가 1개 이상 있는지 확인
-    results_from_thread = deepcopy(yolo_thread.results)
-    if len(results_from_thread) == 0:
+    if len(snapshot) == 0:
         continue
 
     # 인식된 주사위의 위치 확인(conf 1등만)
-    result = results_from_thread[0]
+    result = snapshot[0]
+
+    # 촬영 후 너무 오래된 결과면 (물체가 움직였을 수 있음) 이번 사이클은 건너뜀
+    age = detection_age(result)
+    yolo_thread.latency.observe('robot_read', age)
+    if age > MAX_DETECTION_AGE_S:
+        print(f'오래된 인식 결과 무시: {age*1000:.0f}ms')
+        continue
     obj_loc = {'x':result['robot_loc'][0], 'y':result['robot_loc'][1]}
 
     # 물체 위치 + 물체 등록 오프셋값 반영
@@ -7,99 +7,151 @@ import threading
 import cv2
 
 # custom
-from camera_calibration.calibration_undistort_img import Undistorter
-from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+from camera_calibration.calibration_registry import CalibrationRegistry
+from camera_calibration.homography_drift_monitor import HomographyDriftMonitor
 from mycobot_wrapper import MyCobotController
-from yolo_wrapper import YOLOWrapper
+from yolo_wrapper import YOLOLoader
 from mirae_tof.etf_wrapper import FolderCapture
+from mirae_tof.shm_ring import ShmCapture
+from startup_timeline import TIMELINE
+from overlay_renderer import OverlayRenderer
+from frame_source import LatestVideoCapture
+from frame_sync import SyncedCapture
+from latency_monitor import LatencyMonitor, detection_age
+from detection_channel import DetectionChannel, detect_after_settle
+from task_recipe import compile_recipe, RecipeRunner
 
 window_size = [1920, 1080]
 
 class YOLO_thread:
     def __init__(self, model_path, calib_path, homo_path, window_size):
-        self.model = YOLOWrapper(model_path)
-        self.und = Undistorter(calib_path)
-        self.mapper = PixelToRobotMapper(homo_path)
-        self.coco_model = YOLOWrapper('yolo26n.pt')
+        # 두 모델을 각각 백그라운드에서 동시에 로드 + warm-up (로봇 초기화와 겹쳐서 진행)
+        self.loader = YOLOLoader(model_path)
+        self.coco_loader = YOLOLoader('yolo26n.pt')
+        self.model = None
+        self.coco_model = None
+        # IR undistort + homography (캘리브레이션 파일이 바뀌면 무중단 교체)
+        self.calib = CalibrationRegistry(calib_path, homo_path)
+        # 작업 영역 모서리 ArUco 마커로 homography 틀어짐 감시 + 자동 보정 (DRIFT_SAMPLE_S 초에 한 번)
+        self.drift = HomographyDriftMonitor(self.calib, marker_ids=DRIFT_MARKER_IDS, sample_interval=DRIFT_SAMPLE_S) if DRIFT_MARKER_IDS else None
         self.switch = 'working' # rbg / ir / working
+        # 인식 결과 전달 (seq + 촬영 시각이 붙은 읽기 전용 snapshot, 읽을 때 복사 없음)
+        self.detections = DetectionChannel()
+        self.first_result = threading.Event()
 
         self.show_imgs = {}
         for img_name, key in zip(['img-ir_detecting.jpg', 'img-rbg_detecting.jpg', 'img-robot_working.jpg'], ['ir', 'rgb', 'working']):
             img = cv2.imread(img_name)
             img = cv2.resize(img, window_size)
             self.show_imgs[key] = img
-        
+
+        # 배경 이미지 안에 카메라 영상이 들어갈 박스 위치
+        self.box_size = {
+            'ir': {'x1':743, 'y1':299, 'x2':1181, 'y2':573},
+            'rgb': {'x1':730, 'y1':302, 'x2':1192, 'y2':572},
+        }
+        self._canvas = {}
+        self.renderer = OverlayRenderer('Vis Robot Object Detection', display_fps=30, compose=self.compose)
+        # IR 촬영 -> undistort -> infer -> map -> 로봇 전달 단계별 지연 (300 프레임마다 출력)
+        self.latency = LatencyMonitor(report_every=300)
+
         threading.Thread(target=self.run, daemon=True).start()
 
     def run(self):
-        cap_ir = FolderCapture(save_dir='mirae_tof/save')
-        cap_rgb = cv2.VideoCapture(0)
+        # IR 소스: shared memory 링(mirae_tof/shm_capture.py) 또는 PNG 폴더(mirae_tof/save_img.py)
+        cap_ir = ShmCapture() if IR_USE_SHM else FolderCapture(save_dir='mirae_tof/save')
+        # grab 스레드가 항상 최신 프레임만 들고 있음 (추론이 느려도 버퍼에 쌓인 옛 프레임을 받지 않음)
+        with TIMELINE.span("camera open (rgb)"):
+            cap_rgb = LatestVideoCapture(0, name='rgb')
+        # 두 카메라를 동시에 읽고 timestamp가 가까운 프레임끼리 묶어서 받음
+        sync = SyncedCapture({'ir': cap_ir, 'rgb': cap_rgb}, reference='ir', tolerance=SYNC_TOLERANCE_S)
+        self.sync = sync
+        self.model = self.loader.get()
+        self.coco_model = self.coco_loader.get()
         while True:
-            # IR 카메라 이미지 수신
-            ret, img_ir = cap_ir.read()
-            if ret == False:
-                print('Warning: IR 이미지 수신 재시도')
-                continue
-            
-            # RGB 카메라 이미지 수신
-            ret, img_rgb = cap_rgb.read()
-            if ret == False:
-                print('Error: RGB 카메라 수신 안됨')
+            # IR + RGB 카메라 이미지 수신 (같은 순간의 프레임 묶음)
+            frame_set = sync.read_set(timeout=1.0)
+            if frame_set is None:
+                print('Warning: IR/RGB 이미지 수신 재시도')
+                sync.print_stats()
                 continue
+            img_ir = frame_set['ir'].img
+            img_rgb = frame_set['rgb'].img
+            trace = self.latency.start(frame_set.timestamp)
+
+            if frame_set.seq % 300 == 0:
+                sync.print_stats()
+
+            # 이 프레임은 끝까지 같은 캘리브레이션 버전으로 처리
+            cal = self.calib.current()
 
             # IR 이미지 Undistortion 수행
-            img_ir = self.und.undistort(img_ir)
+            img_ir = cal.und.undistort(img_ir)
+            trace.mark('undistort')
+            if self.drift is not None:
+                self.drift.submit(img_ir, frame_set.timestamp)
 
             # IR 사물 인식
             results_ir = self.model.infer(img_ir, confidence_threshold=0.5)
+            trace.mark('infer')
 
             # 가장 conf 높은 한 놈 고르기
             results_ir = sorted(results_ir, key=lambda x: x["conf"], reverse=True)
+            # bbox 중심 -> robot 좌표 변환 (homography 입력은 undistorted image 좌표, 검출 전체를 한 번에)
+            centers = [self.model.bbox_center(r['bbox_pixel']) for r in results_ir]
+            robot_locs = cal.mapper.pixels_to_robot(centers)
             for i, result in enumerate(results_ir):
-                # bbox 중심 -> robot 좌표 변환
-                cx, cy = self.model.bbox_center(result['bbox_pixel'])
-                # homography 입력은 pixel(u,v) (undistorted image 좌표)
-                rx, ry = self.mapper.pixel_to_robot(cx, cy)
+                rx, ry = float(robot_locs[i][0]), float(robot_locs[i][1])
                 # draw()에서 출력될 수 있도록 키 추가
                 results_ir[i]["robot_loc"] = [rx, ry]
-
-            # IR 사물 인식 결과 시각화
-            vis_ir = self.model.draw(img_ir, results_ir)
+                # 로봇 루프에서 결과 나이 확인용 (IR 기준 프레임 시각)
+                results_ir[i]["capture_ts"] = frame_set.timestamp
+                results_ir[i]["calib_version"] = cal.version
+            trace.mark('map')
 
             # 외부 로봇 활용 용도
-            self.results_ir = deepcopy(results_ir)
+            self.detections.publish(results_ir, frame_set.timestamp)
+            trace.mark('handoff')
+            self.latency.finish(trace)
+            if not self.first_result.is_set():
+                TIMELINE.mark("first detection")
+                self.first_result.set()
 
             # RGB 사물 인식
             results_rgb = self.coco_model.infer(img_rgb, confidence_threshold=0.5)
 
-            # RGB 사물 인식 결과 시각화
-            vis_rgb = self.coco_model.draw(img_rgb, results_rgb)
-
-            # 마지막 결과 합성 및 출력 선택
-            ir_img_box_size = {'x1':743, 'y1':299, 'x2':1181, 'y2':573}
-            rbg_img_box_size = {'x1':730, 'y1':302, 'x2':1192, 'y2':572}
-            if self.switch == 'working':
-                show_img = self.show_imgs['working']
-            elif self.switch == 'ir':
-                # IR 이미지 합성
-                vis_ir = cv2.resize(vis_ir, (ir_img_box_size['x2']-ir_img_box_size['x1'], ir_img_box_size['y2']-ir_img_box_size['y1']))
-                show_img = deepcopy(self.show_imgs['ir'])
-                show_img[ir_img_box_size['y1']:ir_img_box_size['y2'], ir_img_box_size['x1']:ir_img_box_size['x2']] = vis_ir
-                
-            elif self.switch == 'rgb':
-                # RGB 이미지 합성
-                vis_rgb = cv2.resize(vis_rgb, (rbg_img_box_size['x2']-rbg_img_box_size['x1'], rbg_img_box_size['y2']-rbg_img_box_size['y1']))
-                show_img = deepcopy(self.show_imgs['rgb'])
-                show_img[rbg_img_box_size['y1']:rbg_img_box_size['y2'], rbg_img_box_size['x1']:rbg_img_box_size['x2']] = vis_rgb
-            else:
-                print('Error: self.switch 변수 설정 에러. 로직 수정 필요(working | ir | rgb 중 택 1 필요.)')
-
-
-            cv2.imshow('Vis Robot Object Detection', show_img)
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q') or key == 27:  # q 또는 ESC
+            # 시각화 (렌더 스레드로 넘기기만 함, 그리기/합성/imshow는 표시 주기로 별도 수행)
+            self.renderer.submit(img_ir, results_ir, key='ir')
+            self.renderer.submit(img_rgb, results_rgb, key='rgb')
+            if self.renderer.quit.is_set():  # q 또는 ESC
                 break
-            
+
+    def compose(self, render):
+        """
+        렌더 스레드에서 호출. 현재 switch에 해당하는 스트림만 그려서 배경 이미지 박스 안에 합성.
+        합성 캔버스는 switch별로 한 번만 만들어두고 박스 영역만 덮어씀 (매 프레임 deepcopy 없음).
+        """
+        if self.switch == 'working':
+            return self.show_imgs['working']
+
+        if self.switch not in ('ir', 'rgb'):
+            print('Error: self.switch 변수 설정 에러. 로직 수정 필요(working | ir | rgb 중 택 1 필요.)')
+            return None
+
+        # 마지막 결과 합성 및 출력 선택
+        box = self.box_size[self.switch]
+        vis = render(self.switch)
+        if vis is None:
+            return self.show_imgs[self.switch]
+
+        canvas = self._canvas.get(self.switch)
+        if canvas is None:
+            canvas = self.show_imgs[self.switch].copy()
+            self._canvas[self.switch] = canvas
+
+        canvas[box['y1']:box['y2'], box['x1']:box['x2']] = cv2.resize(vis, (box['x2']-box['x1'], box['y2']-box['y1']))
+        return canvas
+
 
 def apply_offset(pos, offset):
     new_pos = deepcopy(pos)
@@ -135,7 +187,15 @@ def z_offset_with_x(offset):
 CALIB_NPZ_PATH = './camera_calibration/camera_calib_ir.npz'
 HOMO_JSON_PATH = './camera_calibration/homography_robot_map_ir.json'
 YOLO_WEIGHT_PATH = "YOLO_train/Dice_ir/runs/detect/train/weights/best.pt"
+IR_USE_SHM = True  # True: shm_capture.py 링에서 읽기 / False: save_img.py PNG 폴더에서 읽기
+SYNC_TOLERANCE_S = 0.1  # IR/RGB 프레임을 같은 순간으로 볼 최대 시간 차 [s]
 ROBOT_IP_PATH = './IP_info.txt'
+MAX_DETECTION_AGE_S = 0.5  # 촬영 후 이보다 오래된 인식 결과로는 pick 하지 않음 [s]
+DRIFT_MARKER_IDS = None     # 작업 영역 고정 ArUco 마커 id 목록 (예: [10, 11, 12, 13]), None 이면 drift 감시 안 함
+DRIFT_SAMPLE_S = 5.0        # drift 감시 샘플링 주기 [s]
+SETTLE_MARGIN_S = 0.1       # 팔이 멈춘 뒤 이 시간 이후 촬영된 프레임의 인식 결과만 사용 [s]
+# 작업 레시피 (json/yaml, 포즈/시퀀스를 데이터로). None 이면 아래 코드의 포즈/루프 사용. 예: './recipes/dice_ir_rgb_look.json'
+RECIPE_PATH = None
 
 # 로봇 이동 속도 (%)
 ROBOT_SPEED = 50
@@ -145,11 +205,15 @@ yolo_thread = YOLO_thread(YOLO_WEIGHT_PATH, CALIB_NPZ_PATH, HOMO_JSON_PATH, wind
 robot = MyCobotController(ROBOT_IP_PATH, default_speed=ROBOT_SPEED)
 
 # (선택) 로봇 연결/전원은 여기서만 해두고, 실제 동작 로직은 아래에서 작성해도 됨
-robot.connect()
-robot.power_on()
-robot.torque_on()
-robot.gripper_init()
-time.sleep(1)
+# (YOLO 모델 2개는 이 구간 동안 백그라운드에서 로드/워밍업 중)
+with TIMELINE.span("robot connect"):
+    robot.connect()
+with TIMELINE.span("robot power_on/torque_on"):
+    robot.power_on()
+    robot.torque_on()
+with TIMELINE.span("gripper_init"):
+    robot.gripper_init()
+    time.sleep(1)
 
 
 # ===== 주사위 원점(Robot 좌표) =====
@@ -186,20 +250,48 @@ loc_throw_appro_mm = deepcopy(loc_throw_mm)
 loc_throw_appro_mm[2] += THROW_APPROACH
 
 robot.move_joints(loc_origin_j, 1)
+
+# 첫 인식 결과까지 기다린 뒤 시작 구간 리포트 출력
+yolo_thread.first_result.wait()
+TIMELINE.report()
+
+if RECIPE_PATH:
+    # 레시피 검증 + 정적 포즈/작업 범위 미리 계산 (잘못된 레시피는 사이클 시작 전에 ValueError)
+    recipe = compile_recipe(RECIPE_PATH)
+    print(recipe.summary())
+    RecipeRunner(recipe, robot, yolo_thread.detections,
+                 set_camera=lambda name: setattr(yolo_thread, 'switch', name),
+                 latency=yolo_thread.latency).run(startup=False)  # startup 자세는 위에서 이동
+
 # 반복문 시작
-while True:
+last_seq = None  # 기본 자세에서 마지막으로 본 인식 결과 seq
+while not RECIPE_PATH:
     # 기본 자세 이동
     yolo_thread.switch = 'ir'
-    robot.move_world(loc_origin_mm, 1)
-    time.sleep(MOVE_DELAY*2)
+    if last_seq is not None and robot.last_move == ('coords', loc_origin_mm):
+        # 이미 기본 자세에서 멈춰 있음 (물체 없음 / 건너뜀): 같은 이동 명령은 다시 안 보내고 새 인식 결과만 기다림
+        snapshot = yolo_thread.detections.wait_newer(last_seq, timeout=1.0)
+    else:
+        robot.move_world(loc_origin_mm, 1)
+        # 팔이 멈춘 뒤 촬영된 첫 인식 결과 (고정 대기 MOVE_DELAY*2 대신 정지 확인 + SETTLE_MARGIN_S)
+        snapshot = detect_after_settle(robot, yolo_thread.detections, margin=SETTLE_MARGIN_S)
+    if snapshot is None:
+        continue
+    last_seq = snapshot.seq
 
     # 인식된 주사위가 1개 이상 있는지 확인
-    results_from_thread = deepcopy(yolo_thread.results_ir)
-    if len(results_from_thread) == 0:
+    if len(snapshot) == 0:
         continue
 
     # 인식된 주사위의 위치 확인(conf 1등만)
-    result = results_from_thread[0]
+    result = snapshot[0]
+
+    # 촬영 후 너무 오래된 결과면 (물체가 움직였을 수 있음) 이번 사이클은 건너뜀
+    age = detection_age(result)
+    yolo_thread.latency.observe('robot_read', age)
+    if age > MAX_DETECTION_AGE_S:
+        print(f'오래된 인식 결과 무시: {age*1000:.0f}ms')
+        continue
     obj_loc = {'x':result['robot_loc'][0], 'y':result['robot_loc'][1]}
 
     # 물체 위치 + 물체 등록 오프셋값 반영
@@ -0,0 +1,146 @@
+import time
+import threading
+from types import MappingProxyType
+
+import numpy as np
+
+
+def freeze(obj):
+    """dict -> 읽기 전용 mapping, list/tuple -> tuple, ndarray -> 읽기 전용 복사본 (재귀)."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    if isinstance(obj, np.ndarray):
+        arr = obj.copy()
+        arr.setflags(write=False)
+        return arr
+    return obj
+
+
+class DetectionSnapshot:
+    """
+    한 프레임의 인식 결과 (publish 이후 변경 불가).
+      - seq          : 채널 안에서 1부터 증가 (0 = 아직 결과 없음)
+      - capture_ts   : 그 프레임 촬영 시각 (time.time() 기준)
+      - published_ts : publish 시각
+      - results      : tuple of 읽기 전용 dict (conf 순)
+      - meta         : publish(**meta) 로 넘긴 값 (source, calib_version 등)
+    list 처럼 len() / [i] / for 사용 가능 (기존 results list 를 쓰던 코드 그대로 동작).
+    """
+
+    __slots__ = ("seq", "capture_ts", "published_ts", "results", "meta")
+
+    def __init__(self, seq, capture_ts, results, meta):
+        self.seq = seq
+        self.capture_ts = capture_ts
+        self.published_ts = time.time()
+        self.results = results
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, i):
+        return self.results[i]
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __bool__(self):
+        return len(self.results) > 0
+
+    def age(self):
+        """지금 기준 촬영 후 경과 시간 [s]."""
+        return time.time() - self.capture_ts
+
+    def __repr__(self):
+        return f"DetectionSnapshot(seq={self.seq}, n={len(self.results)}, age={self.age() * 1000:.0f}ms)"
+
+
+class DetectionChannel:
+    """
+    인식 스레드 -> 로봇 루프 결과 전달 (deepcopy 없는 double buffer).
+
+    생산자는 publish() 에서 결과를 한 번 freeze 해서 새 snapshot(뒤 버퍼)을 만들고 참조 하나만 바꿔서 앞 버퍼로 올림.
+    앞 버퍼 snapshot 은 절대 수정되지 않으므로 소비자는 latest() 로 받은 것을 복사/lock 없이 그대로 씀.
+    lock 은 seq 증가 + 대기 중인 소비자 깨우기에만 사용.
+
+      - latest()                  : 가장 최근 snapshot (결과가 오기 전에는 seq=0 인 빈 snapshot)
+      - wait_newer(seq, timeout)  : seq 보다 새 snapshot 이 올 때까지 대기 (timeout 이면 None)
+      - wait_captured_after(ts, timeout) : ts 이후에 촬영된 프레임의 첫 snapshot (timeout 이면 None)
+
+    Usage:
+        # 인식 스레드
+        self.detections = DetectionChannel()
+        self.detections.publish(results, frame.timestamp)
+        # 로봇 루프
+        snap = yolo_thread.detections.wait_newer(last_seq, timeout=1.0)   # None: timeout
+        if snap is not None:
+            last_seq = snap.seq
+            result = snap[0] if len(snap) else None
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._front = DetectionSnapshot(0, 0.0, (), MappingProxyType({}))
+        self.n_published = 0
+
+    def publish(self, results, capture_ts, **meta):
+        back = DetectionSnapshot(0, float(capture_ts), freeze(list(results)), MappingProxyType(meta))
+        with self._cond:
+            back.seq = self._front.seq + 1
+            self._front = back
+            self.n_published += 1
+            self._cond.notify_all()
+        return back
+
+    def latest(self):
+        return self._front
+
+    @property
+    def seq(self):
+        return self._front.seq
+
+    def wait_newer(self, seq, timeout=None):
+        snap = self._front
+        if snap.seq > seq:
+            return snap
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._front.seq <= seq:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._front
+
+    def wait_captured_after(self, ts, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        snap = self._front
+        while snap.capture_ts <= ts:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            snap = self.wait_newer(snap.seq, remaining)
+            if snap is None:
+                return None
+        return snap
+
+
+def detect_after_settle(robot, channel, margin=0.1, timeout=3.0, **wait_kwargs):
+    """
+    마지막 이동 명령 후 팔이 멈출 때까지 기다리고 (robot.wait_motion_done),
+    정지 시각 + margin 이후에 촬영된 첫 인식 snapshot 반환 → 고정 sleep 없이 모션 블러 없는 결과.
+    팔이 멈추지 않거나(TimeoutError) timeout 안에 새 프레임이 없으면 None.
+
+    Usage:
+        robot.move_world(LOC_ORIGIN_mm, 1)
+        snapshot = detect_after_settle(robot, yolo_thread.detections, margin=0.1)
+    """
+    try:
+        settle_ts = robot.wait_motion_done(**wait_kwargs)
+    except TimeoutError as e:
+        print(f'[Warning] {e}')
+        return None
+    return channel.wait_captured_after(settle_ts + margin, timeout)
@@ -0,0 +1,137 @@
+import time
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+
+
+class Frame:
+    """
+    카메라 프레임 1장 + 메타데이터.
+      - img       : BGR ndarray (또는 raw 소스면 uint16 등)
+      - timestamp : 촬영(수신) 시각, time.time() 기준 (프로세스 간 비교 가능)
+      - seq       : 소스별 증가 번호 (같은 프레임인지/빠진 프레임 수 확인용)
+      - source    : 소스 이름
+    """
+
+    __slots__ = ("img", "timestamp", "seq", "source")
+
+    def __init__(self, img, timestamp, seq, source=""):
+        self.img = img
+        self.timestamp = timestamp
+        self.seq = seq
+        self.source = source
+
+    def age(self):
+        """지금 기준 프레임 나이 [s]."""
+        return time.time() - self.timestamp
+
+
+class FrameSource(ABC):
+    """
+    모든 카메라 소스(웹캠, ToF 폴더, ToF shared memory, raw 링 파일)의 공통 인터페이스.
+    파이프라인은 소스 종류와 상관없이 read_frame() 만 쓰면 됨.
+
+      - read_frame(timeout) -> Frame | None : 마지막으로 반환한 것보다 새 프레임이 올 때까지 대기
+      - read()              -> (ret, img)    : cv2.VideoCapture.read() 호환
+      - release()
+
+    read_frame 은 abstractmethod: 구현하지 않은 소스는 첫 read 가 아니라 생성 시점에 TypeError.
+    """
+
+    name = ""
+    read_timeout = 0.5
+
+    @abstractmethod
+    def read_frame(self, timeout=None):
+        """마지막으로 반환한 것보다 새 프레임 -> Frame, timeout 안에 없으면 None."""
+
+    def read(self):
+        frame = self.read_frame(timeout=self.read_timeout)
+        if frame is None:
+            return False, None
+        return True, frame.img
+
+    def release(self):
+        pass
+
+
+class LatestVideoCapture(FrameSource):
+    """
+    cv2.VideoCapture 를 전용 grab 스레드에서 계속 읽어서 "가장 최신 프레임 1장"만 보관.
+
+    추론이 느리면 드라이버 버퍼에 프레임이 쌓여서 read() 가 수백 ms 전 프레임을 주는 문제가 있음.
+    grab 스레드가 쉬지 않고 버퍼를 비우므로 read_frame() 은 항상 지금에 가장 가까운 프레임을 받음.
+
+    Usage:
+        cap = LatestVideoCapture(0)
+        frame = cap.read_frame(timeout=1.0)   # Frame(img, timestamp, seq)
+        ret, img = cap.read()                 # 기존 코드 호환
+    """
+
+    def __init__(self, cam_id=0, api_preference=None, name=None):
+        self.name = name or f"cam{cam_id}"
+        if api_preference is None:
+            self.cap = cv2.VideoCapture(cam_id)
+        else:
+            self.cap = cv2.VideoCapture(cam_id, api_preference)
+
+        # 지원하는 백엔드면 드라이버 버퍼도 최소화 (지원 안 하면 무시됨)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._last_seq = 0
+        self._stop = threading.Event()
+
+        self.n_grabbed = 0
+        self.n_failed = 0
+
+        self._thread = threading.Thread(target=self._grab_loop, name=f"LatestVideoCapture({self.name})", daemon=True)
+        self._thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _grab_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            # grab()이 리턴하는 시점 = 프레임 도착 시점, 디코딩(retrieve)은 그 다음
+            if not self.cap.grab():
+                self.n_failed += 1
+                time.sleep(0.05)
+                continue
+            ts = time.time()
+            ok, img = self.cap.retrieve()
+            if not ok or img is None:
+                self.n_failed += 1
+                continue
+
+            seq += 1
+            self.n_grabbed += 1
+            with self._cond:
+                self._frame = Frame(img, ts, seq, self.name)
+                self._cond.notify_all()
+
+    def read_frame(self, timeout=None):
+        """마지막으로 반환한 것보다 새 프레임 (없으면 timeout 초 대기 후 None)."""
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self._frame is not None and self._frame.seq > self._last_seq,
+                timeout=timeout,
+            )
+            if not ok:
+                return None
+            frame = self._frame
+            self._last_seq = frame.seq
+            return frame
+
+    def latest(self):
+        """대기 없이 현재 보관 중인 최신 프레임 (이미 반환한 것일 수도 있음)."""
+        with self._cond:
+            return self._frame
+
+    def release(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.cap.release()
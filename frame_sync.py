@@ -0,0 +1,175 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class FrameSet:
+    """
+    같은 순간으로 짝지어진 소스별 Frame 묶음.
+      - frames    : {source_name: Frame}
+      - timestamp : 기준(reference) 소스 프레임의 timestamp
+      - skew      : 묶음 안에서 가장 이른/늦은 프레임의 시간 차 [s]
+      - seq       : FrameSet 증가 번호
+    """
+
+    __slots__ = ("frames", "timestamp", "skew", "seq")
+
+    def __init__(self, frames, timestamp, skew, seq):
+        self.frames = frames
+        self.timestamp = timestamp
+        self.skew = skew
+        self.seq = seq
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+
+class SyncedCapture:
+    """
+    여러 FrameSource(IR ToF, RGB 웹캠 ...)를 각자 스레드에서 동시에 읽고,
+    timestamp가 tolerance 안에 드는 프레임끼리 묶어서 FrameSet으로 전달.
+
+    - 한 카메라를 기다리는 동안 다른 카메라가 멈추지 않음 (가장 느린 카메라 = 루프 속도 문제 해결)
+    - 기준 소스(reference) 프레임마다 나머지 소스에서 시간상 가장 가까운 프레임을 찾음
+    - 짝을 못 찾은 기준 프레임은 drop 으로 집계, skew/drop 통계는 stats()로 확인
+
+    Usage:
+        sync = SyncedCapture({'ir': cap_ir, 'rgb': cap_rgb}, reference='ir', tolerance=0.1)
+        fs = sync.read_set(timeout=1.0)
+        img_ir, img_rgb = fs['ir'].img, fs['rgb'].img
+    """
+
+    def __init__(self, sources, reference=None, tolerance=0.05, history=8, read_timeout=0.5):
+        self.sources = dict(sources)
+        self.reference = reference or next(iter(self.sources))
+        self.tolerance = float(tolerance)
+        self.read_timeout = read_timeout
+
+        self._cond = threading.Condition()
+        self._buffers = {name: deque(maxlen=history) for name in self.sources}
+        self._pending = deque()     # 아직 짝을 못 찾은 기준 프레임
+        self._latest_set = None
+        self._last_returned = 0
+        self._set_seq = 0
+        self._stop = threading.Event()
+
+        # 통계
+        self.n_frames = {name: 0 for name in self.sources}
+        self.n_sets = 0
+        self.n_dropped = 0
+        self._skews = deque(maxlen=500)
+
+        self._threads = []
+        for name, src in self.sources.items():
+            t = threading.Thread(target=self._reader_loop, args=(name, src), name=f"SyncedCapture({name})", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    # ---------------- reader threads ----------------
+    def _reader_loop(self, name, src):
+        while not self._stop.is_set():
+            frame = src.read_frame(timeout=self.read_timeout)
+            if frame is None:
+                continue
+            with self._cond:
+                self._buffers[name].append(frame)
+                self.n_frames[name] += 1
+                if name == self.reference:
+                    self._pending.append(frame)
+                self._match()
+
+    # ---------------- matching ----------------
+    def _nearest(self, name, ts):
+        best = None
+        for f in self._buffers[name]:
+            dt = abs(f.timestamp - ts)
+            if best is None or dt < best[0]:
+                best = (dt, f)
+        return best
+
+    def _match(self):
+        """_cond 잡은 상태에서 호출. 짝이 완성된 기준 프레임을 FrameSet으로 만들고 못 찾는 건 drop."""
+        while self._pending:
+            ref = self._pending[0]
+            frames = {self.reference: ref}
+            waiting = False
+            missing = False
+
+            for name in self.sources:
+                if name == self.reference:
+                    continue
+                best = self._nearest(name, ref.timestamp)
+                if best is not None and best[0] <= self.tolerance:
+                    # 더 가까운 프레임이 아직 올 수 있으면 (최신 프레임이 기준보다 이전) 기다림
+                    newest = self._buffers[name][-1]
+                    if newest.timestamp < ref.timestamp and time.time() - ref.timestamp < self.tolerance:
+                        waiting = True
+                    frames[name] = best[1]
+                    continue
+
+                newest = self._buffers[name][-1] if self._buffers[name] else None
+                if (newest is None or newest.timestamp < ref.timestamp + self.tolerance) \
+                        and time.time() - ref.timestamp < self.tolerance * 2:
+                    # 아직 짝이 될 프레임이 도착하지 않았을 수 있음
+                    waiting = True
+                else:
+                    missing = True
+
+            if missing:
+                self._pending.popleft()
+                self.n_dropped += 1
+                continue
+            if waiting:
+                break
+
+            self._pending.popleft()
+            stamps = [f.timestamp for f in frames.values()]
+            skew = max(stamps) - min(stamps)
+            self._set_seq += 1
+            self._latest_set = FrameSet(frames, ref.timestamp, skew, self._set_seq)
+            self.n_sets += 1
+            self._skews.append(skew)
+            self._cond.notify_all()
+
+    # ---------------- consumer ----------------
+    def read_set(self, timeout=None):
+        """마지막으로 반환한 것보다 새 FrameSet (없으면 timeout 초 대기 후 None)."""
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        with self._cond:
+            while self._latest_set is None or self._latest_set.seq <= self._last_returned:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                # 기다리는 중인 기준 프레임이 시간 초과되었을 수 있으므로 짧게 깨어나서 재확인
+                self._cond.wait(self.tolerance if remaining is None else min(self.tolerance, remaining))
+                self._match()
+            fs = self._latest_set
+            self._last_returned = fs.seq
+            return fs
+
+    def stats(self):
+        with self._cond:
+            skews = np.array(self._skews, dtype=np.float64)
+            return {
+                'frames': dict(self.n_frames),
+                'sets': self.n_sets,
+                'dropped': self.n_dropped,
+                'skew_mean_ms': float(skews.mean() * 1000) if len(skews) else None,
+                'skew_p95_ms': float(np.percentile(skews, 95) * 1000) if len(skews) else None,
+                'skew_max_ms': float(skews.max() * 1000) if len(skews) else None,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        skew = '-' if s['skew_mean_ms'] is None else \
+            f"mean {s['skew_mean_ms']:.1f} / p95 {s['skew_p95_ms']:.1f} / max {s['skew_max_ms']:.1f} ms"
+        print(f"[Sync] frames {s['frames']} | sets {s['sets']} | dropped {s['dropped']} | skew {skew}")
+
+    def release(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        for src in self.sources.values():
+            src.release()
@@ -0,0 +1,237 @@
+"""
+Local YOLO inference server.
+
+모델(weights)별로 YOLOWrapper를 딱 한 번만 로드해서 들고 있고,
+여러 스크립트(데모, YOLO_check location, 캘리브레이션 테스트 ...)가 같은 warm 모델을 공유함.
+
+- 제어 채널: multiprocessing.connection (localhost TCP, authkey)
+- 이미지 전달: multiprocessing.shared_memory (클라이언트가 만든 버퍼를 서버가 attach → 복사 없이 view)
+- 결과: float32 (N,6) = [x1, y1, x2, y2, conf, class_no] 를 raw bytes로 반환
+
+서버 실행:
+    python inference_server.py
+
+클라이언트(기존 YOLOWrapper 대신):
+    from inference_server import RemoteYOLOWrapper
+    yolo = RemoteYOLOWrapper("YOLO_train/Dice_ir/runs/detect/train/weights/best.pt")
+    dets = yolo.infer(img, confidence_threshold=0.5)   # YOLOWrapper.infer()와 동일 형식
+    vis = yolo.draw(img, dets)
+"""
+
+# base
+import os
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+
+# pip install
+import numpy as np
+
+# custom
+from yolo_wrapper import YOLOWrapper
+
+
+# ===== 하드코딩 설정 =====
+SERVER_ADDRESS = ('127.0.0.1', 6010)
+AUTHKEY = b'mycobot-infer'
+
+# 서버 시작 시 미리 로드할 모델 (나머지는 처음 요청 들어올 때 로드)
+PRELOAD_WEIGHTS = [
+    "YOLO_train/Dice_ir/runs/detect/train/weights/best.pt",
+    "yolo26n.pt",
+]
+
+
+def model_key(weight_path):
+    """같은 weights를 다른 상대경로로 불러도 같은 모델을 쓰도록 정규화."""
+    if os.path.exists(weight_path):
+        return os.path.normcase(os.path.abspath(weight_path))
+    # 'yolo26n.pt' 처럼 ultralytics가 받아오는 이름은 그대로 사용
+    return weight_path
+
+
+def _attach_shm(name):
+    """
+    클라이언트가 만든 shared memory에 attach.
+    POSIX에서는 attach만 해도 resource_tracker에 등록되어 서버 종료 시 unlink 되는 문제가 있어 등록 해제.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class InferenceServer:
+    """
+    weights 경로별로 YOLOWrapper를 하나씩만 보관.
+    클라이언트 연결마다 스레드 1개, 같은 모델에 대한 추론은 모델별 lock으로 직렬화.
+    """
+
+    def __init__(self, address=SERVER_ADDRESS, authkey=AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+
+        self._models = {}        # key -> YOLOWrapper
+        self._model_locks = {}   # key -> Lock (추론 직렬화)
+        self._load_lock = threading.Lock()
+
+    def get_model(self, weight_path):
+        key = model_key(weight_path)
+        with self._load_lock:
+            if key not in self._models:
+                print(f'[Server] 모델 로드: {weight_path}')
+                model = YOLOWrapper(weight_path)
+                model.warmup()
+                self._models[key] = model
+                self._model_locks[key] = threading.Lock()
+        return key, self._models[key]
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=self.authkey)
+        print(f'[Server] listening on {self.address}')
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def _handle(self, conn):
+        shms = {}  # 이 연결이 사용하는 shared memory (name -> SharedMemory)
+        try:
+            while True:
+                try:
+                    msg = conn.recv()
+                except (EOFError, ConnectionResetError):
+                    break
+
+                cmd = msg.get('cmd')
+                try:
+                    if cmd == 'open':
+                        key, model = self.get_model(msg['weight_path'])
+                        conn.send({'ok': True, 'key': key, 'names': model.names})
+
+                    elif cmd == 'infer':
+                        name = msg['shm']
+                        if name not in shms:
+                            shms[name] = _attach_shm(name)
+                        shape = tuple(msg['shape'])
+                        img = np.ndarray(shape, dtype=np.uint8, buffer=shms[name].buf)
+
+                        key = msg['key']
+                        with self._model_locks[key]:
+                            arr = self._models[key].infer_array(img, confidence_threshold=msg['conf'])
+
+                        conn.send({'ok': True, 'n': len(arr)})
+                        conn.send_bytes(np.ascontiguousarray(arr, dtype=np.float32).tobytes())
+
+                    elif cmd == 'release':
+                        shm = shms.pop(msg['shm'], None)
+                        if shm is not None:
+                            shm.close()
+                        conn.send({'ok': True})
+
+                    else:
+                        conn.send({'ok': False, 'error': f'unknown cmd: {cmd}'})
+
+                except Exception as e:
+                    conn.send({'ok': False, 'error': repr(e)})
+        finally:
+            for shm in shms.values():
+                try:
+                    shm.close()
+                except Exception:
+                    pass
+            conn.close()
+
+
+class RemoteYOLOWrapper(YOLOWrapper):
+    """
+    YOLOWrapper와 같은 인터페이스(infer / infer_array / draw / bbox_center)를 제공하지만
+    실제 추론은 InferenceServer 프로세스의 warm 모델이 수행.
+    서버가 떠 있지 않으면 생성 시 ConnectionRefusedError.
+    """
+
+    def __init__(self, weight_path, address=SERVER_ADDRESS, authkey=AUTHKEY):
+        # YOLOWrapper.__init__(모델 로드)은 호출하지 않음
+        self.weight_path = weight_path
+        self.model = None
+
+        # 상대경로는 서버 cwd 기준으로 풀리므로, 로컬에 있는 파일이면 절대경로로 보냄
+        # ('yolo26n.pt' 처럼 로컬에 없는 이름은 그대로 → 서버가 받아오는 모델)
+        remote_path = os.path.abspath(weight_path) if os.path.exists(weight_path) else weight_path
+
+        self._conn = Client(address, authkey=authkey)
+        self._conn.send({'cmd': 'open', 'weight_path': remote_path})
+        rep = self._conn.recv()
+        if not rep['ok']:
+            raise RuntimeError(f"서버 모델 로드 실패: {rep['error']}")
+
+        self._key = rep['key']
+        self.names = rep['names']
+
+        self._shm = None
+        self._lock = threading.Lock()
+
+    def warmup(self, imgsz=640, n=1):
+        # 서버 쪽 모델은 이미 warm 상태
+        return
+
+    def _ensure_shm(self, nbytes):
+        if self._shm is not None and self._shm.size >= nbytes:
+            return
+        if self._shm is not None:
+            self._release_shm()
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def _release_shm(self):
+        self._conn.send({'cmd': 'release', 'shm': self._shm.name})
+        self._conn.recv()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def infer_array(self, bgr_img, confidence_threshold=0.5):
+        if bgr_img is None:
+            return np.zeros((0, 6), dtype=np.float32)
+
+        img = np.ascontiguousarray(bgr_img, dtype=np.uint8)
+
+        with self._lock:
+            self._ensure_shm(img.nbytes)
+            np.ndarray(img.shape, dtype=np.uint8, buffer=self._shm.buf)[...] = img
+
+            self._conn.send({
+                'cmd': 'infer',
+                'key': self._key,
+                'shm': self._shm.name,
+                'shape': img.shape,
+                'conf': float(confidence_threshold),
+            })
+            rep = self._conn.recv()
+            if not rep['ok']:
+                raise RuntimeError(f"서버 추론 실패: {rep['error']}")
+            buf = self._conn.recv_bytes()
+
+        return np.frombuffer(buf, dtype=np.float32).reshape(rep['n'], 6)
+
+    def close(self):
+        with self._lock:
+            try:
+                if self._shm is not None:
+                    self._release_shm()
+            finally:
+                self._conn.close()
+
+
+if __name__ == "__main__":
+    server = InferenceServer()
+    for path in PRELOAD_WEIGHTS:
+        try:
+            server.get_model(path)
+        except Exception as e:
+            print(f'[Warning] preload 실패: {path} | {e}')
+    server.serve_forever()
@@ -0,0 +1,129 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class LatencyTrace:
+    """
+    프레임 1장이 파이프라인을 지나가며 남기는 시각 기록.
+    시작 시각은 카메라 sink/grab 시점(Frame.timestamp, time.time() 기준)이라 프로세스가 달라도 비교 가능.
+    """
+
+    __slots__ = ("capture_ts", "stamps")
+
+    def __init__(self, capture_ts):
+        self.capture_ts = float(capture_ts)
+        self.stamps = []    # [(stage, time.time())]
+
+    def mark(self, stage):
+        self.stamps.append((stage, time.time()))
+
+    def age(self):
+        """지금 기준 촬영 후 경과 시간 [s]."""
+        return time.time() - self.capture_ts
+
+
+class LatencyMonitor:
+    """
+    단계별 지연 시간(직전 단계 -> 이 단계)을 최근 window 개씩 보관하고 통계/히스토그램 제공.
+      - 'total'   : 촬영 -> 마지막 단계 (인식 결과가 로봇 쪽에 넘어가기까지)
+      - observe() : 파이프라인 밖에서 잰 값 (예: 로봇 루프가 결과를 읽었을 때의 나이)
+
+    Usage:
+        latency = LatencyMonitor(report_every=300)
+        trace = latency.start(frame.timestamp)
+        img = und.undistort(frame.img); trace.mark('undistort')
+        results = model.infer(img);     trace.mark('infer')
+        ...
+        latency.finish(trace)                             # report_every 프레임마다 print_stats()
+
+        latency.observe('robot_read', time.time() - result['capture_ts'])
+    """
+
+    HIST_EDGES_MS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self, window=500, report_every=None):
+        self.window = int(window)
+        self.report_every = report_every
+        self._lock = threading.Lock()
+        self._samples = {}      # stage -> deque[s]
+        self._order = []        # 처음 관측된 순서 (출력용)
+        self.n_traces = 0
+
+    def start(self, capture_ts):
+        """파이프라인이 프레임을 받은 시점에 호출. 'receive' = 촬영 -> 수신 (전송/대기/sync 시간)."""
+        trace = LatencyTrace(capture_ts)
+        trace.mark('receive')
+        return trace
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._observe(stage, seconds)
+
+    def _observe(self, stage, seconds):
+        q = self._samples.get(stage)
+        if q is None:
+            q = deque(maxlen=self.window)
+            self._samples[stage] = q
+            self._order.append(stage)
+        q.append(float(seconds))
+
+    def finish(self, trace):
+        prev = trace.capture_ts
+        with self._lock:
+            for stage, ts in trace.stamps:
+                self._observe(stage, ts - prev)
+                prev = ts
+            if trace.stamps:
+                self._observe('total', trace.stamps[-1][1] - trace.capture_ts)
+            self.n_traces += 1
+            due = self.report_every and self.n_traces % self.report_every == 0
+        if due:
+            self.print_stats()
+
+    def stats(self):
+        """{stage: {n, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        out = {}
+        with self._lock:
+            items = [(s, np.array(self._samples[s], dtype=np.float64) * 1000) for s in self._order]
+        for stage, a in items:
+            if len(a) == 0:
+                continue
+            out[stage] = {
+                'n': int(len(a)),
+                'mean_ms': float(a.mean()),
+                'p50_ms': float(np.percentile(a, 50)),
+                'p95_ms': float(np.percentile(a, 95)),
+                'p99_ms': float(np.percentile(a, 99)),
+                'max_ms': float(a.max()),
+            }
+        return out
+
+    def histogram(self, stage, edges_ms=None):
+        """stage 의 구간별 개수 -> [(label, count)]  예: ('<5ms', 12), ..., ('>=1000ms', 0)"""
+        edges = list(edges_ms or self.HIST_EDGES_MS)
+        with self._lock:
+            a = np.array(self._samples.get(stage, ()), dtype=np.float64) * 1000
+        counts = np.histogram(a, bins=[-np.inf] + edges + [np.inf])[0]
+        labels = [f'<{edges[0]}ms'] + [f'{lo}-{hi}ms' for lo, hi in zip(edges[:-1], edges[1:])] + [f'>={edges[-1]}ms']
+        return list(zip(labels, counts.tolist()))
+
+    def print_stats(self, hist_stage='total'):
+        s = self.stats()
+        if not s:
+            return
+        print(f"[Latency] last {self.window} frames (ms)")
+        for stage, v in s.items():
+            print(f"  {stage:<12} mean {v['mean_ms']:7.1f} | p50 {v['p50_ms']:7.1f} | "
+                  f"p95 {v['p95_ms']:7.1f} | p99 {v['p99_ms']:7.1f} | max {v['max_ms']:7.1f}")
+        if hist_stage in s:
+            hist = ' '.join(f'{label}:{n}' for label, n in self.histogram(hist_stage) if n)
+            print(f"  {hist_stage} hist  {hist}")
+
+
+def detection_age(result):
+    """인식 결과(dict)의 촬영 후 경과 시간 [s]. capture_ts 가 없으면 None."""
+    ts = result.get('capture_ts')
+    return None if ts is None else time.time() - ts
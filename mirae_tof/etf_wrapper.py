@@ -1,77 +1,323 @@
 import os
 import time
+import bisect
 import threading
 import cv2
 
+from frame_source import Frame, FrameSource
 
-class FolderCapture:
+
+def _frame_key(fn):
+    """
+    정렬 키. '10.png' 가 '9.png' 뒤에 오도록 숫자 파일명은 숫자로 비교.
+    숫자가 아닌 파일명은 None (프레임이 아님 → 인덱스에 안 넣음, 안 그러면 항상 '최신' 으로 남음).
+    """
+    stem = os.path.splitext(fn)[0]
+    if stem.isdigit():
+        return (int(stem), fn)
+    return None
+
+
+def _is_complete(path):
+    """
+    쓰기가 끝난 파일인지 대략 확인 (PNG: IEND chunk, JPEG: EOI marker).
+    다른 포맷은 크기 > 0 이면 완료로 봄.
+    """
+    try:
+        size = os.path.getsize(path)
+        if size == 0:
+            return False
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in (".png", ".jpg", ".jpeg"):
+            return True
+        with open(path, 'rb') as f:
+            f.seek(max(0, size - 12))
+            tail = f.read()
+        if ext == ".png":
+            return b'IEND' in tail
+        return tail.endswith(b'\xff\xd9')
+    except OSError:
+        return False
+
+
+class FolderCapture(FrameSource):
     """
     File-based capture that mimics OpenCV VideoCapture.read() style.
 
+    - 폴더 변경 감시(watchdog 설치 시 inotify/ReadDirectoryChangesW, 없으면 가벼운 scandir polling)로
+      새 파일이 들어올 때마다 숫자 순 인덱스를 갱신 (read() 마다 listdir + sort 하지 않음)
+    - read(timeout)은 "새로 완성된 파일"이 생길 때까지 block (빈 루프로 CPU를 태우지 않음)
+    - 오래된 파일 삭제는 상주 janitor 스레드 1개가 담당
+    - save_img.py 가 재시작해서 번호가 1부터 다시 시작하면 (마지막 반환 프레임보다 작은 번호 + 더 새로운 mtime)
+      writer 재시작으로 보고 이전 실행의 파일을 인덱스에서 빼서 janitor가 먼저 지우게 함 (n_restarts)
+
     Usage:
         cap = FolderCapture(save_dir="./save", keep_last=3, exts=(".jpg", ".png"))
-        ret, img = cap.capture()  # ret=True/False, img=BGR ndarray or None
+        ret, img = cap.read()             # 새 프레임까지 최대 0.5초 대기
+        ret, img = cap.read(timeout=0)    # 대기 없이 확인만
+        frame = cap.read_frame()          # Frame(img, timestamp=파일 mtime, seq=파일 번호)
     """
 
-    def __init__(self, save_dir='mirae_tof/save', keep_last=3, exts=(".jpg", ".jpeg", ".png", ".bmp"), clear_on_start=True):
-        print(os.listdir(save_dir))
+    name = "tof_folder"
+
+    def __init__(self, save_dir='mirae_tof/save', keep_last=3, exts=(".jpg", ".jpeg", ".png", ".bmp"),
+                 clear_on_start=True, poll_interval=0.02):
         self.save_dir = os.path.abspath(save_dir)
         self.keep_last = int(keep_last)
         self.exts = tuple(e.lower() for e in exts)
-        self._lock = threading.Lock()
+        self.poll_interval = float(poll_interval)
 
         os.makedirs(self.save_dir, exist_ok=True)
 
+        self._cond = threading.Condition()
+        self._index = []          # 정렬된 _frame_key 리스트
+        self._known = set()       # 인덱스에 들어간 파일명
+        self._last_key = None     # 마지막으로 read()가 반환한 파일 키
+        self._last_ts = None      # 마지막으로 read()가 반환한 파일 mtime (writer 재시작 판단용)
+        self._stale = {}          # 이전 writer 실행의 파일 {fn: 재시작 감지 시각(새 파일 mtime)} → janitor가 먼저 삭제
+        self.n_restarts = 0
+        self._reading = None      # read()가 디코딩 중인 파일 키 (janitor가 지우지 않도록)
+        self._stop = threading.Event()
+        self._n_read = 0
+
         if clear_on_start:
             self.clear()
+        self._scan()
+
+        self._observer = self._start_watchdog()
+        if self._observer is None:
+            threading.Thread(target=self._poll_loop, name="FolderCapture-poll", daemon=True).start()
+        threading.Thread(target=self._janitor_loop, name="FolderCapture-janitor", daemon=True).start()
+
+    # ---------------- index ----------------
+    def _add(self, fn):
+        if not fn.lower().endswith(self.exts):
+            return
+        key = _frame_key(fn)
+        if key is None:
+            return
+        with self._cond:
+            if fn in self._known:
+                return
+            self._known.add(fn)
+            if self._is_restart(key):
+                self._restart()
+            bisect.insort(self._index, key)
+            self._cond.notify_all()
+
+    def _is_restart(self, key):
+        """마지막 반환 프레임보다 번호가 작은데 mtime 은 더 새로움 → writer 재시작 (_cond 안에서 호출)."""
+        if self._last_key is None or key[0] >= self._last_key[0]:
+            return False
+        try:
+            return os.path.getmtime(os.path.join(self.save_dir, key[1])) > self._last_ts
+        except OSError:
+            return False
+
+    def _restart(self):
+        # 지금 인덱스에 있는 건 전부 이전 실행의 파일 (새 실행의 첫 파일이 들어오는 시점이므로)
+        t = time.time()
+        for old in self._index:
+            self._stale[old[1]] = t
+        self._index = []
+        self._last_key = None
+        self._last_ts = None
+        self.n_restarts += 1
+        print(f"[FolderCapture] writer restart detected ({self.n_restarts}), dropping {len(self._stale)} stale files")
+
+    def _discard(self, fn):
+        with self._cond:
+            if fn not in self._known:
+                return
+            self._known.discard(fn)
+            self._stale.pop(fn, None)
+            key = _frame_key(fn)
+            i = bisect.bisect_left(self._index, key)
+            if i < len(self._index) and self._index[i] == key:
+                del self._index[i]
+
+    def _scan(self):
+        """폴더 전체를 훑어서 인덱스 동기화 (시작 시 / polling 모드)."""
+        present = set()
+        try:
+            with os.scandir(self.save_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(self.exts):
+                        present.add(entry.name)
+        except FileNotFoundError:
+            return
+
+        for fn in present - self._known:
+            self._add(fn)
+        for fn in self._known - present:
+            self._discard(fn)
 
     def _list_imgs_sorted(self):
-        # 파일명 기준 정렬(시간순 파일명일 때 유리). 필요하면 mtime 정렬로 바꿀 수 있음.
-        files = []
-        for fn in os.listdir(self.save_dir):
-            if fn.lower().endswith(self.exts):
-                files.append(fn)
-        files.sort()
-        return files
+        with self._cond:
+            return [k[1] for k in self._index]
+
+    # ---------------- watchers ----------------
+    def _start_watchdog(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        cap = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    cap._add(os.path.basename(event.src_path))
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    cap._discard(os.path.basename(event.src_path))
+                    cap._add(os.path.basename(event.dest_path))
 
+            def on_deleted(self, event):
+                if not event.is_directory:
+                    cap._discard(os.path.basename(event.src_path))
+
+            def on_closed(self, event):
+                # Linux(inotify)에서만 발생: 쓰기 완료 시점에 read() 깨우기
+                with cap._cond:
+                    cap._cond.notify_all()
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.save_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _poll_loop(self):
+        # watchdog이 없을 때의 대체 경로. janitor가 폴더를 작게 유지하므로 scandir 비용은 작음
+        while not self._stop.wait(self.poll_interval):
+            self._scan()
+
+    # ---------------- cleanup ----------------
     def clear(self):
         """Start clean: delete everything in save_dir (image exts only)."""
-        with self._lock:
-            for fn in self._list_imgs_sorted():
-                try:
-                    os.remove(os.path.join(self.save_dir, fn))
-                except Exception as e:
-                    print(f"[Warning] clear() remove failed: {fn} | {e}")
+        for fn in os.listdir(self.save_dir):
+            if not fn.lower().endswith(self.exts):
+                continue
+            try:
+                os.remove(os.path.join(self.save_dir, fn))
+            except Exception as e:
+                print(f"[Warning] clear() remove failed: {fn} | {e}")
+            self._discard(fn)
 
-    def _del_old_imgs(self):
-        """Keep only last N images."""
-        with self._lock:
-            files = self._list_imgs_sorted()
-            if len(files) <= self.keep_last:
-                return
-            for fn in files[:-self.keep_last]:
+    def _janitor_loop(self):
+        """Keep only last N images. 새 파일이 들어올 때만 깨어남. 삭제 실패 시 간격을 늘려 가며 재시도."""
+        backoff = 0.0
+        while not self._stop.is_set():
+            with self._cond:
+                while len(self._index) <= self.keep_last and not self._stale and not self._stop.is_set():
+                    self._cond.wait(1.0)
+                # 이전 writer 실행의 파일 먼저, 그다음 현재 실행의 오래된 파일
+                victims = [_frame_key(fn) for fn in self._stale]
+                victims += [k for k in self._index[:-self.keep_last] if k != self._reading]
+
+            failed = False
+            for key in victims:
+                fn = key[1]
+                if self._revive(fn):
+                    continue
                 try:
                     os.remove(os.path.join(self.save_dir, fn))
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
-                    print(f"[Warning] _del_old_imgs() remove failed: {fn} | {e}")
+                    if backoff == 0.0:
+                        print(f"[Warning] janitor remove failed: {fn} | {e}")
+                    failed = True
+                    continue
+                self._discard(fn)
 
-    def read(self):
-        files = self._list_imgs_sorted()
-        if not files:
-            return False, None
+            if failed:
+                # 다른 프로세스가 잡고 있는 등: 인덱스가 keep_last 를 넘은 채로 바로 다시 돌지 않도록 쉬었다가 재시도
+                backoff = min(5.0, max(self.poll_interval, backoff * 2))
+                self._stop.wait(backoff)
+                continue
+            backoff = 0.0
+            if not victims:
+                # 삭제할 수 없는 상태(읽는 중)면 잠깐 쉬었다가 재시도
+                self._stop.wait(self.poll_interval)
 
-        img_path = os.path.join(self.save_dir, files[-1])
+    def _revive(self, fn):
+        """stale 파일을 새 writer 실행이 같은 이름으로 덮어썼으면 지우지 않고 인덱스로 되돌림."""
+        with self._cond:
+            t = self._stale.get(fn)
+            if t is None:
+                return False
+            try:
+                if os.path.getmtime(os.path.join(self.save_dir, fn)) < t:
+                    return False
+            except OSError:
+                return False
+            del self._stale[fn]
+            bisect.insort(self._index, _frame_key(fn))
+            self._cond.notify_all()
+            return True
 
-        try:
-            img = cv2.imread(img_path)
-        except Exception:
+    # ---------------- read ----------------
+    def read(self, timeout=0.5):
+        """
+        마지막 read() 이후 새로 완성된 가장 최신 이미지를 반환 -> (ret, img)
+        timeout 초 안에 새 파일이 없으면 (False, None). timeout=None 이면 무한 대기.
+        """
+        frame = self.read_frame(timeout=timeout)
+        if frame is None:
             return False, None
+        return True, frame.img
 
-        if img is None:
-            # 파일이 아직 쓰이는 중일 가능성
-            time.sleep(0.02)
-            return False, None
+    def read_frame(self, timeout=0.5):
+        """read() 와 같지만 Frame(img, timestamp=파일 mtime, seq=파일 번호) 반환, 없으면 None."""
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+
+        while True:
+            with self._cond:
+                key = self._index[-1] if self._index else None
+                is_new = key is not None and (self._last_key is None or key > self._last_key)
+                if is_new:
+                    self._reading = key
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                    continue
+
+            img_path = os.path.join(self.save_dir, key[1])
+            img = None
+            ts = None
+            if _is_complete(img_path):
+                try:
+                    ts = os.path.getmtime(img_path)
+                    img = cv2.imread(img_path)
+                except Exception:
+                    img = None
+
+            with self._cond:
+                self._reading = None
+                if img is not None and key in self._index:
+                    self._last_key = key
+                    self._last_ts = ts
+                    self._n_read += 1
+                    return Frame(img, ts, key[0], self.name)
 
-        threading.Thread(target=self._del_old_imgs, daemon=True).start()
+                # 파일이 아직 쓰이는 중 -> 다음 이벤트(또는 잠깐 뒤)에 재시도
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                wait = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+                self._cond.wait(wait)
 
-        return True, img
\ No newline at end of file
+    def release(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
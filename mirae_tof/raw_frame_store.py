@@ -0,0 +1,176 @@
+import os
+import mmap
+import time
+
+import numpy as np
+import cv2
+
+from frame_source import Frame, FrameSource
+from mirae_tof.shm_ring import FrameRing, ring_nbytes, init_ring_header
+
+
+# 기본 저장 위치 (save_raw.py 가 생성)
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'save', 'amplitude_u16.ring')
+DEFAULT_DEPTH_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'save', 'depth_u16.ring')
+
+
+# CubeEye SDK(cu.convert2gray)를 import 할 수 없을 때 쓰는 고정 스케일 기준값 (12-bit amplitude)
+SDK_GRAY_MAX_VALUE = 4095
+
+_sdk_convert2gray = None    # None: 아직 확인 전, False: SDK 없음
+
+
+def _convert2gray_sdk():
+    global _sdk_convert2gray
+    if _sdk_convert2gray is None:
+        try:
+            import CubeEye as cu
+            _sdk_convert2gray = cu.convert2gray
+        except Exception:
+            _sdk_convert2gray = False
+    return _sdk_convert2gray
+
+
+def to_u8(frame, max_value="sdk", out=None):
+    """
+    uint16 raw 프레임 -> 8-bit (표시/8-bit 모델 입력용). 필요할 때만 호출.
+    max_value:
+      "sdk" (기본): IR 모델 학습 이미지(save_img.py)와 같은 SDK 고정 변환 cu.convert2gray
+                    (SDK 가 없으면 SDK_GRAY_MAX_VALUE 고정 스케일) → 프레임마다 밝기가 바뀌지 않음
+      숫자: 이 값이 255가 되도록 선형 스케일
+      None: 프레임 최대값 기준 (표시용, 프레임마다 밝기 달라짐)
+    out: 재사용할 uint8 버퍼
+    """
+    if frame.dtype == np.uint8:
+        return frame
+    if isinstance(max_value, str):
+        convert2gray = _convert2gray_sdk()
+        if convert2gray:
+            if out is None:
+                out = np.empty(frame.shape[:2], dtype=np.uint8)
+            convert2gray(np.ascontiguousarray(frame).reshape(-1), out)
+            return out
+        max_value = SDK_GRAY_MAX_VALUE
+    if max_value is None:
+        max_value = int(frame.max())
+    alpha = 255.0 / max(1, int(max_value))
+    if out is None:
+        return cv2.convertScaleAbs(frame, alpha=alpha)
+    return cv2.convertScaleAbs(frame, dst=out, alpha=alpha)
+
+
+class RawFrameStore(FrameRing):
+    """
+    raw 프레임(uint16 amplitude/depth)을 미리 할당한 memory-mapped 링 파일에 저장.
+    헤더/슬롯 레이아웃은 ShmFrameRing과 같은 FrameRing 형식이라 읽는 쪽 코드가 동일함.
+
+    - PNG 압축 없음, 8-bit 변환 없음 → 프레임당 CPU 감소 + 전체 dynamic range 유지
+    - 파일이라 캡처 프로세스가 죽어도 마지막 N프레임이 남고, 다른 프로세스가 언제든 열 수 있음
+
+    Usage:
+        # writer
+        store = RawFrameStore.create('mirae_tof/save/amplitude_u16.ring', shape=(240, 320), slots=16)
+        store.write(u16_frame, timestamp)
+
+        # reader (zero-copy view)
+        store = RawFrameStore.open('mirae_tof/save/amplitude_u16.ring')
+        seq, ts, u16 = store.latest()
+        u8 = to_u8(u16)
+    """
+
+    def __init__(self, path, f, mm, owner):
+        self.path = path
+        self._file = f
+        self._mm = mm
+        self.owner = owner
+        super().__init__(memoryview(mm), name=path)
+
+    @classmethod
+    def create(cls, path, shape, dtype=np.uint16, slots=16):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        size = ring_nbytes(shape, dtype, slots)
+
+        # 파일 크기를 먼저 확보(preallocate)해두고 mmap
+        f = open(path, 'w+b')
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_WRITE)
+        init_ring_header(memoryview(mm), shape, dtype, slots)
+
+        return cls(path, f, mm, owner=True)
+
+    @classmethod
+    def open(cls, path=DEFAULT_STORE_PATH, timeout=10.0, poll=0.1):
+        """path 링 파일이 생길 때까지(timeout 초, None 이면 무한) 기다렸다가 읽기 전용으로 open. 없으면 FileNotFoundError."""
+        t0 = time.time()
+        while not os.path.exists(path) or os.path.getsize(path) == 0:
+            if timeout is not None and time.time() - t0 > timeout:
+                raise FileNotFoundError(path)
+            time.sleep(poll)
+
+        f = open(path, 'rb')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, f, mm, owner=False)
+
+    def flush(self):
+        if self.owner:
+            self._mm.flush()
+
+    def close(self):
+        self._release_views()
+        self._mm.close()
+        self._file.close()
+
+
+class RawFrameCapture(FrameSource):
+    """
+    RawFrameStore를 FolderCapture / cv2.VideoCapture 처럼 read()로 쓰는 래퍼.
+    8-bit BGR이 필요한 기존 YOLO 경로용으로 변환은 여기서(읽을 때) 수행, raw가 필요하면 read_raw().
+
+    Usage:
+        cap = RawFrameCapture()
+        ret, img = cap.read()         # BGR uint8
+        ret, u16 = cap.read_raw()     # uint16 원본 (copy)
+        frame = cap.read_frame()      # Frame(BGR uint8, timestamp, seq)
+    """
+
+    name = "tof_raw"
+
+    def __init__(self, path=DEFAULT_STORE_PATH, max_value="sdk", timeout=10.0, poll=0.002):
+        self.store = RawFrameStore.open(path, timeout=timeout)
+        self.max_value = max_value
+        self.poll = poll
+        self.last_seq = 0
+        self.last_timestamp = None
+        self._u8 = None
+
+    def _wait_new(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        while True:
+            if self.store.write_seq > self.last_seq:
+                item = self.store.latest(copy=True)
+                if item is not None:
+                    self.last_seq, self.last_timestamp, _ = item
+                    return item
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll)
+
+    def read_raw(self, timeout=0.5):
+        item = self._wait_new(timeout)
+        if item is None:
+            return False, None
+        return True, item[2]
+
+    def read_frame(self, timeout=0.5):
+        item = self._wait_new(timeout)
+        if item is None:
+            return None
+
+        seq, ts, frame = item
+        if self._u8 is None or self._u8.shape != frame.shape[:2]:
+            self._u8 = np.empty(frame.shape[:2], dtype=np.uint8)
+        u8 = to_u8(frame, self.max_value, out=self._u8)
+        return Frame(cv2.cvtColor(u8, cv2.COLOR_GRAY2BGR), ts, seq, self.name)
+
+    def release(self):
+        self.store.close()
@@ -1,4 +1,5 @@
 import sys
+import time
 import queue
 import ctypes
 from pathlib import Path
@@ -27,9 +28,19 @@ def put_latest(q, item):
 
 
 class AmplitudeSink(cu.Sink):
-    def __init__(self):
+    def __init__(self, on_frame=None, raw=False, on_depth=None):
         cu.Sink.__init__(self)  # SWIG 바인딩에서 super()보다 안전한 경우가 있어 명시
 
+        # on_frame(amp, timestamp): 지정하면 큐 대신 SDK 콜백 스레드에서 바로 호출
+        self.on_frame = on_frame
+
+        # raw=True: 8-bit 변환 없이 uint16 (h, w) view를 on_frame에 넘김
+        #   (SDK 버퍼 view라 콜백 안에서 복사/기록을 끝내야 함)
+        self.raw = raw
+
+        # on_depth(depth_u16, timestamp): 지정하면 Depth 프레임도 받음 (uint16 view, 단위 mm)
+        self.on_depth = on_depth
+
     def name(self):
         return "AmplitudeOnlySink"
 
@@ -48,6 +59,9 @@ class AmplitudeSink(cu.Sink):
         if frames is None:
             return
 
+        # 같은 frame list 안의 amplitude/depth는 같은 timestamp (나중에 timestamp로 짝 맞춤)
+        ts = time.time()
+
         for frame in frames:
             if not frame.isBasicFrame():
                 continue
@@ -56,8 +70,10 @@ class AmplitudeSink(cu.Sink):
 
             f16 = cu.frame_cast_basic16u(frame)
 
-            # Amplitude만
-            if f16.frameType() != cu.FrameType_Amplitude:
+            # Amplitude (+ on_depth 지정 시 Depth)만
+            frame_type = f16.frameType()
+            is_depth = frame_type == cu.FrameType_Depth and self.on_depth is not None
+            if frame_type != cu.FrameType_Amplitude and not is_depth:
                 continue
 
             h, w = frame.height(), frame.width()
@@ -67,10 +83,22 @@ class AmplitudeSink(cu.Sink):
             ptr = ptr_t.from_address(int(f16.dataPtr()))
             u16_1d = np.ctypeslib.as_array(ptr)
 
+            if is_depth:
+                self.on_depth(u16_1d[:h * w].reshape(h, w), ts)
+                continue
+
+            if self.raw and self.on_frame is not None:
+                self.on_frame(u16_1d[:h * w].reshape(h, w), ts)
+                continue
+
             # PNG 저장용 8-bit 변환 (SDK 함수 사용)
             amp_u8 = np.zeros((h, w), dtype=np.uint8)
             cu.convert2gray(u16_1d, amp_u8)
 
+            if self.on_frame is not None:
+                self.on_frame(amp_u8, ts)
+                continue
+
             put_latest(amplitude_queue, amp_u8)
 
 
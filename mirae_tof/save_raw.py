@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+
+import numpy as np
+import cv2
+import CubeEye as cu
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from mirae_tof.save_img import AmplitudeSink
+from mirae_tof.shm_capture import AmplitudeRingWriter
+from mirae_tof.raw_frame_store import RawFrameStore, DEFAULT_STORE_PATH, DEFAULT_DEPTH_STORE_PATH, to_u8
+
+
+# ===== 하드코딩 설정 =====
+STORE_PATH = DEFAULT_STORE_PATH
+STORE_SLOTS = 16
+SAVE_DEPTH = True   # depth(uint16, mm)도 같은 형식 링 파일로 기록 (3D pick point용)
+DEPTH_STORE_PATH = DEFAULT_DEPTH_STORE_PATH
+SHOW_PREVIEW = True
+
+
+def main():
+    print("=== CubeEye Amplitude (uint16 raw) -> Memory-mapped Ring File ===")
+
+    # convert2gray / PNG 압축 없이 uint16 그대로 기록
+    writer = AmplitudeRingWriter(lambda shape, dtype: RawFrameStore.create(STORE_PATH, shape, np.uint16, STORE_SLOTS))
+
+    # 카메라 검색
+    sources = cu.search_camera_source()
+    if sources is None or sources.size() == 0:
+        print("CubeEye camera not found")
+        sys.exit(1)
+
+    # 첫 번째 카메라 사용
+    camera = cu.create_camera(sources[0])
+    if camera is None:
+        print("Failed to create camera")
+        sys.exit(1)
+
+    # Sink 등록 (raw uint16 view를 링 파일에 바로 기록)
+    depth_writer = None
+    if SAVE_DEPTH:
+        depth_writer = AmplitudeRingWriter(lambda shape, dtype: RawFrameStore.create(DEPTH_STORE_PATH, shape, np.uint16, STORE_SLOTS))
+
+    sink = AmplitudeSink(on_frame=writer.on_frame, raw=True,
+                         on_depth=depth_writer.on_frame if depth_writer is not None else None)
+    camera.addSink(sink)
+
+    if camera.prepare() != cu.Result_Success:
+        print("Camera prepare failed")
+        cu.destroy_camera(camera)
+        sys.exit(1)
+
+    if camera.run(6) != cu.Result_Success:
+        print("Camera run failed")
+        cu.destroy_camera(camera)
+        sys.exit(1)
+
+    print(f"[INFO] Writing raw amplitude frames to: {STORE_PATH}")
+    print("[INFO] Press ESC (preview) or Ctrl+C to stop")
+
+    try:
+        writer.ready.wait()
+        if SHOW_PREVIEW:
+            cv2.namedWindow("Amplitude (raw u16 -> u8)", cv2.WINDOW_NORMAL)
+        while True:
+            if not SHOW_PREVIEW:
+                time.sleep(1.0)
+                print(f"[INFO] write_seq: {writer.ring.write_seq}")
+                continue
+
+            # 8-bit 변환은 표시할 때만
+            item = writer.ring.latest(copy=True)
+            if item is not None:
+                cv2.imshow("Amplitude (raw u16 -> u8)", to_u8(item[2]))
+            if cv2.waitKey(30) == 27:  # ESC
+                break
+
+    except KeyboardInterrupt:
+        pass
+
+    camera.stop()
+    cu.destroy_camera(camera)
+    writer.close()
+    if depth_writer is not None:
+        depth_writer.close()
+    cv2.destroyAllWindows()
+    print("Exit")
+
+
+if __name__ == "__main__":
+    main()
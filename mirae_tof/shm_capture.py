@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import threading
+
+import numpy as np
+import cv2
+import CubeEye as cu
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from mirae_tof.save_img import AmplitudeSink
+from mirae_tof.shm_ring import ShmFrameRing, DEFAULT_RING_NAME
+from mirae_tof.raw_frame_store import RawFrameStore, DEFAULT_DEPTH_STORE_PATH
+
+
+# ===== 하드코딩 설정 =====
+RING_NAME = DEFAULT_RING_NAME
+RING_SLOTS = 8
+SHOW_PREVIEW = True
+SAVE_DEPTH = True   # depth(uint16, mm)는 memory-mapped 링 파일로 기록 (3D pick point용)
+DEPTH_STORE_PATH = DEFAULT_DEPTH_STORE_PATH
+DEPTH_STORE_SLOTS = 16
+
+
+class AmplitudeRingWriter:
+    """
+    AmplitudeSink 콜백에서 받은 amplitude를 180도 회전해서 FrameRing 슬롯에 바로 씀.
+    (save_img.py 의 PNG 저장 → FolderCapture 의 PNG 읽기 경로를 대체)
+    프레임 크기는 첫 프레임을 받아봐야 알 수 있어서 링은 첫 프레임에서 create_ring(shape, dtype)으로 생성.
+    """
+
+    def __init__(self, create_ring):
+        self.create_ring = create_ring
+        self.ring = None
+        self.ready = threading.Event()
+
+    def on_frame(self, amp, timestamp):
+        if self.ring is None:
+            self.ring = self.create_ring(amp.shape, amp.dtype)
+            print(f"[INFO] frame ring 생성: {self.ring.name} {amp.shape} {amp.dtype} x {self.ring.slots}")
+            self.ready.set()
+
+        # 180도 회전 (cv2.rotate(ROTATE_180)과 동일) 을 슬롯에 바로 복사
+        np.copyto(self.ring.begin_write(), amp[::-1, ::-1])
+        self.ring.end_write(timestamp)
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+def main():
+    print("=== CubeEye Amplitude -> Shared Memory Ring ===")
+
+    writer = AmplitudeRingWriter(lambda shape, dtype: ShmFrameRing.create(RING_NAME, shape, np.uint8, RING_SLOTS))
+
+    # 카메라 검색
+    sources = cu.search_camera_source()
+    if sources is None or sources.size() == 0:
+        print("CubeEye camera not found")
+        sys.exit(1)
+
+    # 첫 번째 카메라 사용
+    camera = cu.create_camera(sources[0])
+    if camera is None:
+        print("Failed to create camera")
+        sys.exit(1)
+
+    depth_writer = None
+    if SAVE_DEPTH:
+        depth_writer = AmplitudeRingWriter(lambda shape, dtype: RawFrameStore.create(DEPTH_STORE_PATH, shape, np.uint16, DEPTH_STORE_SLOTS))
+
+    # Sink 등록 (큐 대신 링에 바로 기록)
+    sink = AmplitudeSink(on_frame=writer.on_frame,
+                         on_depth=depth_writer.on_frame if depth_writer is not None else None)
+    camera.addSink(sink)
+
+    if camera.prepare() != cu.Result_Success:
+        print("Camera prepare failed")
+        cu.destroy_camera(camera)
+        sys.exit(1)
+
+    if camera.run(6) != cu.Result_Success:
+        print("Camera run failed")
+        cu.destroy_camera(camera)
+        sys.exit(1)
+
+    print("[INFO] Press ESC (preview) or Ctrl+C to stop")
+
+    try:
+        writer.ready.wait()
+        if SHOW_PREVIEW:
+            cv2.namedWindow("Amplitude", cv2.WINDOW_NORMAL)
+        while True:
+            if not SHOW_PREVIEW:
+                time.sleep(1.0)
+                print(f"[INFO] write_seq: {writer.ring.write_seq}")
+                continue
+
+            item = writer.ring.latest(copy=True)
+            if item is not None:
+                cv2.imshow("Amplitude", item[2])
+            if cv2.waitKey(30) == 27:  # ESC
+                break
+
+    except KeyboardInterrupt:
+        pass
+
+    camera.stop()
+    cu.destroy_camera(camera)
+    writer.close()
+    if depth_writer is not None:
+        depth_writer.close()
+    cv2.destroyAllWindows()
+    print("Exit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import cv2
+
+from frame_source import Frame, FrameSource
+
+
+# 기본 링 이름 (CubeEye amplitude 캡처 프로세스가 생성)
+DEFAULT_RING_NAME = 'cubeeye_amp'
+
+_MAGIC = 0x52494E47  # 'RING'
+_VERSION = 1
+_HEADER_SIZE = 64
+_SLOT_HEADER_SIZE = 32
+_ALIGN = 64
+
+_DTYPES = {0: np.uint8, 1: np.uint16}
+_DTYPE_CODES = {np.dtype(v): k for k, v in _DTYPES.items()}
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def ring_nbytes(shape, dtype, slots):
+    """FrameRing 레이아웃 전체 크기(bytes)."""
+    frame_nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return _align(_HEADER_SIZE + _SLOT_HEADER_SIZE * slots) + _align(frame_nbytes) * slots
+
+
+def init_ring_header(buf, shape, dtype, slots, generation=0):
+    """빈 버퍼에 FrameRing 헤더 기록 + 슬롯 헤더 초기화. generation: writer 실행마다 다른 값 (reader 재연결 판단용)."""
+    dtype = np.dtype(dtype)
+    h, w = int(shape[0]), int(shape[1])
+    c = int(shape[2]) if len(shape) == 3 else 0
+
+    hdr = np.ndarray((8,), dtype=np.uint32, buffer=buf, offset=0)
+    hdr[:] = [_MAGIC, _VERSION, slots, h, w, c, _DTYPE_CODES[dtype], int(generation) & 0xFFFFFFFF]
+    np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=32)[0] = 0
+    np.ndarray((_SLOT_HEADER_SIZE * slots,), dtype=np.uint8, buffer=buf, offset=_HEADER_SIZE)[:] = 0
+
+
+class FrameRing:
+    """
+    고정 크기 프레임용 링 버퍼 (writer 1개, reader 여러 개/여러 프로세스).
+    저장 매체(shared memory / memory-mapped file)와 무관한 레이아웃/읽기/쓰기 로직.
+
+    메모리 레이아웃:
+        [global header 64B]  magic, version, slots, h, w, c, dtype, generation, write_seq
+        [slot header 32B x slots]  seq_begin, seq_end, timestamp
+        [frame data x slots]
+
+    writer는 slot에 seq_begin=seq → 데이터 → timestamp → seq_end=seq 순서로 씀.
+    reader는 seq_begin == seq_end 인 슬롯만 완성된 프레임으로 취급 (seqlock 방식, lock 없음).
+    """
+
+    def __init__(self, buf, name=''):
+        self.name = name
+
+        self._hdr_u4 = np.ndarray((8,), dtype=np.uint32, buffer=buf, offset=0)
+        self._write_seq = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=32)
+
+        if self._hdr_u4[0] != _MAGIC or self._hdr_u4[1] != _VERSION:
+            raise RuntimeError(f"'{name}' 는 FrameRing 형식이 아님")
+
+        self.slots = int(self._hdr_u4[2])
+        h, w, c = int(self._hdr_u4[3]), int(self._hdr_u4[4]), int(self._hdr_u4[5])
+        self.shape = (h, w) if c == 0 else (h, w, c)
+        self.dtype = np.dtype(_DTYPES[int(self._hdr_u4[6])])
+
+        self._slot_seq = np.ndarray((self.slots, 2), dtype=np.uint64, buffer=buf, offset=_HEADER_SIZE,
+                                    strides=(_SLOT_HEADER_SIZE, 8))
+        self._slot_ts = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=_HEADER_SIZE + 16,
+                                   strides=(_SLOT_HEADER_SIZE,))
+
+        frame_nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._frame_stride = _align(frame_nbytes)
+        data_offset = _align(_HEADER_SIZE + _SLOT_HEADER_SIZE * self.slots)
+        self._frames = [
+            np.ndarray(self.shape, dtype=self.dtype, buffer=buf, offset=data_offset + i * self._frame_stride)
+            for i in range(self.slots)
+        ]
+
+        self._writing = None
+
+    # ---------------- writer ----------------
+    def begin_write(self):
+        """다음 슬롯 view 반환. 채운 뒤 end_write() 호출."""
+        seq = int(self._write_seq[0]) + 1
+        idx = seq % self.slots
+        self._slot_seq[idx, 0] = seq      # seq_begin (쓰는 중 표시)
+        self._writing = (seq, idx)
+        return self._frames[idx]
+
+    def end_write(self, timestamp=None):
+        seq, idx = self._writing
+        self._slot_ts[idx] = time.time() if timestamp is None else float(timestamp)
+        self._slot_seq[idx, 1] = seq      # seq_end (완성 표시)
+        self._write_seq[0] = seq
+        self._writing = None
+        return seq
+
+    def write(self, frame, timestamp=None):
+        np.copyto(self.begin_write(), frame)
+        return self.end_write(timestamp)
+
+    # ---------------- reader ----------------
+    @property
+    def generation(self):
+        return int(self._hdr_u4[7])
+
+    @property
+    def write_seq(self):
+        return int(self._write_seq[0])
+
+    def get(self, seq, copy=False):
+        """
+        seq 프레임 반환 -> (timestamp, frame) / 이미 덮어써졌거나 쓰는 중이면 None.
+        copy=False면 zero-copy view (writer가 slots번 더 쓰면 덮어써짐).
+        """
+        if seq <= 0:
+            return None
+        idx = seq % self.slots
+        if int(self._slot_seq[idx, 1]) != seq or int(self._slot_seq[idx, 0]) != seq:
+            return None
+
+        ts = float(self._slot_ts[idx])
+        frame = self._frames[idx]
+        if copy:
+            frame = frame.copy()
+            # 복사 도중 writer가 덮어썼는지 재확인
+            if int(self._slot_seq[idx, 0]) != seq:
+                return None
+        return ts, frame
+
+    def latest(self, copy=False):
+        """가장 최근 완성 프레임 -> (seq, timestamp, frame) / 아직 없으면 None."""
+        seq = self.write_seq
+        item = self.get(seq, copy=copy)
+        if item is None:
+            return None
+        return seq, item[0], item[1]
+
+    def nearest(self, timestamp, copy=False, tolerance=None):
+        """
+        timestamp에 가장 가까운 완성 프레임 -> (seq, timestamp, frame) / 없으면 None.
+        (같은 frame list에서 나온 amplitude/depth처럼 다른 링의 프레임끼리 짝 맞출 때 사용)
+        """
+        best = None
+        for idx in range(self.slots):
+            seq = int(self._slot_seq[idx, 1])
+            if seq == 0 or int(self._slot_seq[idx, 0]) != seq:
+                continue
+            dt = abs(float(self._slot_ts[idx]) - float(timestamp))
+            if best is None or dt < best[0]:
+                best = (dt, seq)
+
+        if best is None or (tolerance is not None and best[0] > tolerance):
+            return None
+        item = self.get(best[1], copy=copy)
+        if item is None:
+            return None
+        return best[1], item[0], item[1]
+
+    def _release_views(self):
+        # 버퍼를 닫기 전에 numpy view를 모두 놓아야 함 (BufferError 방지)
+        self._frames = []
+        self._hdr_u4 = self._write_seq = self._slot_seq = self._slot_ts = None
+
+
+def _open_shm(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # reader가 종료될 때 resource_tracker가 링을 unlink 하지 않도록 등록 해제 (POSIX)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class ShmFrameRing(FrameRing):
+    """
+    multiprocessing.shared_memory 기반 FrameRing.
+
+    Usage:
+        # writer (캡처 프로세스)
+        ring = ShmFrameRing.create('cubeeye_amp', shape=(240, 320), dtype=np.uint8, slots=8)
+        slot = ring.begin_write()          # 슬롯 view에 직접 채우기 (복사 1회)
+        slot[...] = frame
+        ring.end_write()
+
+        # reader (아무 프로세스)
+        ring = ShmFrameRing.attach('cubeeye_amp')
+        seq, ts, view = ring.latest()      # zero-copy view
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        super().__init__(shm.buf, name=shm.name)
+
+    @classmethod
+    def create(cls, name, shape, dtype=np.uint8, slots=8):
+        size = ring_nbytes(shape, dtype, slots)
+
+        # 이전 실행에서 남은 같은 이름의 링이 있으면 정리
+        try:
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # writer 가 재시작해서 segment 를 새로 만들면 generation 이 바뀜 → reader 가 보고 다시 attach
+        init_ring_header(shm.buf, shape, dtype, slots, generation=int.from_bytes(os.urandom(4), 'little') or 1)
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_RING_NAME, timeout=None, poll=0.1):
+        """name 링이 생길 때까지(timeout 초) 기다렸다가 attach."""
+        t0 = time.time()
+        while True:
+            try:
+                shm = _open_shm(name)
+                break
+            except FileNotFoundError:
+                if timeout is not None and time.time() - t0 > timeout:
+                    raise
+                time.sleep(poll)
+        return cls(shm, owner=False)
+
+    def same_segment(self):
+        """
+        이 이름의 segment 가 지금도 내가 attach 한 것인지 (writer 재시작 확인).
+        -> True: 같음 / False: 다른 generation 으로 새로 만들어짐 / None: 지금은 없음 (writer 종료)
+        """
+        try:
+            shm = _open_shm(self.shm.name)
+        except FileNotFoundError:
+            return None
+        try:
+            gen = int(np.ndarray((8,), dtype=np.uint32, buffer=shm.buf, offset=0)[7])
+            return gen == self.generation and shm.size == self.shm.size
+        finally:
+            shm.close()
+
+    def close(self):
+        self._release_views()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShmCapture(FrameSource):
+    """
+    ShmFrameRing reader를 FolderCapture / cv2.VideoCapture 처럼 read()로 쓰는 래퍼.
+    PNG 인코딩/디코딩, 폴더 polling 없이 캡처 프로세스의 최신 프레임을 바로 가져옴.
+    새 프레임이 reattach_after 초 동안 없으면 writer 재시작(segment 새로 생성)을 확인해서 다시 attach.
+
+    Usage:
+        cap = ShmCapture()              # mirae_tof/shm_capture.py 가 실행 중이어야 함
+        ret, img = cap.read()           # img: BGR ndarray (YOLO 입력용)
+        frame = cap.read_frame()        # Frame(img, timestamp, seq)
+    """
+
+    name = "tof_shm"
+
+    def __init__(self, ring_name=DEFAULT_RING_NAME, to_bgr=True, timeout=None, poll=0.002, reattach_after=1.0):
+        self.ring_name = ring_name
+        self.ring = ShmFrameRing.attach(ring_name, timeout=timeout)
+        self.to_bgr = to_bgr
+        self.poll = poll
+        self.reattach_after = float(reattach_after)
+        self.last_seq = 0
+        self.last_timestamp = None
+        self.n_reattach = 0
+        self._last_new = time.monotonic()
+        self._next_check = 0.0
+
+    def _check_writer(self):
+        """writer 가 segment 를 새로 만들었으면 새 segment 로 다시 attach (없으면 기존 것 유지하고 나중에 재확인)."""
+        if self.ring.same_segment() is not False:
+            return
+        try:
+            ring = ShmFrameRing.attach(self.ring_name, timeout=0)
+        except FileNotFoundError:
+            return
+        old, self.ring = self.ring, ring
+        old.close()
+        self.last_seq = 0
+        self.n_reattach += 1
+        print(f"[ShmCapture] writer 재시작 감지 → '{self.ring_name}' 다시 attach (generation {ring.generation})")
+
+    def read_frame(self, timeout=0.5):
+        """
+        마지막으로 반환한 것보다 새 프레임 -> Frame / timeout 초 안에 없으면 None.
+        (writer가 다른 프로세스라 알림 대신 write_seq 를 짧은 주기로 확인)
+        """
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        while True:
+            write_seq = self.ring.write_seq
+            if write_seq > self.last_seq:
+                item = self.ring.latest(copy=True)
+                if item is not None:
+                    break
+            elif write_seq < self.last_seq:
+                self.last_seq = 0   # 같은 segment 를 writer 가 다시 초기화
+                continue
+            now = time.monotonic()
+            if now - self._last_new >= self.reattach_after and now >= self._next_check:
+                self._next_check = now + self.reattach_after
+                self._check_writer()
+                continue
+            if deadline is not None and now >= deadline:
+                return None
+            time.sleep(self.poll)
+
+        seq, ts, img = item
+        self.last_seq = seq
+        self._last_new = time.monotonic()
+        self.last_timestamp = ts
+
+        if self.to_bgr and img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        return Frame(img, ts, seq, self.name)
+
+    def release(self):
+        self.ring.close()
@@ -1,7 +1,8 @@
 import time
-from pymycobot import MyCobotSocket
 import threading
 
+import numpy as np
+
 
 class MyCobotController:
     """
@@ -12,15 +13,18 @@ class MyCobotController:
     - stop, home
     - move joints / move world coords
     - gripper open/close/value
+    - wait_motion_done (마지막 이동 명령 목표 도착 + 정지 확인 -> 정지 시각)
     - simple pick & place sequence helpers
     """
 
     def __init__(self, path_ip_and_host, default_speed=40):
-        # ip 정보 읽어오기
-        with open(path_ip_and_host, 'r', encoding='utf-8') as f:
-            f = f.read()
-            ip, port = f.split(', ')
-            print(f'IP주소: {ip}, 포트: {port}')
+        # ip 정보 읽어오기 (None: 시뮬레이터 등 connect(mc=...)로 직접 연결)
+        ip, port = None, 0
+        if path_ip_and_host is not None:
+            with open(path_ip_and_host, 'r', encoding='utf-8') as f:
+                f = f.read()
+                ip, port = f.split(', ')
+                print(f'IP주소: {ip}, 포트: {port}')
 
         self.ip = ip
         self.port = int(port)
@@ -47,13 +51,28 @@ class MyCobotController:
 
         self._gripper_lock = threading.Lock()
 
+        # 명령 기록 hook: on_command(event, **fields) (예: SessionRecorder.add_telemetry). None이면 기록 안 함
+        self.on_command = None
+
+        # 마지막 이동 명령 ('coords' | 'angles', 목표값) / 마지막으로 정지 확인한 시각
+        self._last_move = None
+        self.motion_done_ts = None
+        # 도착 판정 없이 정지만으로 끝낸 횟수 (Z 쳐짐 등으로 목표 tol 안에 못 들어온 경우)
+        self.n_settle_fallbacks = 0
+
 
     # ---------------- connection ----------------
-    def connect(self):
+    def connect(self, mc=None):
+        """mc: MyCobotSocket 호환 객체를 직접 넘길 때 (예: hand_eye_calibration.SimulatedMyCobot)"""
         if self.connected:
             return True
 
-        self.mc = MyCobotSocket(self.ip, self.port)
+        if mc is None:
+            # pymycobot(+pyserial 등) import는 연결 시점까지 미룸
+            from pymycobot import MyCobotSocket
+            mc = MyCobotSocket(self.ip, self.port)
+
+        self.mc = mc
         self.connected = True
 
         # 연결 체크 (응답 없으면 -1)
@@ -82,6 +101,10 @@ class MyCobotController:
             self.mc = None
             self.connected = False
 
+    def _notify(self, event, **fields):
+        if self.on_command is not None:
+            self.on_command(event, **fields)
+
     def _require(self):
         if (not self.connected) or (self.mc is None):
             raise RuntimeError("Robot not connected. Call connect() first.")
@@ -136,6 +159,8 @@ class MyCobotController:
 
 
         self.mc.send_angles(angles_deg, int(speed))
+        self._last_move = ('angles', [float(a) for a in angles_deg])
+        self._notify('move_joints', angles=[float(a) for a in angles_deg], speed=int(speed))
         time.sleep(self.cmd_sleep)
 
     # def move_world(self, x, y, z, rx=None, ry=None, rz=None, speed=None, mode=None):
@@ -149,8 +174,70 @@ class MyCobotController:
 
         coords = [float(x), float(y), float(z), float(rx), float(ry), float(rz)]
         self.mc.send_coords(coords, int(speed), int(mode))
+        self._last_move = ('coords', coords)
+        self._notify('move_world', coords=coords, speed=int(speed), mode=int(mode))
         time.sleep(self.cmd_sleep)
 
+    @property
+    def last_move(self):
+        """마지막 이동 명령 ('coords' | 'angles', 목표값 list) | None"""
+        return self._last_move
+
+    def wait_motion_done(self, target=None, tol_mm=2.0, tol_deg=1.0, still_tol=0.5, timeout=10.0, poll=0.05,
+                         arrive_timeout=3.0, stall_s=0.5):
+        """
+        마지막 이동 명령(move_world / move_joints, 또는 target coords)의 목표에 도착하고
+        연속으로 읽은 위치 차이가 still_tol(mm 또는 deg) 이하가 될 때까지 대기.
+          - coords: xyz 거리 <= tol_mm + rx/ry/rz 차이(±180 wrap) <= tol_deg (rz 만 도는 이동도 끝까지 기다림)
+          - angles: joint 차이 <= tol_deg
+        arrive_timeout 초가 지나도 도착 판정이 안 되면 (Z 쳐짐 등으로 목표 tol 밖에서 멈춘 경우)
+        stall_s 초 동안 still_tol 이상 움직이지 않은 것만으로 정지 처리 (n_settle_fallbacks 증가 + 경고 출력).
+        return: 정지 확인 시각 (time.time() 기준 -> 이 시각 이후 찍힌 프레임은 팔이 멈춘 장면)
+        timeout 초 안에 정지도 안 하면 TimeoutError.
+        """
+        self._require()
+        kind, goal = ('coords', list(target)) if target is not None else (self._last_move or ('coords', None))
+        read = self.get_coords if kind == 'coords' else self.get_angles
+        goal = None if goal is None else np.asarray(goal[:6], np.float64)
+
+        def dist(a, b):
+            """(위치 mm, 각도 deg) 차이. angles 는 위치 0"""
+            if kind == 'angles':
+                return 0.0, float(np.max(np.abs(a - b)))
+            pos = float(np.linalg.norm(a[:3] - b[:3]))
+            if len(a) < 6 or len(b) < 6:
+                return pos, 0.0
+            return pos, float(np.max(np.abs((a[3:6] - b[3:6] + 180.0) % 360.0 - 180.0)))
+
+        def done(**fields):
+            self.motion_done_ts = time.time()
+            self._notify('motion_done', kind=kind, **fields)
+            return self.motion_done_ts
+
+        prev = None
+        anchor, anchor_t = None, 0.0   # 마지막으로 still_tol 이상 움직인 위치 / 시각
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        while time.monotonic() < deadline:
+            cur = read()
+            if isinstance(cur, (list, tuple)) and len(cur) >= (3 if kind == 'coords' else 6):
+                cur = np.asarray(cur[:6], np.float64)
+                now = time.monotonic()
+                d_mm, d_deg = (0.0, 0.0) if goal is None else dist(cur, goal)
+                arrived = d_mm <= tol_mm and d_deg <= tol_deg
+                if arrived and prev is not None and max(dist(cur, prev)) <= still_tol:
+                    return done()
+                if anchor is None or max(dist(cur, anchor)) > still_tol:
+                    anchor, anchor_t = cur, now
+                elif now - t0 >= arrive_timeout and now - anchor_t >= stall_s:
+                    self.n_settle_fallbacks += 1
+                    print(f'[Warning] 목표 밖에서 정지 ({kind} 오차 {d_mm:.1f}mm / {d_deg:.1f}deg), '
+                          f'정지 기준으로 진행 (누적 {self.n_settle_fallbacks}회)')
+                    return done(fallback=True, err_mm=round(d_mm, 2), err_deg=round(d_deg, 2))
+                prev = cur
+            time.sleep(poll)
+        raise TimeoutError(f"로봇이 정지하지 않음 ({kind} 목표: {None if goal is None else goal.tolist()})")
+
     # ---------------- gripper ----------------
     '''
     (generate.py 라는 코드 안에 안에 코드를 추가해놓음)
@@ -233,6 +320,7 @@ class MyCobotController:
                 time.sleep(0.1)
 
             print('완료' if ok else 'FAIL(씹힘)')
+            self._notify('gripper_open', ok=bool(ok))
             return ok
 
     def gripper_open_retry(self, speed=100):
@@ -259,6 +347,7 @@ class MyCobotController:
                 time.sleep(0.1)
 
             print('완료' if ok else 'FAIL(씹힘)')
+            self._notify('gripper_close', ok=bool(ok))
             return ok
 
     def gripper_close_retry(self, speed=100):
@@ -0,0 +1,115 @@
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from yolo_wrapper import draw_detections
+
+
+class OverlayRenderer:
+    """
+    시각화 전용 스레드.
+
+    perception(추론) 스레드는 submit()으로 최신 (이미지, 결과)만 넘기고 바로 다음 프레임으로 감.
+    렌더 스레드는 display_fps 주기로 "가장 최근 것"만 그려서 imshow → 시각화가 추론 속도를 잡아먹지 않음.
+    (렌더가 느리면 중간 프레임은 그냥 버려짐)
+
+    - 스트림별로 재사용 버퍼에 그림 (매 프레임 img.copy() 없음)
+    - scale < 1.0 이면 축소 해상도로 렌더링 (resize도 재사용 버퍼로)
+    - q / ESC 입력 시 quit 이벤트 set (perception 루프에서 확인해서 종료)
+
+    Usage:
+        renderer = OverlayRenderer('Vis Robot Object Detection', display_fps=30)
+        ...
+        renderer.submit(img, results)            # perception 스레드
+        if renderer.quit.is_set(): break
+
+    여러 스트림을 합성해서 보여줄 때는 compose(render) 콜백을 넘김.
+    render(key)는 해당 스트림을 (필요할 때만) 그려서 버퍼를 반환, 아직 프레임이 없으면 None.
+        renderer = OverlayRenderer(win, compose=lambda render: render('ir'))
+        renderer.submit(img_ir, results_ir, key='ir')
+    """
+
+    def __init__(self, window_name, display_fps=30, scale=1.0, compose=None):
+        self.window_name = window_name
+        self.period = 1.0 / float(display_fps)
+        self.scale = float(scale)
+        self.compose = compose
+
+        self.quit = threading.Event()
+
+        self._lock = threading.Lock()
+        self._pending = {}    # key -> (img, dets, seq)
+        self._seq = 0
+        self._rendered = {}   # key -> 마지막으로 그린 seq
+        self._buffers = {}    # key -> 재사용 출력 버퍼
+
+        self.n_submitted = 0
+        self.n_rendered = 0
+
+        threading.Thread(target=self.run, name="OverlayRenderer", daemon=True).start()
+
+    def submit(self, img, dets, key='default'):
+        """perception 스레드에서 호출. 복사/그리기 없이 참조만 교체하고 바로 반환."""
+        if img is None:
+            return
+        with self._lock:
+            self._seq += 1
+            self._pending[key] = (img, dets, self._seq)
+            self.n_submitted += 1
+
+    def _buffer(self, key, shape):
+        buf = self._buffers.get(key)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[key] = buf
+        return buf
+
+    def render(self, key='default'):
+        """key 스트림의 최신 프레임을 그려서 버퍼 반환 (변화 없으면 이전 버퍼 그대로)."""
+        with self._lock:
+            item = self._pending.get(key)
+        if item is None:
+            return None
+
+        img, dets, seq = item
+        if self._rendered.get(key) == seq:
+            return self._buffers[key]
+
+        if self.scale != 1.0:
+            h, w = img.shape[:2]
+            sw, sh = max(1, int(w * self.scale)), max(1, int(h * self.scale))
+            buf = self._buffer(key, (sh, sw) + img.shape[2:])
+            cv2.resize(img, (sw, sh), dst=buf, interpolation=cv2.INTER_AREA)
+            draw_detections(buf, dets, out=buf, scale=self.scale)
+        else:
+            buf = self._buffer(key, img.shape)
+            draw_detections(img, dets, out=buf)
+
+        self._rendered[key] = seq
+        self.n_rendered += 1
+        return buf
+
+    def run(self):
+        while not self.quit.is_set():
+            t0 = time.perf_counter()
+
+            if self.compose is not None:
+                frame = self.compose(self.render)
+            else:
+                frame = self.render()
+
+            if frame is not None:
+                cv2.imshow(self.window_name, frame)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q') or key == 27:  # q 또는 ESC
+                self.quit.set()
+                break
+
+            dt = time.perf_counter() - t0
+            if dt < self.period:
+                time.sleep(self.period - dt)
+
+        cv2.destroyWindow(self.window_name)
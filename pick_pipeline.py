@@ -0,0 +1,383 @@
+import time
+import queue
+import threading
+
+import numpy as np
+
+from detection_channel import DetectionChannel
+
+
+class MotionStep:
+    """
+    모션 단계 1개.
+      - kind      : 'move' (move_world coords) | 'joints' (move_joints angles) | 'grip_close' | 'grip_open' | 'wait'
+      - delay     : 명령 후 대기 [s] (settle 이면 정지 확인 후 추가 대기)
+      - settle    : 명령 후 robot.wait_motion_done() 으로 도착 + 정지까지 대기 (고정 delay 대신)
+      - view_clear: 이 단계가 끝난 뒤 다음 단계 시작 전까지 인식 결과를 믿을 수 있음
+                    (팔이 카메라 시야 밖 / 카메라 대기 자세) → 이 구간에 찍힌 결과만 사용
+    """
+
+    __slots__ = ("kind", "value", "delay", "view_clear", "settle")
+
+    def __init__(self, kind, value=None, delay=0.0, view_clear=False, settle=False):
+        if kind not in ("move", "joints", "grip_close", "grip_open", "wait"):
+            raise ValueError(f"unknown motion step: {kind}")
+        self.kind = kind
+        self.value = value
+        self.delay = float(delay)
+        self.view_clear = bool(view_clear)
+        self.settle = bool(settle)
+
+    def __repr__(self):
+        return (f"MotionStep({self.kind}, {self.value}, delay={self.delay}, view_clear={self.view_clear}, "
+                f"settle={self.settle})")
+
+
+def move(coords, delay=0.0, view_clear=False, settle=False):
+    return MotionStep("move", list(coords), delay, view_clear, settle)
+
+
+def grip_close(delay=0.0):
+    return MotionStep("grip_close", None, delay)
+
+
+def grip_open(delay=0.0):
+    return MotionStep("grip_open", None, delay)
+
+
+class PickTarget:
+    __slots__ = ("xy", "detection", "capture_ts", "created_ts", "gone_ts", "hold_until")
+
+    def __init__(self, xy, detection, capture_ts):
+        self.xy = np.asarray(xy, np.float64)
+        self.detection = detection
+        self.capture_ts = float(capture_ts)
+        self.created_ts = time.time()
+        self.gone_ts = None     # 그리퍼로 집은 시각 (이후 찍힌 프레임에는 없어야 함)
+        self.hold_until = None  # planning 에서 거절: 이 시각까지 같은 자리 다시 제안 안 함
+
+
+class PickJob:
+    __slots__ = ("target", "steps", "planned_ts")
+
+    def __init__(self, target, steps):
+        self.target = target
+        self.steps = steps
+        self.planned_ts = time.time()
+
+
+class _StageClock:
+    """stage 별 busy / blocked(다음 queue 가 가득 참) 시간 누적."""
+
+    def __init__(self):
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.count = 0
+
+
+class PickPipeline:
+    """
+    인식 / 계획 / 모션 3단계를 bounded queue 로 이은 pick & place 엔진.
+    직렬 루프(보기 -> 대기 -> 읽기 -> 집기 -> 버리기) 대신, 팔이 현재 물체를 버리러 가는 동안
+    다음 대상을 골라서(perception) 검증/경로 생성(planning)까지 끝내 두고 모션 단계는 바로 이어서 실행.
+    (버리는 위치가 시야 밖이면 그 단계를 view_clear 로 표시 → 버리는 동안 찍힌 프레임으로 다음 대상 선택)
+
+      perception : 최신 인식 결과 중 (DetectionChannel 이면 새 snapshot 이 올 때까지 대기, callable 이면 polling)
+                   - 시야가 비어 있던 구간(view_clear 단계 이후)에 찍힌 것
+                   - max_age 초 이내
+                   - 이미 queue 에 있거나 집은 물체(dedup_mm 이내)가 아닌 것
+                   중 첫 번째(conf 순) -> PickTarget
+      planning   : plan(target) -> [MotionStep] (범위 초과 등은 None 또는 ValueError 로 거절)
+      motion     : 실행 전 더 새로운 인식 결과로 물체가 아직 있는지 재확인 (max_job_age 초 지난 job 은 버림)
+                   robot 으로 단계 실행. grip_close 가 끝나면 target 을 '집음' 으로 표시
+                   할 job 이 없을 때만 idle_steps (카메라 대기 자세 등) 실행
+
+    stats() / print_stats(): 시간당 pick 수, 단계별 busy / blocked / idle 비율, pick 주기.
+
+    Usage:
+        engine = PickPipeline(robot, yolo_thread.detections, plan_pick,
+                              idle_steps=[move(LOC_ORIGIN_mm, delay=0.1, view_clear=True, settle=True)])
+        engine.run_forever(report_every=60)
+    """
+
+    def __init__(self, robot, get_detections, plan, idle_steps=(), max_age=0.5, max_job_age=30.0, dedup_mm=15.0,
+                 reject_hold=10.0, queue_size=1, poll_interval=0.02, move_mode=1, start_view_clear=False):
+        self.robot = robot
+        # DetectionChannel 또는 conf 순 결과 list 를 돌려주는 callable
+        self.channel = get_detections if isinstance(get_detections, DetectionChannel) else None
+        self.get_detections = self.channel.latest if self.channel is not None else get_detections
+        self.plan = plan
+        self.idle_steps = list(idle_steps)
+        self.max_age = float(max_age)
+        self.max_job_age = float(max_job_age)
+        self.reject_hold = float(reject_hold)
+        self.dedup_mm = float(dedup_mm)
+        self.poll_interval = float(poll_interval)
+        self.move_mode = int(move_mode)
+
+        self._targets_q = queue.Queue(maxsize=queue_size)   # perception -> planning
+        self._jobs_q = queue.Queue(maxsize=queue_size)      # planning -> motion
+
+        self._lock = threading.Lock()
+        # 시야가 빈 구간 [(start, end|None)] (end=None: 지금도 비어 있음)
+        self._clear = [(0.0, None)] if start_view_clear else []
+        self._active = []       # queue 에 있거나 실행 중 / 최근에 집은 target
+
+        self._stop = threading.Event()
+        self._threads = []
+        self.clock = {name: _StageClock() for name in ("perception", "planning", "motion")}
+        self.n_picks = 0
+        self.n_rejected = 0     # planning 에서 거절 (범위 초과 등)
+        self.n_dropped = 0      # motion 직전 재확인에서 버림 (물체 없어짐 / 너무 오래됨)
+        self.pick_times = []
+        self.t_start = None
+
+    # ---------------- view window ----------------
+    def _set_view_clear(self, clear):
+        now = time.time()
+        with self._lock:
+            open_ = bool(self._clear) and self._clear[-1][1] is None
+            if clear and not open_:
+                self._clear.append((now, None))
+                self._clear = self._clear[-8:]
+            elif not clear and open_:
+                self._clear[-1] = (self._clear[-1][0], now)
+
+    def _captured_in_clear_view(self, ts):
+        with self._lock:
+            return any(s <= ts and (e is None or ts <= e) for s, e in self._clear)
+
+    def _is_duplicate(self, xy, capture_ts):
+        now = time.time()
+        with self._lock:
+            for t in self._active:
+                if np.linalg.norm(t.xy - xy) > self.dedup_mm:
+                    continue
+                if t.hold_until is not None:
+                    if now < t.hold_until:
+                        return True
+                    continue
+                # 아직 안 집었거나, 집기 전에 찍힌 프레임에 남아 있는 같은 물체
+                if t.gone_ts is None or capture_ts < t.gone_ts:
+                    return True
+        return False
+
+    def _expired(self, t, now):
+        if t.hold_until is not None:
+            return now >= t.hold_until
+        return t.gone_ts is not None and now - t.gone_ts >= self.reject_hold
+
+    def _forget(self, target):
+        with self._lock:
+            if target in self._active:
+                self._active.remove(target)
+
+    # ---------------- stages ----------------
+    def _put(self, q, item, clock):
+        """다음 queue 가 가득 차 있으면 기다림 (blocked 시간으로 집계). stop 이면 False."""
+        t0 = time.time()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                clock.blocked += time.time() - t0
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _perception_loop(self):
+        clock = self.clock["perception"]
+        last_seen = None
+        while not self._stop.is_set():
+            if self.channel is not None:
+                results = self.channel.wait_newer(0 if last_seen is None else last_seen.seq, timeout=0.1)
+                if results is None:
+                    continue
+            else:
+                results = self.get_detections()
+                if results is last_seen:
+                    time.sleep(self.poll_interval)
+                    continue
+            last_seen = results
+            if not results:
+                continue
+
+            t0 = time.time()
+            target = None
+            for r in results:
+                ts = float(r.get("capture_ts", t0))
+                if t0 - ts > self.max_age or not self._captured_in_clear_view(ts):
+                    continue
+                xy = np.asarray(r["robot_loc"][:2], np.float64)
+                if self._is_duplicate(xy, ts):
+                    continue
+                target = PickTarget(xy, r, ts)
+                break
+            if target is not None:
+                with self._lock:
+                    self._active.append(target)
+                    self._active = [t for t in self._active if not self._expired(t, t0)]
+                clock.count += 1
+            clock.busy += time.time() - t0
+
+            if target is not None and not self._put(self._targets_q, target, clock):
+                break
+
+    def _planning_loop(self):
+        clock = self.clock["planning"]
+        while not self._stop.is_set():
+            try:
+                target = self._targets_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            t0 = time.time()
+            try:
+                steps = self.plan(target)
+            except ValueError as e:
+                steps = None
+                print(f"[Pipeline] target rejected: {e}")
+            clock.busy += time.time() - t0
+            if not steps:
+                self.n_rejected += 1
+                # 거절된 자리는 reject_hold 초 동안 다시 제안하지 않음
+                target.hold_until = time.time() + self.reject_hold
+                continue
+            clock.count += 1
+            if not self._put(self._jobs_q, PickJob(target, steps), clock):
+                break
+
+    def _run_step(self, step):
+        if step.kind == "move":
+            self.robot.move_world(step.value, self.move_mode)
+        elif step.kind == "joints":
+            self.robot.move_joints(step.value)
+        elif step.kind == "grip_close":
+            self.robot.gripper_close_retry()
+        elif step.kind == "grip_open":
+            self.robot.gripper_open_retry()
+        if step.settle and step.kind in ("move", "joints"):
+            try:
+                self.robot.wait_motion_done()
+            except TimeoutError as e:
+                print(f"[Pipeline] {e}")
+        if step.delay > 0:
+            time.sleep(step.delay)
+
+    def _near(self, results, target):
+        return any(np.linalg.norm(np.asarray(r["robot_loc"][:2], np.float64) - target.xy) <= self.dedup_mm
+                   for r in results)
+
+    def _still_there(self, target):
+        """target 보다 나중에 (시야가 빈 상태로) 찍힌 결과가 있으면 같은 자리에 물체가 아직 있는지 확인."""
+        if time.time() - target.capture_ts > self.max_job_age:
+            return False
+        if self.channel is not None:
+            # 프레임 단위: 더 새로 찍힌 (시야가 빈) 프레임에 아무것도 없으면 물체가 없어진 것
+            snap = self.channel.latest()
+            if snap.capture_ts <= target.capture_ts or not self._captured_in_clear_view(snap.capture_ts):
+                return True
+            return self._near(snap, target)
+        # callable: 결과가 없으면 "새 프레임 없음" 과 "빈 프레임" 을 구분할 수 없어서 있는 것으로 취급
+        newer = [r for r in (self.get_detections() or [])
+                 if float(r.get("capture_ts", 0.0)) > target.capture_ts and self._captured_in_clear_view(r["capture_ts"])]
+        if not newer:
+            return True
+        return self._near(newer, target)
+
+    def _run_steps(self, steps, target=None):
+        for step in steps:
+            if self._stop.is_set():
+                return False
+            self._set_view_clear(False)
+            self._run_step(step)
+            if step.kind == "grip_close" and target is not None:
+                target.gone_ts = time.time()
+            if step.view_clear:
+                self._set_view_clear(True)
+        return True
+
+    def _motion_loop(self):
+        clock = self.clock["motion"]
+        at_idle = False
+        while not self._stop.is_set():
+            try:
+                # 대기 자세가 아니면 기다리지 않고 바로 대기 자세로
+                job = self._jobs_q.get(timeout=0.1) if at_idle else self._jobs_q.get_nowait()
+            except queue.Empty:
+                if not at_idle:
+                    t0 = time.time()
+                    self._run_steps(self.idle_steps)
+                    clock.busy += time.time() - t0
+                    at_idle = True
+                continue
+
+            if not self._still_there(job.target):
+                self.n_dropped += 1
+                self._forget(job.target)
+                continue
+
+            t0 = time.time()
+            at_idle = False
+            if self._run_steps(job.steps, job.target):
+                self.n_picks += 1
+                self.pick_times.append(time.time())
+                clock.count += 1
+            clock.busy += time.time() - t0
+
+    # ---------------- control ----------------
+    def start(self):
+        self.t_start = time.time()
+        for name, fn in (("perception", self._perception_loop), ("planning", self._planning_loop),
+                         ("motion", self._motion_loop)):
+            th = threading.Thread(target=fn, name=f"PickPipeline-{name}", daemon=True)
+            th.start()
+            self._threads.append(th)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for th in self._threads:
+            th.join(timeout=5.0)
+
+    def run_forever(self, report_every=60.0):
+        self.start()
+        try:
+            while True:
+                time.sleep(report_every)
+                self.print_stats()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            self.print_stats()
+
+    # ---------------- report ----------------
+    def stats(self):
+        wall = max(1e-9, time.time() - (self.t_start or time.time()))
+        out = {
+            "wall_s": wall,
+            "picks": self.n_picks,
+            "picks_per_hour": self.n_picks / wall * 3600.0,
+            "rejected": self.n_rejected,
+            "dropped": self.n_dropped,
+            "stages": {},
+        }
+        if len(self.pick_times) >= 2:
+            out["cycle_s"] = float(np.median(np.diff(self.pick_times)))
+        for name, c in self.clock.items():
+            out["stages"][name] = {
+                "count": c.count,
+                "busy": c.busy / wall,
+                "blocked": c.blocked / wall,
+                "idle": max(0.0, 1.0 - (c.busy + c.blocked) / wall),
+            }
+        return out
+
+    def print_stats(self):
+        s = self.stats()
+        cycle = f" | cycle {s['cycle_s']:.2f}s" if "cycle_s" in s else ""
+        print(f"[Pipeline] {s['picks']} picks in {s['wall_s']:.0f}s | {s['picks_per_hour']:.0f} picks/h"
+              f"{cycle} | rejected {s['rejected']} | dropped {s['dropped']}")
+        for name, st in s["stages"].items():
+            print(f"  {name:<10} n {st['count']:>5} | busy {st['busy'] * 100:5.1f}% | "
+                  f"blocked {st['blocked'] * 100:5.1f}% | idle {st['idle'] * 100:5.1f}%")
@@ -0,0 +1,104 @@
+"""
+녹화된 세션(.mcsess)을 카메라/로봇 없이 재생하면서
+Undistorter -> YOLOWrapper -> PixelToRobotMapper 체인을 그대로 돌려 처리량/단계별 시간 측정.
+
+- REPLAY_SPEED = None : 최대 속도 (오프라인 벤치마크, 최적화 전/후 비교)
+- REPLAY_SPEED = 1.0  : 실제 속도 (현장과 같은 타이밍으로 재현, 프레임 drop 여부 확인)
+- 녹화 당시 인식 결과와 비교해서 개수 차이 / robot 좌표 차이 출력 (회귀 확인)
+"""
+
+# base
+import time
+
+# pip install
+import numpy as np
+
+# custom
+from camera_calibration.calibration_undistort_img import Undistorter
+from camera_calibration.homography_pixel_to_robot_mapper import PixelToRobotMapper
+from yolo_wrapper import YOLOWrapper
+from session_recorder import SessionReplay
+
+
+# ===== 하드코딩 설정 =====
+SESSION_PATH = './sessions/ir_line.mcsess'
+SOURCE = 'tof_shm'          # 재생할 프레임 소스 이름 (None이면 세션의 첫 소스)
+CALIB_NPZ_PATH = './camera_calibration/camera_calib_ir.npz'
+HOMO_JSON_PATH = './camera_calibration/homography_robot_map_ir.json'
+YOLO_WEIGHT_PATH = "YOLO_train/Dice_ir/runs/detect/train/weights/best.pt"
+CONF_THRESHOLD = 0.5
+REPLAY_SPEED = None
+WARMUP = True
+
+
+def _ms(values):
+    a = np.asarray(values, dtype=np.float64) * 1000
+    return f"mean {a.mean():6.2f} | p50 {np.percentile(a, 50):6.2f} | p99 {np.percentile(a, 99):6.2f} ms"
+
+
+def main():
+    replay = SessionReplay(SESSION_PATH, speed=REPLAY_SPEED)
+    source = SOURCE or replay.source_names()[0]
+    cap = replay.source(source)
+    recorded = replay.recorded_detections(source)
+    print(f"[Replay] {SESSION_PATH} | sources {replay.source_names()} | {source}: {len(cap)} frames | "
+          f"telemetry {replay.n_telemetry} | speed {'max' if REPLAY_SPEED is None else REPLAY_SPEED}")
+
+    und = Undistorter(CALIB_NPZ_PATH)
+    mapper = PixelToRobotMapper(HOMO_JSON_PATH)
+    model = YOLOWrapper(YOLO_WEIGHT_PATH)
+    if WARMUP:
+        model.warmup()
+
+    t_und, t_inf, t_map = [], [], []
+    n_count_diff = 0
+    loc_err = []
+
+    t_start = time.perf_counter()
+    n = 0
+    while True:
+        frame = cap.read_frame()
+        if frame is None:
+            break
+        n += 1
+
+        t0 = time.perf_counter()
+        img = und.undistort(frame.img)
+        t1 = time.perf_counter()
+        results = model.infer(img, confidence_threshold=CONF_THRESHOLD)
+        t2 = time.perf_counter()
+        results = sorted(results, key=lambda x: x["conf"], reverse=True)
+        for r in results:
+            cx, cy = model.bbox_center(r['bbox_pixel'])
+            r["robot_loc"] = list(mapper.pixel_to_robot(cx, cy))
+        t3 = time.perf_counter()
+
+        t_und.append(t1 - t0)
+        t_inf.append(t2 - t1)
+        t_map.append(t3 - t2)
+
+        # 녹화 당시 결과와 비교 (conf 1등 위치)
+        ref = recorded.get(frame.seq)
+        if ref is not None:
+            if len(ref) != len(results):
+                n_count_diff += 1
+            elif results and 'robot_loc' in ref[0]:
+                loc_err.append(float(np.hypot(results[0]['robot_loc'][0] - ref[0]['robot_loc'][0],
+                                              results[0]['robot_loc'][1] - ref[0]['robot_loc'][1])))
+
+    elapsed = time.perf_counter() - t_start
+    if n == 0:
+        print("[Replay] 프레임 없음")
+        return
+
+    print(f"[Replay] {n} frames in {elapsed:.2f}s -> {n / elapsed:.1f} FPS")
+    print(f"  undistort : {_ms(t_und)}")
+    print(f"  infer     : {_ms(t_inf)}")
+    print(f"  map       : {_ms(t_map)}")
+    if recorded:
+        err = f"mean {np.mean(loc_err):.2f} / max {np.max(loc_err):.2f} mm" if loc_err else "-"
+        print(f"  vs recorded: count mismatch {n_count_diff} frames | top-1 robot_loc diff {err}")
+
+
+if __name__ == "__main__":
+    main()
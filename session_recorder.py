@@ -0,0 +1,312 @@
+"""
+현장 세션 녹화 / 재생.
+
+카메라 프레임(모든 소스) + timestamp + 인식 결과 + 로봇 명령(telemetry)을 파일 하나(.mcsess)에 기록하고,
+나중에 카메라/로봇 없이 실제 속도 또는 최대 속도로 재생함.
+
+파일 형식 (little endian, 레코드를 이어 붙인 스트림):
+    magic b'MCSESS01'
+    record: [kind 4B][meta_len u32][timestamp f64][data_len u32][meta json][data]
+      kind = b'FRM ' : meta {source, seq, codec, shape, dtype}, data = 인코딩된 이미지
+             b'DET ' : meta {source, seq, results}, data 없음
+             b'TEL ' : meta {event, ...},            data 없음
+
+Usage:
+    rec = SessionRecorder('sessions/260301_line.mcsess')
+    rec.add_frame(frame)                          # frame_source.Frame
+    rec.add_detections('ir', frame.seq, results)
+    rec.add_telemetry('move_world', coords=[...])
+    rec.close()
+
+    replay = SessionReplay('sessions/260301_line.mcsess', speed=None)   # None: 최대 속도
+    cap = replay.source('ir')                     # FrameSource 로 재생
+"""
+
+# base
+import os
+import json
+import time
+import queue
+import struct
+import threading
+
+# pip install
+import numpy as np
+import cv2
+
+# custom
+from frame_source import Frame, FrameSource
+
+
+_MAGIC = b'MCSESS01'
+_REC = struct.Struct('<4sIdI')
+
+KIND_FRAME = b'FRM '
+KIND_DET = b'DET '
+KIND_TEL = b'TEL '
+
+
+def _json_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    raise TypeError(f"not JSON serializable: {type(o)}")
+
+
+class SessionRecorder:
+    """
+    녹화는 별도 writer 스레드에서 (이미지 인코딩 + 디스크 쓰기) → 파이프라인은 큐에 넣기만 함.
+    큐가 가득 차면(디스크가 느림) 레코드는 버리고 집계 (인식/로봇 루프를 절대 막지 않음).
+      - 프레임: n_dropped
+      - 인식 결과 / telemetry: n_dropped_meta (작아서 프레임 1장 자리면 충분 → 프레임보다 여유분을 더 줌)
+    인코딩/쓰기 실패(디스크 가득 참 등)는 레코드 단위로 n_errors 에 집계하고 writer 는 계속 돌림.
+
+    codec: 'png' (무손실, 8-bit), 'jpg' (작음, 손실), 'raw' (uint16 depth 등 그대로)
+    """
+
+    def __init__(self, path, codec='png', jpeg_quality=90, max_queue=64, meta_reserve=256):
+        self.path = path
+        self.codec = codec
+        self.jpeg_quality = int(jpeg_quality)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, 'wb')
+        self._f.write(_MAGIC)
+
+        # 프레임은 max_queue 까지만, 인식 결과/telemetry 는 meta_reserve 개 더 (프레임이 큐를 채워도 남도록)
+        self.max_queue = int(max_queue)
+        self._q = queue.Queue(maxsize=self.max_queue + int(meta_reserve))
+        self.n_written = 0
+        self.n_dropped = 0
+        self.n_dropped_meta = 0
+        self.n_errors = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._writer_loop, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    # ---------------- producer API ----------------
+    def add_frame(self, frame, codec=None):
+        """frame: frame_source.Frame. img 참조만 넘기므로 호출 후 img를 수정하지 말 것."""
+        self._put((KIND_FRAME, frame.timestamp, {
+            'source': frame.source, 'seq': int(frame.seq), 'codec': codec or self.codec,
+        }, frame.img), drop_ok=True)
+
+    def add_detections(self, source, seq, results, timestamp=None):
+        self._put((KIND_DET, time.time() if timestamp is None else timestamp, {
+            'source': source, 'seq': int(seq), 'results': results,
+        }, None))
+
+    def add_telemetry(self, event, timestamp=None, **fields):
+        meta = {'event': event}
+        meta.update(fields)
+        self._put((KIND_TEL, time.time() if timestamp is None else timestamp, meta, None))
+
+    def _put(self, item, drop_ok=False):
+        # drop_ok(프레임)는 max_queue 를 넘으면 버림, 그 외는 meta_reserve 까지 여유, 그래도 가득 차면 버리고 집계
+        if drop_ok and self._q.qsize() >= self.max_queue:
+            self.n_dropped += 1
+            return
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            if drop_ok:
+                self.n_dropped += 1
+            else:
+                self.n_dropped_meta += 1
+
+    # ---------------- writer thread ----------------
+    def _encode(self, meta, img):
+        codec = meta['codec']
+        if codec == 'raw':
+            arr = np.ascontiguousarray(img)
+            meta['shape'] = list(arr.shape)
+            meta['dtype'] = str(arr.dtype)
+            return arr.tobytes()
+
+        ext = '.jpg' if codec == 'jpg' else '.png'
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if codec == 'jpg' else [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        ok, buf = cv2.imencode(ext, img, params)
+        if not ok:
+            raise RuntimeError(f"이미지 인코딩 실패: {meta}")
+        return buf.tobytes()
+
+    def _write_record(self, kind, ts, meta, img):
+        data = b'' if img is None else self._encode(meta, img)
+        meta_b = json.dumps(meta, ensure_ascii=False, default=_json_default).encode('utf-8')
+        pos = self._f.tell()
+        try:
+            self._f.write(_REC.pack(kind, len(meta_b), float(ts), len(data)) + meta_b + data)
+        except OSError:
+            # 레코드가 중간까지만 써졌으면 잘라내서 뒤 레코드가 어긋나지 않게
+            try:
+                self._f.seek(pos)
+                self._f.truncate()
+            except OSError:
+                pass
+            raise
+
+    def _writer_loop(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            try:
+                self._write_record(*item)
+                self.n_written += 1
+                if self._q.empty():
+                    self._f.flush()   # 프로그램이 강제 종료돼도 여기까지는 남도록
+            except Exception as e:
+                self.n_errors += 1
+                self.last_error = repr(e)
+                if self.n_errors == 1 or self.n_errors % 100 == 0:
+                    print(f'[Session] WARNING: record write failed ({self.n_errors}): {e!r}')
+
+    def close(self, timeout=10.0):
+        # writer 가 죽었거나 멈췄으면 None 을 못 넣어도 기다리지 않음
+        if self._thread.is_alive():
+            try:
+                self._q.put(None, timeout=timeout)
+            except queue.Full:
+                print('[Session] WARNING: writer not draining, closing without the remaining records')
+            self._thread.join(timeout)
+        try:
+            self._f.close()
+        except OSError as e:
+            self.n_errors += 1
+            self.last_error = repr(e)
+        print(f'[Session] saved: {self.path} (records {self.n_written}, dropped frames {self.n_dropped}, '
+              f'dropped det/telemetry {self.n_dropped_meta}, errors {self.n_errors})')
+        if self.last_error is not None:
+            print(f'[Session] last error: {self.last_error}')
+
+
+def read_session(path, with_data=True):
+    """
+    세션 파일의 레코드를 순서대로 -> (kind, timestamp, meta, data) generator (파일에서 하나씩 읽음).
+    with_data: False 또는 callable(kind, meta) -> False 인 레코드는 data 를 읽지 않고 건너뜀 (data=None).
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"세션 파일 형식이 아님: {path}")
+        size = os.fstat(f.fileno()).st_size
+        while True:
+            head = f.read(_REC.size)
+            if len(head) < _REC.size:
+                break
+            kind, meta_len, ts, data_len = _REC.unpack(head)
+            meta_b = f.read(meta_len)
+            if len(meta_b) < meta_len:
+                break   # 녹화 중 강제 종료로 잘린 마지막 레코드
+            meta = json.loads(meta_b.decode('utf-8'))
+            if with_data is True or (callable(with_data) and with_data(kind, meta)):
+                data = f.read(data_len)
+                if len(data) < data_len:
+                    break
+            else:
+                if f.tell() + data_len > size:
+                    break
+                f.seek(data_len, os.SEEK_CUR)
+                data = None
+            yield kind, ts, meta, data
+
+
+def decode_frame(meta, data):
+    if meta['codec'] == 'raw':
+        return np.frombuffer(data, dtype=np.dtype(meta['dtype'])).reshape(meta['shape'])
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+class SessionReplay:
+    """
+    녹화된 세션 재생.
+      speed=1.0 : 실제 속도 (녹화 timestamp 간격대로)
+      speed=2.0 : 2배속
+      speed=None: 최대 속도 (대기 없음) → 오프라인 처리량 벤치마크용
+
+    프레임은 source()가 돌려주는 FrameSource 로 받고, 인식 결과/telemetry 는 iter_detections() / iter_telemetry().
+    세션 전체를 메모리에 올리지 않음: 생성 시 header/meta 만 한 번 훑어서 소스별 프레임 수/시작 시각만 세고
+    (이미지 data 는 seek 로 건너뜀), 재생할 때 파일에서 레코드를 하나씩 읽음.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+        self.frame_counts = {}     # source -> 프레임 수
+        self.n_detections = 0
+        self.n_telemetry = 0
+        t_start = None
+        for kind, ts, meta, _ in read_session(path, with_data=False):
+            if kind == KIND_FRAME:
+                self.frame_counts[meta['source']] = self.frame_counts.get(meta['source'], 0) + 1
+                t_start = ts if t_start is None else min(t_start, ts)
+            elif kind == KIND_DET:
+                self.n_detections += 1
+            elif kind == KIND_TEL:
+                self.n_telemetry += 1
+
+        self.t_start = t_start or 0.0
+        self._t0_wall = None
+        self._lock = threading.Lock()
+
+    def source_names(self):
+        return list(self.frame_counts.keys())
+
+    def iter_detections(self):
+        """(timestamp, meta{source, seq, results}) generator."""
+        for kind, ts, meta, _ in read_session(self.path, with_data=False):
+            if kind == KIND_DET:
+                yield ts, meta
+
+    def iter_telemetry(self):
+        """(timestamp, meta{event, ...}) generator."""
+        for kind, ts, meta, _ in read_session(self.path, with_data=False):
+            if kind == KIND_TEL:
+                yield ts, meta
+
+    def recorded_detections(self, source):
+        """source 의 {seq: results} (재생 결과와 비교하는 회귀 테스트용)."""
+        return {m['seq']: m['results'] for _, m in self.iter_detections() if m['source'] == source}
+
+    def _wait_until(self, ts):
+        if self.speed is None:
+            return
+        with self._lock:
+            if self._t0_wall is None:
+                self._t0_wall = time.time()
+        target = self._t0_wall + (ts - self.t_start) / float(self.speed)
+        delay = target - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def source(self, name):
+        return ReplaySource(self, name)
+
+
+class ReplaySource(FrameSource):
+    """SessionReplay 의 한 소스를 FrameSource 로. 끝나면 read_frame()이 None, finished=True."""
+
+    def __init__(self, replay, name):
+        self.replay = replay
+        self.name = name
+        self._records = read_session(replay.path,
+                                     with_data=lambda kind, meta: kind == KIND_FRAME and meta['source'] == name)
+        self.finished = False
+
+    def __len__(self):
+        return self.replay.frame_counts.get(self.name, 0)
+
+    def read_frame(self, timeout=None):
+        if self.finished:
+            return None
+        for kind, ts, meta, data in self._records:
+            if kind == KIND_FRAME and data is not None:
+                self.replay._wait_until(ts)
+                return Frame(decode_frame(meta, data), ts, meta['seq'], self.name)
+        self.finished = True
+        return None
+
+    def release(self):
+        self._records.close()
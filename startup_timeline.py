@@ -0,0 +1,70 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupTimeline:
+    """
+    프로세스 시작 후 각 단계(모델 로드, warm-up, 로봇 연결 ...)가
+    언제 시작하고 끝났는지 기록해서 "몇 초가 어디로 갔는지" 보여주는 타임라인.
+
+    여러 스레드에서 동시에 기록해도 안전함(백그라운드 모델 로드 + 메인 스레드 로봇 연결).
+
+    Usage:
+        from startup_timeline import TIMELINE
+
+        with TIMELINE.span("robot connect"):
+            robot.connect()
+        TIMELINE.mark("first detection")
+        TIMELINE.report()
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events = []  # (name, thread_name, t_start, t_end)
+
+    def _now(self):
+        return time.perf_counter() - self.t0
+
+    def mark(self, name):
+        """시점 하나만 기록 (길이 0 이벤트)."""
+        t = self._now()
+        with self._lock:
+            self._events.append((name, threading.current_thread().name, t, t))
+
+    @contextmanager
+    def span(self, name):
+        """with 블록 구간을 기록. 예외가 나도 구간은 남김."""
+        t_start = self._now()
+        try:
+            yield
+        finally:
+            t_end = self._now()
+            with self._lock:
+                self._events.append((name, threading.current_thread().name, t_start, t_end))
+
+    def events(self):
+        with self._lock:
+            return sorted(self._events, key=lambda e: e[2])
+
+    def report(self, bar_width=40):
+        """시작 시각 순으로 구간을 출력. 막대는 전체 시간 대비 위치/길이."""
+        events = self.events()
+        if not events:
+            print("[Startup] 기록된 이벤트 없음")
+            return
+
+        total = max(e[3] for e in events)
+        scale = bar_width / total if total > 0 else 0.0
+
+        print(f"===== Startup timeline (total {total:.2f}s) =====")
+        for name, thread_name, t_start, t_end in events:
+            pos = int(t_start * scale)
+            length = max(1, int((t_end - t_start) * scale))
+            bar = " " * pos + "#" * length
+            print(f"{t_start:7.2f}s +{t_end - t_start:6.2f}s  |{bar:<{bar_width + 1}}| {name} [{thread_name}]")
+
+
+# 프로세스 전역 타임라인 (import 시점이 t=0)
+TIMELINE = StartupTimeline()
@@ -0,0 +1,341 @@
+"""
+작업 레시피 (json / yaml): 데모마다 복사하던 포즈/시퀀스를 데이터로.
+
+{
+  "name": "dice_rgb",
+  "defaults": {"speed": 50, "mode": 1, "move_delay": 2.0, "gripper_time": 1.0},
+  "limits":   {"reach_mm": 300, "z_mm": [-50, 450], "joint_deg": [-168, 168]},
+  "target": {                                   # detect 단계 설정
+      "object_origin_mm": {"x": 254.7, "y": 3.8},   # 티칭할 때 물체 위치 (relative 포즈의 기준)
+      "max_offset_mm": 150,                         # 이보다 멀면 이번 사이클 건너뜀
+      "z_per_x": 0.15,                              # 백래시 Z 보정 (x 1mm 당 z 보정)
+      "max_age_s": 0.5,
+      "object_top_z_mm": null                       # 숫자면 robot_loc_3d 의 Z 로 높이 보정 (ToF)
+  },
+  "poses": {
+      "origin":      {"coords": [170, 0, 290, -92, 44, -90]},
+      "origin_j":    {"joints": [76, -11, -66, -9, -12, 29]},
+      "pick":        {"coords": [240, 0, 126, 180, 5, -132]},
+      "pick_appro":  {"from": "pick", "offset": [0, 0, 100]},     # 다른 포즈 + xyz(rpy) offset
+  },
+  "startup": [{"move": "origin_j"}],
+  "cycle": [
+      {"camera": "ir"},                         # 화면/카메라 전환 (set_camera 콜백)
+      {"move": "origin", "wait": 0},
+      {"detect": "after_settle", "margin": 0.1},  # 인식 결과 1등 -> offset, 없거나/오래됐거나/범위 초과면 사이클 처음부터
+                                                # after_settle: 팔이 멈추고 margin 초 뒤 촬영된 결과 (true: 최신 결과)
+      {"move": "pick_appro", "relative": true}, # relative: detect 로 구한 offset 적용
+      {"gripper": "close"},
+      {"wait": 5}
+  ]
+}
+"""
+
+import os
+import json
+import math
+import time
+
+import numpy as np
+
+from latency_monitor import detection_age
+from detection_channel import DetectionChannel, detect_after_settle
+
+
+STEP_KINDS = ("move", "gripper", "camera", "wait", "detect")
+DEFAULTS = {"speed": 50, "mode": 1, "move_delay": 2.0, "gripper_time": 1.0}
+LIMITS = {"reach_mm": 300.0, "z_mm": [-50.0, 450.0], "joint_deg": [-168.0, 168.0]}
+TARGET = {"object_origin_mm": {"x": 0.0, "y": 0.0}, "max_offset_mm": 150.0, "z_per_x": 0.0,
+          "max_age_s": 0.5, "object_top_z_mm": None}
+
+
+def load_recipe(path):
+    """json / yaml(.yaml, .yml, PyYAML 필요) -> dict"""
+    with open(path, "r", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("yaml 레시피는 PyYAML 필요: pip install pyyaml (또는 json 레시피 사용)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class CompiledStep:
+    __slots__ = ("kind", "name", "value", "relative", "speed", "mode", "wait")
+
+    def __init__(self, kind, name=None, value=None, relative=False, speed=None, mode=None, wait=0.0):
+        self.kind = kind            # move_world | move_joints | gripper | camera | wait | detect
+        self.name = name
+        self.value = value
+        self.relative = relative
+        self.speed = speed
+        self.mode = mode
+        self.wait = wait
+
+    def __repr__(self):
+        rel = " (relative)" if self.relative else ""
+        return f"{self.kind} {self.name or ''}{rel} wait={self.wait}"
+
+
+class CompiledRecipe:
+    """
+    검증 + 정적 포즈 계산을 한 번에 끝낸 레시피.
+      - poses   : 이름 -> ('coords' | 'joints', np.ndarray(6)) ('from' + offset 은 미리 풀어 둠)
+      - 정적 포즈는 작업 범위(limits) 를 여기서 확인, relative 포즈는 reachable(offset) 로 실행 중 확인
+      - startup / cycle : CompiledStep 목록 (실행 중에는 dict 조회/포즈 계산 없음)
+      - cycle_time_s    : wait + 그리퍼 시간으로 추정한 한 사이클 시간 (after_settle 대기 / 이동 시간 제외)
+    실패하면 ValueError (어느 항목인지 메시지에 포함).
+    """
+
+    def __init__(self, recipe):
+        if not isinstance(recipe, dict):
+            raise ValueError("recipe: dict 가 아님")
+        unknown = set(recipe) - {"name", "defaults", "limits", "target", "poses", "startup", "cycle"}
+        if unknown:
+            raise ValueError(f"recipe: 알 수 없는 항목 {sorted(unknown)}")
+
+        self.name = recipe.get("name", "recipe")
+        self.defaults = self._merge("defaults", DEFAULTS, recipe.get("defaults", {}))
+        self.limits = self._merge("limits", LIMITS, recipe.get("limits", {}))
+        self.target = self._merge("target", TARGET, recipe.get("target", {}))
+        origin = self.target["object_origin_mm"]
+        if not isinstance(origin, dict) or set(origin) != {"x", "y"}:
+            raise ValueError(f"recipe.target.object_origin_mm: {{\"x\": .., \"y\": ..}} 필요 ({origin})")
+        self.target["origin_xy"] = np.array([float(origin["x"]), float(origin["y"])])
+
+        self.poses = self._resolve_poses(recipe.get("poses", {}))
+        self.startup = [self._compile_step(s, f"startup[{i}]") for i, s in enumerate(recipe.get("startup", []))]
+        self.cycle = [self._compile_step(s, f"cycle[{i}]") for i, s in enumerate(recipe.get("cycle", []))]
+        if not self.cycle:
+            raise ValueError("recipe.cycle: 비어 있음")
+
+        # relative 이동은 같은 목록 안에서 앞에 detect 단계가 있어야 함 (offset 은 run_steps 호출마다 새로 구함)
+        for where, steps in (("startup", self.startup), ("cycle", self.cycle)):
+            has_detect = False
+            for i, s in enumerate(steps):
+                has_detect = has_detect or s.kind == "detect"
+                if s.relative and not has_detect:
+                    raise ValueError(f"recipe.{where}[{i}]: relative 이동인데 앞에 detect 단계가 없음")
+        self._check_reach()
+        self.cycle_time_s = sum(self._step_time(s) for s in self.cycle)
+
+    @staticmethod
+    def _merge(where, base, raw):
+        if not isinstance(raw, dict):
+            raise ValueError(f"recipe.{where}: dict 가 아님")
+        unknown = set(raw) - set(base)
+        if unknown:
+            raise ValueError(f"recipe.{where}: 알 수 없는 항목 {sorted(unknown)} (가능: {sorted(base)})")
+        return dict(base, **raw)
+
+    # ---------------- poses ----------------
+    def _resolve_poses(self, raw):
+        poses = {}
+
+        def resolve(name, stack):
+            if name in poses:
+                return poses[name]
+            if name not in raw:
+                raise ValueError(f"recipe.poses: '{name}' 없음" + (f" ({stack[-1]} 에서 참조)" if stack else ""))
+            if name in stack:
+                raise ValueError(f"recipe.poses: 순환 참조 {' -> '.join(stack + [name])}")
+            p = raw[name]
+            if not isinstance(p, dict):
+                raise ValueError(f"recipe.poses.{name}: dict 가 아님")
+            keys = [k for k in ("coords", "joints", "from") if k in p]
+            if len(keys) != 1:
+                raise ValueError(f"recipe.poses.{name}: coords / joints / from 중 하나만 지정")
+            unknown = set(p) - ({"from", "offset"} if keys[0] == "from" else {keys[0]})
+            if unknown:
+                raise ValueError(f"recipe.poses.{name}: 알 수 없는 항목 {sorted(unknown)}")
+            if keys[0] == "from":
+                kind, base = resolve(p["from"], stack + [name])
+                off = np.zeros(6)
+                o = np.asarray(p.get("offset", []), np.float64)
+                if len(o) > 6:
+                    raise ValueError(f"recipe.poses.{name}.offset: 최대 6개")
+                off[:len(o)] = o
+                value = base + off
+            else:
+                kind = keys[0]
+                value = np.asarray(p[kind], np.float64)
+                if value.shape != (6,):
+                    raise ValueError(f"recipe.poses.{name}.{kind}: 값 6개 필요 ({value.shape})")
+            poses[name] = (kind, value)
+            return poses[name]
+
+        for name in raw:
+            resolve(name, [])
+        return poses
+
+    def _check_reach(self):
+        reach = float(self.limits["reach_mm"])
+        z_lo, z_hi = self.limits["z_mm"]
+        j_lo, j_hi = self.limits["joint_deg"]
+        for steps in (self.startup, self.cycle):
+            for s in steps:
+                if s.kind == "move_joints":
+                    if np.any(s.value < j_lo) or np.any(s.value > j_hi):
+                        raise ValueError(f"pose '{s.name}': joint 범위 밖 {s.value.tolist()}")
+                    continue
+                if s.kind != "move_world":
+                    continue
+                # relative 포즈는 기준 위치만 여기서 확인, 실제 offset 적용 위치는 reachable() 로 실행 중 확인
+                x, y, z = s.value[:3]
+                if math.hypot(x, y) > reach or not (z_lo <= z <= z_hi):
+                    raise ValueError(f"pose '{s.name}': 작업 범위 밖 (x={x:.1f}, y={y:.1f}, z={z:.1f}, "
+                                     f"reach {reach}mm, z {z_lo}~{z_hi}mm)")
+        self._relative_xyz = np.array([s.value[:3] for s in self.startup + self.cycle if s.relative]).reshape(-1, 3)
+
+    def reachable(self, offset):
+        """detect 로 구한 offset 을 적용한 relative 포즈가 전부 작업 범위 안인지 (numpy 한 번)."""
+        xyz = self._relative_xyz + offset[:3]
+        z_lo, z_hi = self.limits["z_mm"]
+        return bool(np.all(np.hypot(xyz[:, 0], xyz[:, 1]) <= self.limits["reach_mm"])
+                    and np.all((xyz[:, 2] >= z_lo) & (xyz[:, 2] <= z_hi)))
+
+    # ---------------- steps ----------------
+    def _compile_step(self, raw, where):
+        # wait 는 단독이면 대기 단계, 다른 단계와 같이 있으면 그 단계 후 대기 시간
+        kinds = [k for k in STEP_KINDS if k in raw and k != "wait"] or [k for k in ("wait",) if k in raw]
+        if len(kinds) != 1:
+            raise ValueError(f"recipe.{where}: {STEP_KINDS} 중 하나만 지정 ({raw})")
+        kind = kinds[0]
+        unknown = set(raw) - {kind, "relative", "speed", "mode", "wait", "margin"}
+        if unknown:
+            raise ValueError(f"recipe.{where}: 알 수 없는 항목 {sorted(unknown)}")
+
+        if kind == "move":
+            name = raw["move"]
+            if name not in self.poses:
+                raise ValueError(f"recipe.{where}: pose '{name}' 없음")
+            pose_kind, value = self.poses[name]
+            relative = bool(raw.get("relative", False))
+            if relative and pose_kind != "coords":
+                raise ValueError(f"recipe.{where}: joints 포즈는 relative 불가")
+            return CompiledStep("move_world" if pose_kind == "coords" else "move_joints", name, value, relative,
+                                int(raw.get("speed", self.defaults["speed"])),
+                                int(raw.get("mode", self.defaults["mode"])),
+                                float(raw.get("wait", self.defaults["move_delay"])))
+        if kind == "gripper":
+            if raw["gripper"] not in ("open", "close"):
+                raise ValueError(f"recipe.{where}: gripper 는 open / close")
+            return CompiledStep("gripper", raw["gripper"], wait=float(raw.get("wait", 0.0)))
+        if kind == "camera":
+            return CompiledStep("camera", str(raw["camera"]), wait=float(raw.get("wait", 0.0)))
+        if kind == "wait":
+            return CompiledStep("wait", wait=float(raw["wait"]))
+        mode = "latest" if raw["detect"] is True else raw["detect"]
+        if mode not in ("latest", "after_settle"):
+            raise ValueError(f"recipe.{where}: detect 는 true / 'latest' / 'after_settle'")
+        return CompiledStep("detect", mode, float(raw.get("margin", 0.1)))
+
+    def _step_time(self, s):
+        return s.wait + (float(self.defaults["gripper_time"]) if s.kind == "gripper" else 0.0)
+
+    def summary(self):
+        lines = [f"[Recipe] {self.name} | poses {len(self.poses)} | startup {len(self.startup)} steps | "
+                 f"cycle {len(self.cycle)} steps | ~{self.cycle_time_s:.1f}s/cycle "
+                 f"(~{3600.0 / max(self.cycle_time_s, 1e-9):.0f} picks/h)"]
+        lines += [f"  {i:>2}: {s}" for i, s in enumerate(self.cycle)]
+        return "\n".join(lines)
+
+
+def compile_recipe(recipe_or_path):
+    recipe = load_recipe(recipe_or_path) if isinstance(recipe_or_path, str) else recipe_or_path
+    return CompiledRecipe(recipe)
+
+
+class RecipeRunner:
+    """
+    CompiledRecipe 를 MyCobotController 로 실행.
+      - get_detections : DetectionChannel 또는 conf 순 인식 결과 list 를 돌려주는 callable
+                         (결과: capture_ts, robot_loc[, robot_loc_3d])
+      - set_camera(name): camera 단계에서 호출 (예: demo_02 의 yolo_thread.switch)
+      - latency        : LatencyMonitor 면 detect 단계에서 결과 나이를 'robot_read' 로 기록
+
+    Usage:
+        recipe = compile_recipe('./recipes/dice_rgb.json')
+        print(recipe.summary())
+        RecipeRunner(recipe, robot, yolo_thread.detections).run()
+    """
+
+    def __init__(self, recipe, robot, get_detections=None, set_camera=None, latency=None):
+        self.recipe = recipe
+        self.robot = robot
+        self.channel = get_detections if isinstance(get_detections, DetectionChannel) else None
+        self.get_detections = self.channel.latest if self.channel is not None else get_detections
+        if self.channel is None and any(s.kind == "detect" and s.name == "after_settle" for s in recipe.cycle):
+            raise ValueError("detect: after_settle 는 get_detections 로 DetectionChannel 필요")
+        self.set_camera = set_camera
+        self.latency = latency
+        self.n_cycles = 0
+        self.n_skipped = 0
+
+    def _detect(self, step):
+        """인식 결과 1등 -> offset(np.ndarray(6)) 또는 None (사이클 건너뜀)."""
+        t = self.recipe.target
+        if step.name == "after_settle":
+            results = detect_after_settle(self.robot, self.channel, margin=step.value)
+        else:
+            results = self.get_detections() if self.get_detections is not None else None
+        if not results:
+            return None
+        result = results[0]
+
+        age = detection_age(result)
+        if age is None:
+            print('촬영 시각(capture_ts) 없는 인식 결과 무시')
+            return None
+        if self.latency is not None:
+            self.latency.observe('robot_read', age)
+        if age > t["max_age_s"]:
+            print(f'오래된 인식 결과 무시: {age*1000:.0f}ms')
+            return None
+
+        offset = np.zeros(6)
+        offset[:2] = np.asarray(result['robot_loc'][:2], np.float64) - t["origin_xy"]
+        # 백래시로 인한 Z 쳐짐 offset 반영
+        offset[2] = offset[0] * t["z_per_x"]
+        # 물체 높이가 티칭 때와 다르면 그만큼 Z 반영
+        if t["object_top_z_mm"] is not None and result.get('robot_loc_3d') is not None:
+            offset[2] += result['robot_loc_3d'][2] - t["object_top_z_mm"]
+        if np.any(np.abs(offset[:2]) > t["max_offset_mm"]) or not self.recipe.reachable(offset):
+            print(f'범위 초과: {np.round(offset[:3], 1).tolist()}')
+            return None
+        return offset
+
+    def run_steps(self, steps):
+        """단계 실행. detect 실패 시 False (나머지 단계 건너뜀)."""
+        offset = None
+        for s in steps:
+            if s.kind == "detect":
+                offset = self._detect(s)
+                if offset is None:
+                    return False
+            elif s.kind == "move_world":
+                coords = s.value + offset if s.relative else s.value
+                self.robot.move_world(coords.tolist(), s.mode, speed=s.speed)
+            elif s.kind == "move_joints":
+                self.robot.move_joints(s.value.tolist(), speed=s.speed)
+            elif s.kind == "gripper":
+                if s.name == "close":
+                    self.robot.gripper_close_retry()
+                else:
+                    self.robot.gripper_open_retry()
+            elif s.kind == "camera" and self.set_camera is not None:
+                self.set_camera(s.name)
+            if s.wait > 0:
+                time.sleep(s.wait)
+        return True
+
+    def run(self, max_cycles=None, startup=True, skip_pause=0.5):
+        if startup:
+            self.run_steps(self.recipe.startup)
+        while max_cycles is None or self.n_cycles + self.n_skipped < max_cycles:
+            if self.run_steps(self.recipe.cycle):
+                self.n_cycles += 1
+            else:
+                self.n_skipped += 1
+                time.sleep(skip_pause)  # 물체 없음 등: 잠깐 쉬고 다시 (이동 명령 연속 전송 방지)
@@ -1,11 +1,101 @@
+import threading
+from functools import lru_cache
+
 import cv2
-from ultralytics import YOLO
+import numpy as np
+
+from startup_timeline import TIMELINE
+
+
+@lru_cache(maxsize=512)
+def _label_size(label, font_scale, thickness):
+    # 같은 라벨(class + conf 2자리)은 매 프레임 반복되므로 getTextSize 결과를 캐시
+    return cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+
+
+def draw_detections(img, dic_list, out=None, scale=1.0):
+    """
+    img: BGR image (OpenCV)
+    dic_list: infer() 결과 list[dict]
+    - 빨간 bbox
+    - bbox 왼쪽 아래에: class_name + conf
+    - dict에 "robot_loc": [x_mm, y_mm] 있으면 같이 표시
+    out: 그릴 버퍼 (img와 같은 shape). None이면 img.copy(), img 자신이면 복사 없이 그 위에 그림
+    scale: img가 원본 대비 축소된 경우 bbox_pixel에 곱할 배율 (축소 렌더링용)
+    return: annotated BGR image
+    """
+    if img is None:
+        return None
+
+    if out is None:
+        out = img.copy()
+    elif out is not img:
+        np.copyto(out, img)
+
+    font_scale = max(0.35, 0.6 * scale)
+    thickness = 2 if scale >= 0.75 else 1
+    img_h, img_w = out.shape[:2]
+
+    for d in (dic_list or []):
+        if "bbox_pixel" not in d:
+            continue
+
+        x1, y1, x2, y2 = d["bbox_pixel"]
+        if scale != 1.0:
+            x1, y1, x2, y2 = int(x1 * scale), int(y1 * scale), int(x2 * scale), int(y2 * scale)
+        class_name = str(d.get("class_name", ""))
+        conf = float(d.get("conf", 0.0))
+
+        # bbox (red)
+        cv2.rectangle(out, (x1, y1), (x2, y2), (0, 0, 255), 2)
+
+        # label text
+        label = f"{class_name} {conf:.2f}"
+
+        # optional robot location
+        if "robot_loc" in d and isinstance(d["robot_loc"], (list, tuple)) and len(d["robot_loc"]) >= 2:
+            rx = float(d["robot_loc"][0])
+            ry = float(d["robot_loc"][1])
+            label += f" | robot=({rx:.1f},{ry:.1f})mm"
+
+        # put label near bottom-left of bbox
+        # (bbox 좌하단 기준으로 약간 아래에 놓고 싶으면 y2+?도 가능하지만,
+        #  화면 밖으로 나갈 수 있어서 bbox 위쪽/아래쪽 자동 처리)
+        (text_w, text_h), _ = _label_size(label, font_scale, thickness)
+        tx = x1
+        if tx + text_w > img_w:
+            tx = max(0, img_w - text_w)
+        ty = y2 + text_h + 6
+        if ty > img_h - 10:
+            ty = y1 - 10
+            if ty < text_h + 4:
+                ty = y1 + text_h + 4
+
+        cv2.putText(
+            out,
+            label,
+            (tx, ty),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale,
+            (0, 0, 255),
+            thickness,
+            cv2.LINE_AA
+        )
+
+    return out
 
 
 class YOLOWrapper:
-    def __init__(self, weight_path):
+    def __init__(self, weight_path, imgsz=None):
+        # ultralytics(+torch) import는 수 초가 걸리므로 실제 모델 생성 시점까지 미룸
+        from ultralytics import YOLO
+
+        self.weight_path = weight_path
         self.model = YOLO(weight_path)
 
+        # 추론 입력 크기 (None이면 모델 기본값). export된 모델(onnx 등)은 export 때 크기와 맞춰야 함
+        self.imgsz = imgsz
+
         # class name mapping (ultralytics model 내부)
         # 보통 model.names가 dict 또는 list 형태로 들어있음
         self.names = None
@@ -31,34 +121,42 @@ class YOLOWrapper:
 
         return str(class_no)
 
-    def infer(self, bgr_img, confidence_threshold=0.5):
+    def warmup(self, imgsz=640, n=1):
+        """
+        더미 이미지로 n회 추론해서 첫 프레임 지연(CUDA 초기화, 레이어 fuse 등)을 미리 소모.
+        """
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        for _ in range(int(n)):
+            self._predict(dummy)
+
+    def _predict(self, rgb):
+        if self.imgsz is None:
+            return self.model(rgb, verbose=False)
+        return self.model(rgb, imgsz=self.imgsz, verbose=False)
+
+    def infer_array(self, bgr_img, confidence_threshold=0.5):
         """
         Input: BGR image (OpenCV)
-        Output: list of dict
-          dict keys:
-            - class_no
-            - class_name
-            - bbox_nor      (x1,y1,x2,y2 normalized 0~1)
-            - bbox_pixel    (x1,y1,x2,y2 pixel)
-            - conf
+        Output: float32 ndarray (N,6) = [x1, y1, x2, y2, conf, class_no]
+          - conf < confidence_threshold 는 제외
+          - bbox는 이미지 범위로 clamp된 pixel 좌표
+        dict 변환 없이 숫자만 필요한 곳(추론 서버, 벤치마크)에서 사용.
         """
         if bgr_img is None:
-            return []
+            return np.zeros((0, 6), dtype=np.float32)
 
         h, w = bgr_img.shape[:2]
 
         # YOLO는 보통 RGB로 받는 게 안전하니 변환
         rgb = cv2.cvtColor(bgr_img, cv2.COLOR_BGR2RGB)
 
-        results = self.model(rgb, verbose=False)
+        results = self._predict(rgb)
         if results is None or len(results) == 0:
-            return []
+            return np.zeros((0, 6), dtype=np.float32)
 
         r0 = results[0]
         if r0.boxes is None:
-            return []
-
-        out = []
+            return np.zeros((0, 6), dtype=np.float32)
 
         # r0.boxes: Boxes object
         # - xyxy: (N,4)
@@ -77,20 +175,35 @@ class YOLOWrapper:
             # 이미 numpy일 수도 있음
             pass
 
-        for i in range(len(boxes_xyxy)):
-            conf = float(confs[i])
-            if conf < float(confidence_threshold):
-                continue
+        arr = np.zeros((len(boxes_xyxy), 6), dtype=np.float32)
+        if len(arr) == 0:
+            return arr
+        arr[:, 0:4] = boxes_xyxy
+        arr[:, 4] = confs
+        arr[:, 5] = clss
+
+        arr = arr[arr[:, 4] >= float(confidence_threshold)]
+
+        # clamp (이미지 범위)
+        arr[:, 0] = np.clip(arr[:, 0], 0.0, w - 1.0)
+        arr[:, 2] = np.clip(arr[:, 2], 0.0, w - 1.0)
+        arr[:, 1] = np.clip(arr[:, 1], 0.0, h - 1.0)
+        arr[:, 3] = np.clip(arr[:, 3], 0.0, h - 1.0)
+
+        return arr
 
-            x1, y1, x2, y2 = boxes_xyxy[i].tolist()
+    def array_to_dicts(self, arr, img_shape):
+        """
+        infer_array() 결과 (N,6) -> infer() 형식 list[dict]
+        img_shape: (h, w, ...) bbox_nor 계산용
+        """
+        h, w = img_shape[:2]
+        out = []
 
-            # clamp (이미지 범위)
-            x1 = max(0.0, min(x1, w - 1.0))
-            x2 = max(0.0, min(x2, w - 1.0))
-            y1 = max(0.0, min(y1, h - 1.0))
-            y2 = max(0.0, min(y2, h - 1.0))
+        for row in arr:
+            x1, y1, x2, y2, conf, class_no = [float(v) for v in row]
 
-            class_no = int(clss[i])
+            class_no = int(class_no)
             class_name = self._get_class_name(class_no)
 
             bbox_pixel = [int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2))]
@@ -106,65 +219,95 @@ class YOLOWrapper:
 
         return out
 
-    def draw(self, img, dic_list):
+    def infer(self, bgr_img, confidence_threshold=0.5):
         """
-        img: BGR image (OpenCV)
-        dic_list: infer() 결과 list[dict]
-        - 빨간 bbox
-        - bbox 왼쪽 아래에: class_name + conf
-        - dict에 "robot_loc": [x_mm, y_mm] 있으면 같이 표시
-        return: annotated BGR image
+        Input: BGR image (OpenCV)
+        Output: list of dict
+          dict keys:
+            - class_no
+            - class_name
+            - bbox_nor      (x1,y1,x2,y2 normalized 0~1)
+            - bbox_pixel    (x1,y1,x2,y2 pixel)
+            - conf
         """
-        if img is None:
-            return None
-
-        out = img.copy()
+        if bgr_img is None:
+            return []
 
-        for d in (dic_list or []):
-            if "bbox_pixel" not in d:
-                continue
-
-            x1, y1, x2, y2 = d["bbox_pixel"]
-            class_name = str(d.get("class_name", ""))
-            conf = float(d.get("conf", 0.0))
-
-            # bbox (red)
-            cv2.rectangle(out, (x1, y1), (x2, y2), (0, 0, 255), 2)
-
-            # label text
-            label = f"{class_name} {conf:.2f}"
-
-            # optional robot location
-            if "robot_loc" in d and isinstance(d["robot_loc"], (list, tuple)) and len(d["robot_loc"]) >= 2:
-                rx = float(d["robot_loc"][0])
-                ry = float(d["robot_loc"][1])
-                label += f" | robot=({rx:.1f},{ry:.1f})mm"
-
-            # put label near bottom-left of bbox
-            # (bbox 좌하단 기준으로 약간 아래에 놓고 싶으면 y2+?도 가능하지만,
-            #  화면 밖으로 나갈 수 있어서 bbox 위쪽/아래쪽 자동 처리)
-            tx = x1
-            ty = y2 + 20
-            if ty > out.shape[0] - 10:
-                ty = y1 - 10
-                if ty < 15:
-                    ty = y1 + 15
-
-            cv2.putText(
-                out,
-                label,
-                (tx, ty),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (0, 0, 255),
-                2,
-                cv2.LINE_AA
-            )
+        arr = self.infer_array(bgr_img, confidence_threshold=confidence_threshold)
+        return self.array_to_dicts(arr, bgr_img.shape)
 
-        return out
+    def draw(self, img, dic_list, out=None, scale=1.0):
+        """draw_detections() 참고 (모델과 무관해서 렌더 스레드 등에서는 함수로 바로 사용 가능)"""
+        return draw_detections(img, dic_list, out=out, scale=scale)
 
     def bbox_center(self, bbox_pixel):
         x1, y1, x2, y2 = bbox_pixel
         cx = (x1 + x2) * 0.5
         cy = (y1 + y2) * 0.5
-        return cx, cy
\ No newline at end of file
+        return cx, cy
+
+
+def load_yolo(weight_path, use_server=True):
+    """
+    inference_server.py 가 떠 있으면 그 warm 모델을 공유(RemoteYOLOWrapper),
+    없으면 이 프로세스에서 직접 YOLOWrapper를 로드.
+    """
+    if use_server:
+        try:
+            from inference_server import RemoteYOLOWrapper
+            model = RemoteYOLOWrapper(weight_path)
+            print(f'[YOLO] 추론 서버 모델 사용: {weight_path}')
+            return model
+        except (ConnectionRefusedError, OSError):
+            # 서버 없음 -> 로컬 로드
+            pass
+
+    return YOLOWrapper(weight_path)
+
+
+class YOLOLoader:
+    """
+    YOLOWrapper 생성 + warm-up을 백그라운드 스레드에서 수행.
+    그동안 메인 스레드는 로봇 connect/power_on/gripper_init 등을 진행할 수 있음.
+
+    Usage:
+        loader = YOLOLoader(weight_path)   # 즉시 반환, 로드는 백그라운드
+        ...                                # 로봇 초기화
+        model = loader.get()               # 로드 끝날 때까지 대기 후 YOLOWrapper 반환
+    """
+
+    def __init__(self, weight_path, warmup=True, imgsz=640, use_server=True):
+        self.weight_path = weight_path
+        self.warmup = warmup
+        self.use_server = use_server
+        self.imgsz = imgsz
+
+        self._model = None
+        self._error = None
+        self._done = threading.Event()
+
+        threading.Thread(target=self._load, name=f"YOLOLoader({weight_path})", daemon=True).start()
+
+    def _load(self):
+        try:
+            with TIMELINE.span(f"YOLO load: {self.weight_path}"):
+                model = load_yolo(self.weight_path, use_server=self.use_server)
+            if self.warmup:
+                with TIMELINE.span(f"YOLO warm-up: {self.weight_path}"):
+                    model.warmup(imgsz=self.imgsz)
+            self._model = model
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def ready(self):
+        return self._done.is_set() and self._error is None
+
+    def get(self, timeout=None):
+        """로드 완료까지 대기. 로드 중 예외가 났으면 그대로 다시 raise."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"YOLO 모델 로드 시간 초과: {self.weight_path}")
+        if self._error is not None:
+            raise self._error
+        return self._model